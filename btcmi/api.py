@@ -3,6 +3,14 @@
 This FastAPI application exposes several endpoints:
 
 * ``POST /run`` – execute a scenario and return the results.
+* ``POST /run/batch`` – execute an array of scenarios in one call.
+* ``POST /run/stream`` – execute NDJSON scenarios, streaming NDJSON results.
+* ``PATCH /features/{key}`` – merge partial feature snapshots into the store.
+* ``POST /run/{key}`` – execute a scenario on the stored features of ``key``.
+* ``POST /nodesets`` – register a NAGR node set referenced by ``/run``.
+* ``GET/PATCH/DELETE /nodesets/{handle}`` – inspect, update or drop it.
+* ``POST /sessions`` – open an incremental v2 scoring session.
+* ``GET/PATCH/DELETE /sessions/{handle}`` – read, update or close it.
 * ``POST /validate/{schema_name}`` – validate a payload against a schema.
 * ``GET /metrics`` – expose Prometheus metrics about the service.
 * ``GET /healthz`` – basic health check endpoint.
@@ -11,35 +19,180 @@ This FastAPI application exposes several endpoints:
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import os
 from collections import defaultdict, deque
-from functools import lru_cache
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
 from time import monotonic
-from typing import Any, Callable, Dict
-
-from fastapi import Depends, FastAPI, HTTPException, Request, Response, Security
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    Security,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import APIKeyHeader
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
 from pydantic import BaseModel, ConfigDict
+from starlette.types import Receive
 
+from btcmi import calibration, engine_v2
+from btcmi.cache import ResultCache
 from btcmi.enums import Scenario, Window
-from btcmi.runner import run_nf3p, run_v1, run_v2
+from btcmi.feature_store import (
+    LAYERS as FEATURE_LAYERS,
+    FeatureStore,
+    add_advisories,
+    merge_snapshot,
+)
+from btcmi.microbatch import ItemValidationError, MicroBatcher, validate_and_run
+from btcmi.nodesets import NodeSet, NodeSetRegistry
+from btcmi.runner import run_multi, run_nf3p, run_v1, run_v2
 from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+from btcmi.session import SessionRegistry, SignalSession
+from btcmi.stream import (
+    MAX_LINE_BYTES,
+    alines,
+    anumbered_chunks,
+    score_with_runners,
+)
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Install the configured calibration and router tables at startup."""
+    calibration_config()
+    router_config()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@lru_cache()
+def result_cache() -> ResultCache | None:
+    """Return the shared result cache, or ``None`` when it is disabled.
+
+    The cache is enabled by setting ``BTCMI_RESULT_CACHE_SIZE`` to a positive
+    entry count; ``BTCMI_RESULT_CACHE_BYTES`` and ``BTCMI_RESULT_CACHE_TTL``
+    bound its size and the lifetime of entries without ``freshness_seconds``.
+    """
+    size = int(os.getenv("BTCMI_RESULT_CACHE_SIZE", "0"))
+    if size <= 0:
+        return None
+    max_bytes = int(os.getenv("BTCMI_RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+    ttl = os.getenv("BTCMI_RESULT_CACHE_TTL")
+    return ResultCache(size, max_bytes, float(ttl) if ttl else None)
+
+
+@lru_cache()
+def microbatcher() -> MicroBatcher | None:
+    """Return the ``/run`` micro-batcher, or ``None`` when it is disabled.
+
+    Enable it with ``BTCMI_MICROBATCH=1``; ``BTCMI_MICROBATCH_MAX_SIZE`` and
+    ``BTCMI_MICROBATCH_MAX_DELAY_MS`` bound how many requests a batch collects
+    and how long the first of them waits.  Batches share :func:`result_cache`
+    with the unbatched path.
+    """
+    if os.getenv("BTCMI_MICROBATCH", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return MicroBatcher(
+        int(os.getenv("BTCMI_MICROBATCH_MAX_SIZE", "64")),
+        float(os.getenv("BTCMI_MICROBATCH_MAX_DELAY_MS", "2")) / 1000.0,
+        cache=result_cache(),
+    )
+
+
+@lru_cache()
+def feature_store() -> FeatureStore:
+    """Return the shared feature store behind ``/features`` and ``/run/{key}``.
+
+    ``BTCMI_FEATURE_TTL`` sets the freshness of fields written without
+    ``freshness_seconds`` (unset keeps them fresh),
+    ``BTCMI_FEATURE_STORE_MAX_KEYS`` bounds the number of stored keys and
+    ``BTCMI_FEATURE_STORE_MAX_FIELDS`` the number of fields per key.
+    """
+    ttl = os.getenv("BTCMI_FEATURE_TTL")
+    return FeatureStore(
+        float(ttl) if ttl else None,
+        int(os.getenv("BTCMI_FEATURE_STORE_MAX_KEYS", "10000")),
+        int(os.getenv("BTCMI_FEATURE_STORE_MAX_FIELDS", "1000")),
+    )
+
+
+@lru_cache()
+def nodeset_registry() -> NodeSetRegistry:
+    """Return the registry of NAGR node sets shared by all requests.
+
+    ``BTCMI_NODESET_MAX`` bounds how many node sets may be registered.
+    """
+    return NodeSetRegistry(int(os.getenv("BTCMI_NODESET_MAX", "1024")))
+
+
+@lru_cache()
+def session_registry() -> SessionRegistry:
+    """Return the registry of open v2 scoring sessions.
+
+    ``BTCMI_SESSION_MAX`` bounds how many sessions may be open at once and
+    ``BTCMI_SESSION_IDLE_TTL`` closes sessions unused for that many seconds
+    (default 3600, ``0`` keeps them until deleted).
+    """
+    idle = float(os.getenv("BTCMI_SESSION_IDLE_TTL", "3600"))
+    return SessionRegistry(
+        int(os.getenv("BTCMI_SESSION_MAX", "1024")), idle_ttl=idle or None
+    )
+
+
+@lru_cache()
+def router_config() -> str | None:
+    """Install the router config named by ``BTCMI_ROUTER_CONFIG`` once.
+
+    The file is produced by ``btcmi tune-router``; without the variable the
+    built-in cut points and level weights stay in effect.
+    """
+    path = os.getenv("BTCMI_ROUTER_CONFIG")
+    if path:
+        engine_v2.load_router_config(path)
+    return path
+
+
+@lru_cache()
+def calibration_config() -> str | None:
+    """Compile the calibration named by ``BTCMI_CALIBRATION`` once.
+
+    The file is produced by ``btcmi calibrate``; without the variable the
+    weights and scales of :mod:`btcmi.config` stay in effect.
+    """
+    path = os.getenv("BTCMI_CALIBRATION")
+    if path:
+        calibration.load_calibration(path)
+    return path
 
 
 @lru_cache()
-def load_runners() -> Dict[str, Callable]:
+def load_runners() -> Dict[str, Callable[..., Dict[str, Any]]]:
     """Return a mapping of mode names to runner implementations."""
-    return {
+    calibration_config()
+    router_config()
+    runners: Dict[str, Callable[..., Dict[str, Any]]] = {
         "v1": run_v1,
         "v2.fractal": run_v2,
         "v2.nf3p": run_nf3p,
     }
+    cache = result_cache()
+    if cache is not None:
+        runners = {k: partial(r, cache=cache) for k, r in runners.items()}
+    return runners
 
 
 REQUEST_COUNTER = Counter("btcmi_requests", "Total HTTP requests", ["endpoint"])
@@ -69,26 +222,54 @@ async def count_requests(request: Request, call_next: Callable):
     return response
 
 
-@app.middleware("http")
-async def throttle_requests(request: Request, call_next: Callable):
-    """Naive rate limiter to reduce brute-force attempts."""
-    limit = int(os.getenv("BTCMI_RATE_LIMIT", "60"))
-    window = int(os.getenv("BTCMI_RATE_LIMIT_WINDOW", "60"))
-    client = request.client.host if request.client else "unknown"
+def _rate_limit() -> tuple[int, int]:
+    return (
+        int(os.getenv("BTCMI_RATE_LIMIT", "60")),
+        int(os.getenv("BTCMI_RATE_LIMIT_WINDOW", "60")),
+    )
+
+
+def _batch_max_items() -> int:
+    """Largest ``/run/batch`` size; defaults to the per-window rate limit.
+
+    Every item counts against the rate limit, so a larger default would
+    answer any batch above ``BTCMI_RATE_LIMIT`` with 429 instead of 413.
+    """
+    limit = os.getenv("BTCMI_BATCH_MAX_ITEMS")
+    if limit is not None:
+        return int(limit)
+    return min(1000, _rate_limit()[0])
+
+
+def _consume(client: str, n: int = 1) -> bool:
+    """Record ``n`` units of work for ``client`` if the rate limit allows it."""
+    limit, window = _rate_limit()
     now = monotonic()
     q = _req_times[client]
     while q and q[0] <= now - window:
         q.popleft()
-    if len(q) >= limit:
+    if len(q) + n > limit:
+        return False
+    q.extend([now] * n)
+    return True
+
+
+def _client(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+@app.middleware("http")
+async def throttle_requests(request: Request, call_next: Callable):
+    """Naive rate limiter to reduce brute-force attempts."""
+    if not _consume(_client(request)):
         return Response(status_code=429, content="too many requests")
-    q.append(now)
     return await call_next(request)
 
 
 class RunRequest(BaseModel):
     scenario: Scenario
     window: Window
-    mode: str = "v1"
+    mode: str | List[str] = "v1"
 
     # Allow additional, unmodelled fields in the request payload. Using
     # ``ConfigDict`` avoids deprecation warnings from Pydantic v2 where the
@@ -112,6 +293,43 @@ class RunResponse(BaseModel):
     asof: str
 
 
+class FeaturePatch(BaseModel):
+    window: Window
+    freshness_seconds: float | None = None
+    features: Dict[str, float | None] | None = None
+    features_micro: Dict[str, float | None] | None = None
+    features_mezo: Dict[str, float | None] | None = None
+    features_macro: Dict[str, float | None] | None = None
+
+
+class Propagation(BaseModel):
+    damping: float | None = None
+    tol: float | None = None
+    max_iter: int | None = None
+
+
+class NodeSetCreate(BaseModel):
+    nodes: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] | None = None
+    propagation: Propagation = Propagation()
+
+
+class NodeSetPatch(BaseModel):
+    upsert: List[Dict[str, Any]] = []
+    delete: List[str] = []
+    edges: List[Dict[str, Any]] | None = None
+    propagation: Propagation | None = None
+
+
+class NodeSetInfo(BaseModel):
+    handle: str
+    size: int
+    edges: int
+    version: int
+    nagr_score: float
+    diagnostics: List[str] = []
+
+
 class ValidateRequest(BaseModel):
     # Permit arbitrary fields during validation requests.
     model_config = ConfigDict(extra="allow")
@@ -120,17 +338,33 @@ class ValidateRequest(BaseModel):
 @app.post("/run", response_model=RunResponse)
 async def run_endpoint(
     payload: RunRequest, api_key: str = Depends(get_api_key)
-) -> RunResponse:
+) -> RunResponse | JSONResponse:
     data = payload.model_dump()
+    result = await _run_payload(data)
+    if isinstance(data.get("mode"), list):
+        return JSONResponse(content=result)
+    return result
+
+
+async def _run_payload(data: Dict[str, Any]) -> Any:
+    """Validate and score a ``/run`` payload; list modes return ``{mode: output}``."""
+    nodeset = _pop_nodeset(data)
     mode = data.get("mode", "v1")
+    if isinstance(mode, list):
+        return await _run_multi_modes(data, mode, nodeset)
     runner = load_runners().get(mode)
     if runner is None:
         raise HTTPException(status_code=400, detail=f"unknown mode: {mode}")
+    batcher = microbatcher()
+    if batcher is not None and nodeset is None:
+        return await _run_batched(batcher, mode, data)
     try:
         await asyncio.to_thread(validate_json, data, SCHEMA_REGISTRY["input"])
     except Exception as exc:  # noqa: BLE001
         logger.exception("validation_failed")
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if nodeset is not None:
+        data["nagr_nodes"] = nodeset
     try:
         # API requests should not leave artifacts on disk; explicitly disable
         # writing the output file.
@@ -144,6 +378,377 @@ async def run_endpoint(
     return result
 
 
+def _pop_nodeset(data: Dict[str, Any]) -> NodeSet | None:
+    """Remove a ``nagr_nodeset`` handle from ``data`` and resolve it."""
+    if "nagr_nodeset" not in data:
+        return None
+    handle = data.pop("nagr_nodeset")
+    if not isinstance(handle, str):
+        raise HTTPException(status_code=400, detail="nagr_nodeset must be a string")
+    if "nagr_nodes" in data:
+        raise HTTPException(
+            status_code=400,
+            detail="nagr_nodes and nagr_nodeset are mutually exclusive",
+        )
+    try:
+        return nodeset_registry().get(handle)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+
+
+def _validate_and_run_multi(
+    data: Dict[str, Any], modes: List[str], nodeset: NodeSet | None = None
+) -> Dict[str, Dict[str, Any]]:
+    for m in modes:
+        try:
+            validate_json(dict(data, mode=m), SCHEMA_REGISTRY["input"])
+        except ValueError as exc:
+            raise ItemValidationError(f"mode {m}: {exc}") from exc
+    if nodeset is not None:
+        data = dict(data, nagr_nodes=nodeset)
+    return run_multi(data, None, modes)
+
+
+async def _run_multi_modes(
+    data: Dict[str, Any], modes: List[str], nodeset: NodeSet | None = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run every mode in ``modes`` once, sharing normalization between them."""
+    modes = list(dict.fromkeys(modes))
+    if not modes:
+        raise HTTPException(status_code=400, detail="at least one mode is required")
+    runners = load_runners()
+    unknown = [m for m in modes if m not in runners]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail="unknown mode: " + ", ".join(unknown)
+        )
+    try:
+        result = await asyncio.to_thread(_validate_and_run_multi, data, modes, nodeset)
+    except ItemValidationError as exc:
+        logger.exception("validation_failed")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (KeyError, ValueError) as exc:
+        logger.exception("runner_error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("runner_error")
+        raise HTTPException(status_code=500, detail="internal error") from exc
+    return result
+
+
+async def _run_batched(
+    batcher: MicroBatcher, mode: str, data: Dict[str, Any]
+) -> Dict[str, Any]:
+    try:
+        return await batcher.submit(mode, data)
+    except ItemValidationError as exc:
+        logger.exception("validation_failed")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValueError as exc:
+        logger.exception("runner_error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("runner_error")
+        raise HTTPException(status_code=500, detail="internal error") from exc
+
+
+@app.post("/run/batch")
+async def run_batch_endpoint(
+    request: Request,
+    payloads: List[Dict[str, Any]] = Body(...),
+    api_key: str = Depends(get_api_key),
+) -> List[Dict[str, Any]]:
+    """Score an array of payloads, returning one result or error per item."""
+    # The batch path calls the runners directly; make sure the configured
+    # calibration and router tables are installed as they are for ``/run``.
+    load_runners()
+    max_items = _batch_max_items()
+    if len(payloads) > max_items:
+        raise HTTPException(status_code=413, detail=f"batch exceeds {max_items} items")
+    # The middleware already counted this call as one item.
+    if len(payloads) > 1 and not _consume(_client(request), len(payloads) - 1):
+        raise HTTPException(status_code=429, detail="too many requests")
+    items = [(p.get("mode") or "v1", p) for p in payloads]
+    try:
+        return await asyncio.to_thread(validate_and_run, items)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("runner_error")
+        raise HTTPException(status_code=500, detail="internal error") from exc
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Stream a response while the request body is still being consumed.
+
+    :class:`StreamingResponse` watches ``receive`` for a disconnect while it
+    sends, which would swallow request body messages.  Here the body reader
+    owns ``receive`` until ``body_read`` is set, and a disconnect before then
+    ends the stream through it; afterwards the response listens as usual.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(
+        self, content: AsyncIterator[str], body_read: asyncio.Event, **kwargs: Any
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:  # noqa: D102
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+@app.post("/run/stream")
+async def run_stream_endpoint(
+    request: Request,
+    mode: str = "v1",
+    chunk_size: int = Query(256, ge=1, le=10000),
+    api_key: str = Depends(get_api_key),
+) -> NDJSONStreamingResponse:
+    """Score an NDJSON body chunk by chunk, streaming one result per line.
+
+    ``mode`` applies to lines without their own ``mode`` field.  Only one
+    chunk of input and output is held in memory at a time; the next chunk is
+    read once the previous results have been sent.
+    """
+    runners = load_runners()
+    if mode not in runners:
+        raise HTTPException(status_code=400, detail=f"unknown mode: {mode}")
+    max_line = int(os.getenv("BTCMI_STREAM_MAX_LINE_BYTES", str(MAX_LINE_BYTES)))
+
+    body_read = asyncio.Event()
+
+    async def body() -> AsyncIterator[bytes]:
+        async for part in request.stream():
+            yield part
+        body_read.set()
+
+    async def results() -> AsyncIterator[str]:
+        lines = alines(body(), max_line)
+        chunks = anumbered_chunks(lines, chunk_size)
+        async for chunk in chunks:
+            scored = await asyncio.to_thread(score_with_runners, chunk, mode, runners)
+            yield "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in scored)
+
+    return NDJSONStreamingResponse(results(), body_read)
+
+
+def _nodeset_info(ns: NodeSet) -> NodeSetInfo:
+    score = ns.score()
+    return NodeSetInfo(
+        handle=ns.handle or "",
+        size=len(ns),
+        edges=ns.num_edges,
+        version=ns.version,
+        nagr_score=score,
+        diagnostics=ns.diagnostics(),
+    )
+
+
+def _get_nodeset(handle: str) -> NodeSet:
+    try:
+        return nodeset_registry().get(handle)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+
+
+@app.post("/nodesets", response_model=NodeSetInfo, status_code=201)
+async def create_nodeset(
+    payload: NodeSetCreate, api_key: str = Depends(get_api_key)
+) -> NodeSetInfo:
+    """Register NAGR nodes once and return a handle usable in ``/run``.
+
+    With ``edges`` the set is scored by propagation over the node graph.
+    """
+    try:
+        ns = await asyncio.to_thread(
+            nodeset_registry().register,
+            payload.nodes,
+            payload.edges,
+            **payload.propagation.model_dump(exclude_none=True),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await asyncio.to_thread(_nodeset_info, ns)
+
+
+@app.get("/nodesets/{handle}")
+async def read_nodeset(
+    handle: str, api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    ns = _get_nodeset(handle)
+    info = await asyncio.to_thread(_nodeset_info, ns)
+    return dict(info.model_dump(), nodes=ns.nodes())
+
+
+@app.patch("/nodesets/{handle}", response_model=NodeSetInfo)
+async def update_nodeset(
+    handle: str, payload: NodeSetPatch, api_key: str = Depends(get_api_key)
+) -> NodeSetInfo:
+    """Upsert nodes by ``id``, then delete the listed ids.
+
+    The aggregates are adjusted per changed node, so the cost depends on the
+    size of the update rather than of the node set.  ``edges`` replaces the
+    edge list and ``propagation`` its options.  The whole patch is validated
+    before any of it is applied.
+    """
+    ns = _get_nodeset(handle)
+    params = None
+    if payload.edges is not None or payload.propagation is not None:
+        params = (payload.propagation or Propagation()).model_dump(exclude_none=True)
+    try:
+        await asyncio.to_thread(
+            ns.update,
+            payload.upsert,
+            payload.delete,
+            edges=payload.edges,
+            params=params,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await asyncio.to_thread(_nodeset_info, ns)
+
+
+@app.delete("/nodesets/{handle}", status_code=204)
+async def delete_nodeset(handle: str, api_key: str = Depends(get_api_key)) -> Response:
+    try:
+        nodeset_registry().drop(handle)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+    return Response(status_code=204)
+
+
+def _get_session(handle: str) -> SignalSession:
+    try:
+        return session_registry().get(handle)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+
+
+def _open_session(data: Dict[str, Any]) -> SignalSession:
+    load_runners()  # sessions score with the configured plans and router
+    validate_json(data, SCHEMA_REGISTRY["input"])
+    return session_registry().open(data)
+
+
+@app.post("/sessions", status_code=201)
+async def open_session(
+    data: Dict[str, Any] = Body(...), api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    """Open a v2 session on a full payload and return its handle and output."""
+    if data.get("mode", "v2.fractal") != "v2.fractal":
+        raise HTTPException(status_code=400, detail="sessions require mode v2.fractal")
+    try:
+        session = await asyncio.to_thread(_open_session, data)
+    except ValueError as exc:
+        logger.exception("validation_failed")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"session": session.handle, "output": session.output()}
+
+
+@app.patch("/sessions/{handle}")
+async def update_session(
+    handle: str,
+    delta: Dict[str, Any] = Body(...),
+    full: bool = False,
+    api_key: str = Depends(get_api_key),
+) -> Dict[str, Any]:
+    """Merge a feature delta into a session.
+
+    Returns the updated level and overall signals, or the full output with
+    ``full=true``.
+    """
+    session = _get_session(handle)
+    try:
+        signals = session.update(delta)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return session.output() if full else signals
+
+
+@app.get("/sessions/{handle}")
+async def read_session(
+    handle: str, api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    return _get_session(handle).output()
+
+
+@app.delete("/sessions/{handle}", status_code=204)
+async def close_session(handle: str, api_key: str = Depends(get_api_key)) -> Response:
+    try:
+        session_registry().close(handle)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+    return Response(status_code=204)
+
+
+_RESERVED_KEYS = frozenset({"batch", "stream"})
+
+
+@app.patch("/features/{key}")
+async def patch_features(
+    key: str, payload: FeaturePatch, api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    """Merge changed feature fields for ``key`` at ``window``; null deletes."""
+    if key in _RESERVED_KEYS:
+        raise HTTPException(status_code=400, detail=f"reserved key: {key}")
+    layers = {
+        layer: getattr(payload, layer)
+        for layer in FEATURE_LAYERS
+        if getattr(payload, layer) is not None
+    }
+    try:
+        sizes = feature_store().patch(
+            key, payload.window.value, layers, payload.freshness_seconds
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"key": key, "window": payload.window.value, "fields": sizes}
+
+
+@app.get("/features/{key}")
+async def read_features(
+    key: str, window: Window, api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    """Return the stored fields of ``key`` with their age and staleness."""
+    return {
+        "key": key,
+        "window": window.value,
+        "layers": feature_store().describe(key, window.value),
+    }
+
+
+@app.delete("/features/{key}", status_code=204)
+async def delete_features(
+    key: str, window: Window | None = None, api_key: str = Depends(get_api_key)
+) -> Response:
+    if not feature_store().drop(key, window.value if window else None):
+        raise HTTPException(status_code=404, detail=f"no features stored for {key}")
+    return Response(status_code=204)
+
+
+@app.post("/run/{key}")
+async def run_stored_endpoint(
+    key: str, payload: RunRequest, api_key: str = Depends(get_api_key)
+) -> Dict[str, Any]:
+    """Score the stored features of ``key`` at the payload's ``window``.
+
+    Feature blocks in the payload override stored fields of the same name.
+    Expired fields are left out and reported as ``stale_feature:`` advisories.
+    """
+    data = payload.model_dump()
+    snap = feature_store().snapshot(key, data["window"])
+    if not snap.layers:
+        raise HTTPException(status_code=404, detail=f"no features stored for {key}")
+    result: Dict[str, Any] = await _run_payload(merge_snapshot(data, snap))
+    if isinstance(data.get("mode"), list):
+        for out in result.values():
+            add_advisories(out, snap.stale)
+    else:
+        add_advisories(result, snap.stale)
+    return result
+
+
 @app.post("/validate/{schema_name}")
 async def validate_endpoint(
     schema_name: str, payload: ValidateRequest, api_key: str = Depends(get_api_key)
@@ -152,9 +757,7 @@ async def validate_endpoint(
     if schema_path is None:
         raise HTTPException(status_code=404, detail="schema not found")
     try:
-        await asyncio.to_thread(
-            validate_json, payload.model_dump(), schema_path
-        )
+        await asyncio.to_thread(validate_json, payload.model_dump(), schema_path)
     except Exception as exc:  # noqa: BLE001
         logger.exception("validation_failed")
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -172,5 +775,13 @@ async def healthz() -> dict[str, str]:
     return {"status": "ok"}
 
 
-__all__ = ["app", "load_runners", "REQUEST_COUNTER"]
-
+__all__ = [
+    "app",
+    "feature_store",
+    "load_runners",
+    "microbatcher",
+    "nodeset_registry",
+    "session_registry",
+    "result_cache",
+    "REQUEST_COUNTER",
+]
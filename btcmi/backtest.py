@@ -0,0 +1,234 @@
+"""Walk-forward evaluation of NF3P layer predictions.
+
+The NF3P engine predicts with the equal-weight score of each layer.  Here
+those predictions are computed for every row of a feature history in one
+vectorized pass and compared with the realized forward returns of the same
+rows over consecutive walk-forward folds:
+
+* Each fold is a contiguous test span.  Before it, the layer prediction is
+  calibrated to return units by the least-squares slope ``beta`` of the
+  returns on the predictions over all earlier rows whose forward return was
+  already realized when the fold starts (rows within ``horizon`` bars of the
+  fold are purged).
+* ``mse`` and ``mae`` measure ``beta * prediction - return`` on the fold.
+* ``hit_rate`` is the share of rows with non-zero prediction and return
+  whose signs agree, and ``ic`` is the Spearman rank correlation of the
+  predictions with the returns.
+
+Rows where a layer has no features, or whose forward return is unknown, are
+left out of that layer's metrics.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+from scipy import stats
+
+from btcmi import batch, plans
+from btcmi.bars import Bars
+from btcmi.batch import FeatureMatrix
+from btcmi.norm_cache import NormCache
+from btcmi.ohlcv import FeatureWindows, build_features
+
+LEVELS = ("L1", "L2", "L3")
+
+
+def layer_predictions(
+    layers: Mapping[str, FeatureMatrix],
+    *,
+    cache: NormCache | None = None,
+    name: str = "features",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the NF3P prediction of every row and level.
+
+    Args:
+        layers: ``{"L1" | "L2" | "L3": FeatureMatrix}`` such as
+            :attr:`btcmi.ohlcv.OHLCVFeatures.layers`.
+        cache: Reuse normalized layers persisted under ``<name>.<level>``;
+            they are only recomputed when the layer scales change.
+        name: Identifier of the feature history in ``cache``.
+
+    Returns:
+        Tuple of ``(N, 3)`` predictions and ``(N, 3)`` masks of the rows
+        where the level has at least one feature.
+    """
+
+    preds, valid = [], []
+    for level in LEVELS:
+        plan = plans.LAYER_PLANS[level]
+        m = layers[level]
+        if cache is None:
+            norm = batch.normalize_matrix(m, plan.norm.scale_map, exact=False)
+        else:
+            entry = cache.get(f"{name}.{level}", m, plan.norm.scale_map, exact=False)
+            norm = entry.norm
+        score, _ = batch.equal_weight_score_matrix(norm, m.mask, plan.equal_denominator)
+        preds.append(score)
+        valid.append(m.mask.any(axis=1))
+    return np.column_stack(preds), np.column_stack(valid)
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Log return from each bar to ``horizon`` bars later; NaN at the end."""
+
+    if horizon < 1:
+        raise ValueError("horizon must be positive")
+    logc = np.log(np.asarray(close, dtype=float))
+    out = np.full(len(logc), np.nan)
+    if horizon < len(logc):
+        out[:-horizon] = logc[horizon:] - logc[:-horizon]
+    return out
+
+
+def _prefix(x: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(x) + 1)
+    np.cumsum(x, out=out[1:])
+    return out
+
+
+def _errors(p: np.ndarray, r: np.ndarray, beta: Any) -> Dict[str, Any]:
+    if not len(p):
+        return {"n": 0, "mse": None, "mae": None, "hit_rate": None}
+    err = beta * p - r
+    signed = (p != 0) & (r != 0)
+    hits = np.sign(p[signed]) == np.sign(r[signed])
+    return {
+        "n": len(p),
+        "mse": float(np.mean(err * err)),
+        "mae": float(np.mean(np.abs(err))),
+        "hit_rate": float(hits.mean()) if hits.size else None,
+    }
+
+
+def _ic(p: np.ndarray, r: np.ndarray) -> float | None:
+    if len(p) < 2 or np.ptp(p) == 0 or np.ptp(r) == 0:
+        return None
+    return float(stats.spearmanr(p, r)[0])
+
+
+def walk_forward(
+    predictions: np.ndarray,
+    returns: np.ndarray,
+    *,
+    valid: np.ndarray | None = None,
+    folds: int = 10,
+    min_train: int | None = None,
+    horizon: int = 1,
+) -> Dict[str, Any]:
+    """Evaluate level predictions against realized returns fold by fold.
+
+    Args:
+        predictions: ``(N, 3)`` L1/L2/L3 predictions.
+        returns: ``(N,)`` realized forward returns; NaN where unknown.
+        valid: ``(N, 3)`` mask of usable predictions; all rows by default.
+        folds: Number of test folds splitting the rows after ``min_train``.
+        min_train: Rows before the first fold; defaults to one fold's length.
+        horizon: Bars spanned by each return, purged before every fold.
+
+    Returns:
+        ``{"folds": [...], "summary": {...}}`` with per-fold metrics of each
+        level and the metrics pooled over all folds, ``ic`` averaged.
+
+    Raises:
+        ValueError: If the shapes disagree or there are too few rows.
+    """
+
+    p = np.asarray(predictions, dtype=float)
+    r = np.asarray(returns, dtype=float)
+    n = len(r)
+    if p.shape != (n, len(LEVELS)):
+        raise ValueError("predictions must have shape (len(returns), 3)")
+    ok = np.ones(p.shape, dtype=bool) if valid is None else np.asarray(valid, bool)
+    if ok.shape != p.shape:
+        raise ValueError("valid must have the shape of predictions")
+    if folds < 1 or horizon < 1:
+        raise ValueError("folds and horizon must be positive")
+    start = n // (folds + 1) if min_train is None else min_train
+    if start < 0 or n - start < folds:
+        raise ValueError("not enough rows for the requested folds")
+    edges = np.linspace(start, n, folds + 1).astype(int)
+    usable = ok & np.isfinite(r)[:, None]
+    r0 = np.where(np.isfinite(r), r, 0.0)
+
+    spans = zip(edges[:-1].tolist(), edges[1:].tolist())
+    report: Dict[str, Any] = {
+        "folds": [{"start": lo, "end": hi} for lo, hi in spans],
+        "summary": {},
+    }
+    for j, level in enumerate(LEVELS):
+        u = usable[:, j]
+        pj = np.where(u, p[:, j], 0.0)
+        spr = _prefix(pj * r0)
+        spp = _prefix(pj * pj)
+        sel_all, beta_all, ics = [], [], []
+        for fold in report["folds"]:
+            lo, hi = fold["start"], fold["end"]
+            cut = max(lo - horizon + 1, 0)
+            beta = float(spr[cut] / spp[cut]) if spp[cut] > 0 else 0.0
+            sel = np.flatnonzero(u[lo:hi]) + lo
+            ic = _ic(p[sel, j], r[sel])
+            metrics = dict(_errors(p[sel, j], r[sel], beta), beta=beta, ic=ic)
+            fold[level] = metrics
+            sel_all.append(sel)
+            beta_all.append(np.full(len(sel), beta))
+            if ic is not None:
+                ics.append(ic)
+        sel = np.concatenate(sel_all)
+        pooled = _errors(p[sel, j], r[sel], np.concatenate(beta_all))
+        pooled["ic"] = float(np.mean(ics)) if ics else None
+        report["summary"][level] = pooled
+    return report
+
+
+def evaluate_nf3p(
+    bars: Bars,
+    windows: FeatureWindows = FeatureWindows(),
+    *,
+    horizon: int = 60,
+    folds: int = 10,
+    min_train: int | None = None,
+    norm_cache: NormCache | None = None,
+    name: str = "features",
+) -> Dict[str, Any]:
+    """Walk-forward NF3P evaluation of an OHLCV series.
+
+    Features come from :func:`btcmi.ohlcv.build_features` and the target is
+    the ``horizon``-bar forward log return of ``close``.
+
+    Args:
+        bars: OHLCV series, e.g. from :func:`btcmi.bars.open_bars`.
+        windows: Layer lookbacks in bars.
+        horizon: Bars ahead of each forecast.
+        folds: Number of walk-forward test folds.
+        min_train: Bars before the first fold.
+        norm_cache: Persisted normalized layers, see :func:`layer_predictions`.
+        name: Identifier of the bars and ``windows`` in ``norm_cache``.
+
+    Returns:
+        :func:`walk_forward` report with ``mode``, ``horizon`` and ``rows``,
+        and the first and last timestamp of each fold.
+    """
+
+    feats = build_features(bars.columns, windows)
+    preds, valid = layer_predictions(feats.layers, cache=norm_cache, name=name)
+    returns = forward_returns(bars["close"], horizon)
+    report = walk_forward(
+        preds, returns, valid=valid, folds=folds, min_train=min_train, horizon=horizon
+    )
+    for fold in report["folds"]:
+        if fold["end"] > fold["start"]:
+            ends = bars.timestamps[[fold["start"], fold["end"] - 1]]
+            first, last = np.datetime_as_string(ends, unit="s").tolist()
+            fold["from"], fold["to"] = first + "Z", last + "Z"
+    return {"mode": "v2.nf3p", "horizon": horizon, "rows": len(bars), **report}
+
+
+__all__ = [
+    "LEVELS",
+    "layer_predictions",
+    "forward_returns",
+    "walk_forward",
+    "evaluate_nf3p",
+]
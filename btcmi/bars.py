@@ -0,0 +1,349 @@
+"""Memory-mapped columnar store of OHLCV bars.
+
+:func:`convert` parses a CSV file or JSON array of bars once and writes a
+directory holding one raw little-endian array per column plus a
+``meta.json`` describing the column types and row count.  The timestamp
+index is stored as ``datetime64[s]`` and every other column as
+``float64``.  :func:`open_bars` maps that directory back into memory
+without reading it, so opening years of minute bars costs nothing until
+the bars are touched.
+
+:class:`Bars` slices by time range with views of the mapped arrays and
+resamples to any window of the input schema's ``N(m|h|d)`` form with
+vectorized per-bucket reductions.  Buckets are aligned to the Unix epoch,
+so ``1d`` bars start at midnight UTC.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from btcmi.enums import Window
+
+FORMAT = "btcmi-bars"
+FORMAT_VERSION = 1
+TIMESTAMP_DTYPE = np.dtype("datetime64[s]")
+
+# How each column is combined within a resampled bar; other columns keep
+# their last value.
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+_WINDOW_RE = re.compile(r"^([0-9]+)(m|h|d)$")
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(window: Window | str) -> int:
+    """Return the length of ``window`` in seconds.
+
+    Raises:
+        ValueError: If ``window`` does not match ``N(m|h|d)`` with ``N > 0``.
+    """
+
+    text = window.value if isinstance(window, Window) else window
+    m = _WINDOW_RE.match(text) if isinstance(text, str) else None
+    if m is None or int(m.group(1)) == 0:
+        raise ValueError(f"invalid window: {window!r}")
+    return int(m.group(1)) * _UNIT_SECONDS[m.group(2)]
+
+
+def _as_datetime(value: Any) -> np.datetime64:
+    if isinstance(value, (int, np.integer)):
+        return np.datetime64(int(value), "s")
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return np.datetime64(ts.to_datetime64(), "s")
+
+
+@dataclass(frozen=True)
+class Bars:
+    """OHLCV columns indexed by strictly increasing UTC timestamps.
+
+    Attributes:
+        timestamps: ``datetime64[s]`` bar open times.
+        columns: Column name to ``float64`` array of the same length.
+    """
+
+    timestamps: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    def __post_init__(self) -> None:
+        n = len(self.timestamps)
+        if any(len(v) != n for v in self.columns.values()):
+            raise ValueError("bar columns must have equal length")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == "timestamp":
+            return self.timestamps
+        return self.columns[name]
+
+    def between(self, start: Any = None, end: Any = None) -> "Bars":
+        """Return the bars with ``start <= timestamp < end`` without copying.
+
+        Bounds may be ISO strings, ``datetime`` or ``datetime64`` values, or
+        integer Unix seconds; ``None`` leaves that side open.
+        """
+
+        ts = self.timestamps
+        lo = 0 if start is None else int(ts.searchsorted(_as_datetime(start)))
+        hi = len(ts) if end is None else int(ts.searchsorted(_as_datetime(end)))
+        hi = max(lo, hi)
+        return Bars(ts[lo:hi], {k: v[lo:hi] for k, v in self.columns.items()})
+
+    def resample(self, window: Window | str) -> "Bars":
+        """Aggregate into epoch-aligned bars of ``window``.
+
+        Each output bar is labelled with its bucket's start time; buckets
+        without input bars are left out.
+
+        Raises:
+            ValueError: If ``window`` is invalid.
+        """
+
+        return self._aggregate(parse_window(window))
+
+    def _aggregate(self, period: int) -> "Bars":
+        if not len(self):
+            empty = {k: np.asarray(v[:0]) for k, v in self.columns.items()}
+            return Bars(np.asarray(self.timestamps[:0]), empty)
+        key = self.timestamps.view(np.int64) // period
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        ends = np.r_[starts[1:], len(key)]
+        columns: Dict[str, np.ndarray] = {}
+        for name, col in self.columns.items():
+            how = AGGREGATIONS.get(name, "last")
+            if how == "first":
+                columns[name] = col[starts]
+            elif how == "max":
+                columns[name] = np.maximum.reduceat(col, starts)
+            elif how == "min":
+                columns[name] = np.minimum.reduceat(col, starts)
+            elif how == "sum":
+                columns[name] = np.add.reduceat(col, starts)
+            else:
+                columns[name] = col[ends - 1]
+        stamps = (key[starts] * period).astype(TIMESTAMP_DTYPE)
+        return Bars(stamps, columns)
+
+    def iso_timestamps(self) -> np.ndarray:
+        """Return the timestamps as ``YYYY-MM-DDTHH:MM:SSZ`` strings."""
+
+        return np.char.add(np.datetime_as_string(self.timestamps, unit="s"), "Z")
+
+    def to_mapping(self) -> Dict[str, np.ndarray]:
+        """Return the columns for :func:`btcmi.ohlcv.build_features`.
+
+        The ``timestamp`` column holds ISO strings, which become the
+        payload ``asof``.
+        """
+
+        return {"timestamp": self.iso_timestamps(), **self.columns}
+
+
+def _frames(p: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if p.suffix.lower() == ".json":
+        yield pd.DataFrame.from_records(json.loads(p.read_text()))
+    else:
+        yield from pd.read_csv(p, chunksize=chunk_rows)
+
+
+def _parse_timestamps(col: pd.Series) -> np.ndarray:
+    stamps: np.ndarray | None = None
+    if pd.api.types.is_numeric_dtype(col):
+        stamps = pd.to_datetime(col, unit="s").to_numpy()
+    else:
+        # NumPy parses plain ISO strings several times faster than pandas;
+        # strings with UTC offsets or other layouts take the pandas path.
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            try:
+                text = col.astype(str).str.removesuffix("Z").to_numpy()
+                stamps = np.array(text, dtype=TIMESTAMP_DTYPE)
+            except (ValueError, DeprecationWarning):
+                pass
+        if stamps is None:
+            stamps = pd.to_datetime(col, utc=True).dt.tz_localize(None).to_numpy()
+    stamps = stamps.astype(TIMESTAMP_DTYPE)
+    if np.isnat(stamps).any():
+        raise ValueError("column 'timestamp' has missing values")
+    return stamps
+
+
+def convert(src: str | Path, dest: str | Path, *, chunk_rows: int = 1_000_000) -> Path:
+    """Convert a CSV or JSON OHLCV file into a columnar bar directory.
+
+    CSV input is parsed ``chunk_rows`` rows at a time, so memory use does
+    not grow with the file.  ``meta.json`` is written last; a directory
+    without it is not a complete store.
+
+    Args:
+        src: CSV file, or JSON file holding an array of bar records, with a
+            ``timestamp`` column of ISO strings or Unix seconds.
+        dest: Output directory, created if needed.
+        chunk_rows: CSV rows parsed per chunk.
+
+    Returns:
+        The output directory.
+
+    Raises:
+        ValueError: If the timestamp column is missing, unsorted or has
+            duplicates, or another column is not numeric.
+    """
+
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be positive")
+    out = Path(dest)
+    out.mkdir(parents=True, exist_ok=True)
+    (out / "meta.json").unlink(missing_ok=True)
+    files: Dict[str, Any] = {}
+    names: Tuple[str, ...] = ()
+    rows = 0
+    last = None
+    try:
+        for frame in _frames(Path(src), chunk_rows):
+            if not files:
+                if "timestamp" not in frame.columns:
+                    raise ValueError("OHLCV data requires a 'timestamp' column")
+                names = tuple(c for c in frame.columns if c != "timestamp")
+                files = {
+                    name: open(out / f"{name}.bin", "wb")
+                    for name in ("timestamp",) + names
+                }
+            elif tuple(c for c in frame.columns if c != "timestamp") != names:
+                raise ValueError("OHLCV columns changed between chunks")
+            stamps = _parse_timestamps(frame["timestamp"]).view(np.int64)
+            if len(stamps) and (
+                np.any(np.diff(stamps) <= 0) or (last is not None and stamps[0] <= last)
+            ):
+                raise ValueError("timestamps must be strictly increasing")
+            if len(stamps):
+                last = stamps[-1]
+            files["timestamp"].write(stamps.astype("<i8").tobytes())
+            for name in names:
+                try:
+                    col = frame[name].to_numpy(dtype="<f8")
+                except (TypeError, ValueError):
+                    raise ValueError(f"column {name!r} must be numeric") from None
+                files[name].write(col.tobytes())
+            rows += len(frame)
+    finally:
+        for f in files.values():
+            f.close()
+    if not files:
+        raise ValueError("OHLCV data requires a 'timestamp' column")
+    meta = {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "timestamp": TIMESTAMP_DTYPE.str,
+        "columns": {name: "<f8" for name in names},
+    }
+    (out / "meta.json").write_text(json.dumps(meta, indent=2))
+    return out
+
+
+def _map(path: Path, dtype: str, rows: int) -> np.ndarray:
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+
+
+def open_bars(path: str | Path) -> Bars:
+    """Memory-map a directory written by :func:`convert`.
+
+    Raises:
+        ValueError: If the directory is not a complete bar store.
+    """
+
+    root = Path(path)
+    try:
+        meta = json.loads((root / "meta.json").read_text())
+    except FileNotFoundError:
+        raise ValueError(f"not a bar store: {root}") from None
+    if meta.get("format") != FORMAT or meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported bar store format in {root}")
+    rows = int(meta["rows"])
+    stamps = _map(root / "timestamp.bin", "<i8", rows).view(meta["timestamp"])
+    columns = {
+        name: _map(root / f"{name}.bin", dtype, rows)
+        for name, dtype in meta["columns"].items()
+    }
+    return Bars(stamps, columns)
+
+
+def from_mapping(ohlcv: Mapping[str, Any]) -> Bars:
+    """Build in-memory :class:`Bars` from a column mapping or DataFrame.
+
+    Raises:
+        ValueError: If the timestamp column is missing or not strictly
+            increasing.
+    """
+
+    if "timestamp" not in ohlcv:
+        raise ValueError("OHLCV data requires a 'timestamp' column")
+    stamps = _parse_timestamps(pd.Series(np.asarray(ohlcv["timestamp"])))
+    if np.any(np.diff(stamps.view(np.int64)) <= 0):
+        raise ValueError("timestamps must be strictly increasing")
+    columns = {
+        name: np.asarray(ohlcv[name], dtype=float)
+        for name in ohlcv.keys()
+        if name != "timestamp"
+    }
+    return Bars(stamps, columns)
+
+
+def resample_many(bars: Bars, windows: Iterable[Window | str]) -> Dict[str, Bars]:
+    """Resample ``bars`` to several windows in one hierarchical pass.
+
+    Windows are built from the shortest up, each from the longest window
+    already built whose length divides it, so ``1h`` is aggregated from
+    ``5m`` bars and ``1d`` from ``1h`` bars rather than from the raw
+    series.  Epoch-aligned buckets nest, so the result equals resampling
+    ``bars`` directly.
+
+    Returns:
+        Resampled bars keyed by window string, in request order.
+
+    Raises:
+        ValueError: If a window is invalid.
+    """
+
+    keys = [w.value if isinstance(w, Window) else w for w in windows]
+    periods = {key: parse_window(key) for key in keys}
+    built: Dict[int, Bars] = {}
+    for period in sorted(set(periods.values())):
+        source = bars
+        for p in sorted(built, reverse=True):
+            if period % p == 0:
+                source = built[p]
+                break
+        built[period] = source._aggregate(period)
+    return {key: built[periods[key]] for key in keys}
+
+
+__all__ = [
+    "AGGREGATIONS",
+    "Bars",
+    "parse_window",
+    "convert",
+    "open_bars",
+    "from_mapping",
+    "resample_many",
+]
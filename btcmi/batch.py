@@ -0,0 +1,371 @@
+"""Vectorized batch scoring over dense feature matrices.
+
+The scalar helpers in :mod:`btcmi.feature_processing` operate on one feature
+mapping at a time.  This module lays ``N`` payloads out as an ``(N, K)``
+matrix whose columns follow a fixed feature order (typically the keys of
+``NORM_SCALE`` or one of the ``SCALES`` layers) together with a boolean mask
+marking which entries were present and numeric.  Normalization and weighted
+sums are then evaluated column by column across all rows at once.
+
+Summation follows the iteration order of the weight mapping, exactly like
+:func:`btcmi.feature_processing.weighted_score`, so every row reproduces the
+scalar result bit for bit.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Sequence, Tuple, cast
+import math
+
+import numpy as np
+
+from btcmi import config, plans
+from btcmi.engine_v2 import ROUTER_REGIMES, effective_level_weights
+from btcmi.utils import is_number
+
+
+@dataclass(frozen=True)
+class FeatureMatrix:
+    """Raw feature values for a batch of payloads.
+
+    Attributes:
+        columns: Feature names in column order.
+        values: ``(N, K)`` float array of raw values; missing entries are 0.
+        mask: ``(N, K)`` boolean array, ``True`` where the value was present
+            and numeric.
+    """
+
+    columns: Tuple[str, ...]
+    values: np.ndarray
+    mask: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.values.shape[0])
+
+
+@dataclass(frozen=True)
+class BatchScore:
+    """Container for :func:`score_matrix` outputs.
+
+    Attributes:
+        columns: Feature names in column order.
+        normalized: ``(N, K)`` normalized values; masked entries are 0.
+        mask: ``(N, K)`` presence mask shared with the input matrix.
+        contributions: ``(N, K)`` weighted contributions; entries without a
+            weight or a value are 0.
+        score: ``(N,)`` clipped weighted scores.
+    """
+
+    columns: Tuple[str, ...]
+    normalized: np.ndarray
+    mask: np.ndarray
+    contributions: np.ndarray
+    score: np.ndarray
+
+
+def feature_matrix(
+    rows: Iterable[Mapping[str, Any]], columns: Sequence[str]
+) -> FeatureMatrix:
+    """Build a :class:`FeatureMatrix` from feature mappings.
+
+    Args:
+        rows: Feature mappings, one per payload.
+        columns: Feature names defining the column order.
+
+    Returns:
+        Dense values with a mask of present, numeric entries.  Keys absent
+        from ``columns`` are ignored.
+    """
+
+    cols = tuple(columns)
+    rows = list(rows)
+    raw = [feats.get(k) for feats in rows for k in cols]
+    present = [is_number(v) for v in raw]
+    n = len(rows)
+    values = np.array(
+        [v if p else 0.0 for v, p in zip(raw, present)], dtype=float
+    ).reshape(n, len(cols))
+    mask = np.array(present, dtype=bool).reshape(n, len(cols))
+    return FeatureMatrix(cols, values, mask)
+
+
+def _tanh(z: np.ndarray, exact: bool) -> np.ndarray:
+    # ``np.tanh`` may use SIMD kernels that differ from libm by one ulp; the
+    # exact path maps ``math.tanh`` so results equal the scalar engine.
+    if not exact:
+        return cast(np.ndarray, np.tanh(z))
+    flat = z.ravel().tolist()
+    return np.fromiter(map(math.tanh, flat), dtype=float, count=len(flat)).reshape(
+        z.shape
+    )
+
+
+def normalize_matrix(
+    matrix: FeatureMatrix, scales: Mapping[str, float], *, exact: bool = True
+) -> np.ndarray:
+    """Vectorized counterpart of :func:`~btcmi.feature_processing.normalize_features`.
+
+    Args:
+        matrix: Raw feature values.
+        scales: Per-feature scale factors; unknown columns use ``1.0``.
+        exact: When ``True`` (default) the result matches the scalar path
+            exactly.  ``False`` uses ``np.tanh`` which is faster but may
+            differ in the last bit.
+
+    Returns:
+        ``(N, K)`` array of ``tanh(value / scale)`` with masked entries set
+        to 0.
+    """
+
+    scale = np.array([scales.get(k, 1.0) for k in matrix.columns], dtype=float)
+    out = np.zeros_like(matrix.values)
+    z = matrix.values / scale
+    out[matrix.mask] = _tanh(z[matrix.mask], exact)
+    return out
+
+
+def clip_unit(x: np.ndarray) -> np.ndarray:
+    """Clip to ``[-1, 1]`` with the semantics of ``max(-1.0, min(1.0, x))``."""
+
+    x = np.where(x < 1.0, x, 1.0)
+    return np.where(x > -1.0, x, -1.0)
+
+
+def weighted_score_matrix(
+    norm: np.ndarray,
+    mask: np.ndarray,
+    columns: Sequence[str],
+    weights: Mapping[str, float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized counterpart of :func:`~btcmi.feature_processing.weighted_score`.
+
+    Args:
+        norm: ``(N, K)`` normalized values.
+        mask: ``(N, K)`` presence mask.
+        columns: Feature names in column order.
+        weights: Weight assigned to each feature.
+
+    Returns:
+        Tuple of ``(N,)`` scores and ``(N, K)`` contributions.
+    """
+
+    index = {k: j for j, k in enumerate(columns)}
+    n = norm.shape[0]
+    s = np.zeros(n)
+    den = np.zeros(n)
+    contrib = np.zeros_like(norm)
+    for k, w in weights.items():
+        j = index.get(k)
+        if j is None:
+            continue
+        present = mask[:, j]
+        c = np.where(present, norm[:, j] * w, 0.0)
+        contrib[:, j] = c
+        s = s + c
+        den = den + np.where(present, abs(w), 0.0)
+    ratio = np.divide(s, den, out=np.zeros(n), where=den != 0)
+    score = np.where(den != 0, clip_unit(ratio), 0.0)
+    return score, contrib
+
+
+def equal_weight_score_matrix(
+    norm: np.ndarray,
+    mask: np.ndarray,
+    denominator: Callable[[int], float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score every row with equal weights on its present features.
+
+    Row ``i`` matches ``weighted_score(norm_i, layer_equal_weights(norm_i))``
+    when the columns follow the key order of the row's feature mapping.
+
+    Args:
+        norm: ``(N, K)`` normalized values.
+        mask: ``(N, K)`` presence mask.
+        denominator: Returns the equal-weight denominator for ``n`` present
+            features, e.g. :meth:`btcmi.plans.LayerPlan.equal_denominator`.
+
+    Returns:
+        Tuple of ``(N,)`` scores and ``(N, K)`` contributions.
+    """
+
+    rows = norm.shape[0]
+    n = mask.sum(axis=1)
+    w = np.divide(1.0, n, out=np.zeros(rows), where=n > 0)
+    s = np.zeros(rows)
+    contrib = np.zeros_like(norm)
+    for j in range(norm.shape[1]):
+        c = np.where(mask[:, j], norm[:, j] * w, 0.0)
+        contrib[:, j] = c
+        s = s + c
+    counts, inverse = np.unique(n, return_inverse=True)
+    den = np.array([denominator(int(k)) for k in counts], dtype=float)[inverse]
+    ok = (n > 0) & (den != 0)
+    ratio = np.divide(s, den, out=np.zeros(rows), where=ok)
+    return np.where(ok, clip_unit(ratio), 0.0), contrib
+
+
+def router_matrix(vol_pctl: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized :func:`~btcmi.engine_v2.router_weights`.
+
+    Args:
+        vol_pctl: ``(N,)`` volatility percentiles.
+
+    Returns:
+        Tuple of ``(N,)`` indices into :data:`~btcmi.engine_v2.ROUTER_REGIMES`
+        and ``(N, 3)`` effective L1/L2/L3 weights as applied by
+        :func:`~btcmi.engine_v2.combine_levels`.
+    """
+
+    low, high = config.ROUTER_CUTS
+    idx = np.where(vol_pctl < low, 0, np.where(vol_pctl < high, 1, 2))
+    table = []
+    for regime in ROUTER_REGIMES:
+        w = effective_level_weights(config.ROUTER_LEVEL_WEIGHTS[regime])
+        table.append([w["L1"], w["L2"], w["L3"]])
+    return idx, np.array(table, dtype=float).reshape(-1, 3)[idx]
+
+
+def combine_levels_matrix(
+    s1: np.ndarray, s2: np.ndarray, s3: np.ndarray, alphas: np.ndarray
+) -> np.ndarray:
+    """Vectorized :func:`~btcmi.engine_v2.combine_levels` for ``(N, 3)`` weights."""
+
+    return clip_unit(alphas[:, 0] * s1 + alphas[:, 1] * s2 + alphas[:, 2] * s3)
+
+
+def score_matrix(
+    matrix: FeatureMatrix,
+    scales: Mapping[str, float],
+    weights: Mapping[str, float],
+    *,
+    exact: bool = True,
+) -> BatchScore:
+    """Normalize ``matrix`` and compute weighted scores for every row.
+
+    Args:
+        matrix: Raw feature values.
+        scales: Per-feature scale factors.
+        weights: Weight assigned to each feature.
+        exact: Forwarded to :func:`normalize_matrix`.
+
+    Returns:
+        :class:`BatchScore` with normalized values, contributions and scores.
+    """
+
+    norm = normalize_matrix(matrix, scales, exact=exact)
+    score, contrib = weighted_score_matrix(norm, matrix.mask, matrix.columns, weights)
+    return BatchScore(matrix.columns, norm, matrix.mask, contrib, score)
+
+
+@dataclass(frozen=True)
+class ScenarioMatrix:
+    """Every v1 scenario profile as one scenario x feature weight matrix.
+
+    Each row lists a scenario's weighted features first, in weight order, so
+    that sums along a row follow the scalar path.
+
+    Attributes:
+        scenarios: Scenario names, one row each.
+        columns: Union of the weighted features.
+        order: ``(S, K)`` index into ``columns`` for each matrix entry.
+        weights: ``(S, K)`` weights, zero past a scenario's own features.
+        weighted: ``(S, K)`` mask of the entries carrying a weight.
+    """
+
+    scenarios: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    order: np.ndarray
+    weights: np.ndarray
+    weighted: np.ndarray
+
+    def score(
+        self, norm: np.ndarray, mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Score ``(N, K)`` normalized rows under every scenario at once.
+
+        Args:
+            norm: Normalized values with columns in ``columns`` order.
+            mask: Presence mask for ``norm``.
+
+        Returns:
+            Tuple of ``(N, S)`` scores and ``(N, S, K)`` contributions laid
+            out like ``order``; both equal :func:`weighted_score_matrix` run
+            once per scenario.
+        """
+
+        active = self.weighted & mask[:, self.order]
+        contrib = np.where(active, norm[:, self.order] * self.weights, 0.0)
+        den = _sequential_sum(np.where(active, np.abs(self.weights), 0.0))
+        s = _sequential_sum(contrib)
+        ratio = np.divide(s, den, out=np.zeros(s.shape), where=den != 0)
+        return np.where(den != 0, clip_unit(ratio), 0.0), contrib
+
+
+def _sequential_sum(terms: np.ndarray) -> np.ndarray:
+    """Left-to-right sum over the last axis, as a Python ``+=`` loop from 0.0.
+
+    ``cumsum`` accumulates strictly in order, unlike ``sum`` which may sum
+    pairwise; adding ``0.0`` turns an all ``-0.0`` total into ``0.0``.
+    """
+
+    return terms.cumsum(axis=-1)[..., -1] + 0.0
+
+
+_SCENARIO_MATRIX: Tuple[Any, ScenarioMatrix] | None = None
+
+
+def scenario_matrix() -> ScenarioMatrix:
+    """Return the :class:`ScenarioMatrix` for the current scenario plans.
+
+    The matrix is rebuilt whenever :func:`btcmi.plans.compile_plans` replaces
+    the plans.
+    """
+
+    global _SCENARIO_MATRIX
+    current = plans.SCENARIO_PLANS
+    if _SCENARIO_MATRIX is not None and _SCENARIO_MATRIX[0] is current:
+        return _SCENARIO_MATRIX[1]
+    scenarios = tuple(current)
+    columns = tuple(dict.fromkeys(k for p in current.values() for k in p.features))
+    index = {k: j for j, k in enumerate(columns)}
+    shape = (len(scenarios), len(columns))
+    order = np.zeros(shape, dtype=np.intp)
+    weights = np.zeros(shape)
+    weighted = np.zeros(shape, dtype=bool)
+    for i, p in enumerate(current.values()):
+        own = [index[k] for k in p.features]
+        order[i] = own + [j for j in range(len(columns)) if j not in own]
+        weights[i, : len(own)] = p.weights
+        weighted[i, : len(own)] = True
+    matrix = ScenarioMatrix(scenarios, columns, order, weights, weighted)
+    _SCENARIO_MATRIX = (current, matrix)
+    return matrix
+
+
+def row_dict(
+    values: Sequence[float], mask: Sequence[bool], columns: Sequence[str]
+) -> dict[str, float]:
+    """Return the masked entries of one row as a ``{feature: value}`` dict.
+
+    Pass ``ndarray.tolist()`` rows to obtain plain Python floats.
+    """
+
+    return {k: v for k, v, p in zip(columns, values, mask) if p}
+
+
+__all__ = [
+    "FeatureMatrix",
+    "BatchScore",
+    "feature_matrix",
+    "normalize_matrix",
+    "clip_unit",
+    "weighted_score_matrix",
+    "equal_weight_score_matrix",
+    "router_matrix",
+    "combine_levels_matrix",
+    "score_matrix",
+    "ScenarioMatrix",
+    "scenario_matrix",
+    "row_dict",
+]
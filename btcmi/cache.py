@@ -0,0 +1,222 @@
+"""Content-addressed cache of runner outputs.
+
+Entries are keyed by a hash of the engine mode and a canonical form of the
+payload fields that affect scoring in that mode; ``lineage``, ``mode`` and
+``freshness_seconds`` are not part of the key and NAGR nodes contribute only
+their ``weight`` and ``score`` (a registered node set contributes its handle
+and version, so every update to it changes the key).  A hit re-stamps ``asof``
+and ``lineage`` from the current request.  The cache is bounded by entry count
+and serialized size, evicts the least recently used entry first and expires
+entries after a TTL, which defaults to the payload's ``freshness_seconds``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, cast
+
+from prometheus_client import Counter
+
+from btcmi.nagr_graph import NodeGraph
+from btcmi.nodesets import NodeSet
+from btcmi.utils import is_number
+from btcmi.vol_regime import VolRegimeEstimator
+
+_COMMON_FIELDS = ("schema_version", "scenario", "window")
+_LAYER_FIELDS = ("features_micro", "features_mezo", "features_macro")
+
+# Payload fields that determine the output of each mode.
+KEY_FIELDS: dict[str, tuple[str, ...]] = {
+    "v1": _COMMON_FIELDS + ("features", "nagr_nodes"),
+    "v2.fractal": _COMMON_FIELDS + _LAYER_FIELDS + ("vol_regime_pctl", "nagr_nodes"),
+    "v2.nf3p": _COMMON_FIELDS + _LAYER_FIELDS,
+}
+
+CACHE_HITS = Counter("btcmi_result_cache_hits", "Result cache hits", ["mode"])
+CACHE_MISSES = Counter("btcmi_result_cache_misses", "Result cache misses", ["mode"])
+CACHE_EVICTIONS = Counter(
+    "btcmi_result_cache_evictions",
+    "Result cache evictions",
+    ["reason"],
+)
+# Bound label children; ``labels()`` costs more than a lookup on a hit.
+_HITS = {mode: CACHE_HITS.labels(mode=mode) for mode in KEY_FIELDS}
+_MISSES = {mode: CACHE_MISSES.labels(mode=mode) for mode in KEY_FIELDS}
+
+
+class _Entry(NamedTuple):
+    blob: bytes
+    expires: float
+
+
+def _canonical(field: str, value: Any) -> Any:
+    if type(value) is dict:
+        return tuple(sorted(value.items()))
+    if field == "nagr_nodes" and isinstance(value, list):
+        return tuple([(n.get("weight"), n.get("score")) for n in value])
+    if isinstance(value, (NodeSet, NodeGraph, VolRegimeEstimator)):
+        return value.token()
+    return getattr(value, "value", value)
+
+
+def cache_key(mode: str, data: dict[str, Any]) -> str | None:
+    """Return the cache key of ``data`` scored in ``mode``.
+
+    ``None`` means the payload cannot be canonicalized and must not be cached.
+    """
+
+    fields = KEY_FIELDS.get(mode)
+    if fields is None:
+        return None
+    try:
+        canon = [mode] + [_canonical(f, data.get(f)) for f in fields]
+        blob = pickle.dumps(canon, protocol=pickle.HIGHEST_PROTOCOL)
+    except (AttributeError, TypeError, ValueError, pickle.PicklingError):
+        return None
+    return hashlib.blake2b(blob, digest_size=20).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of runner outputs with TTL expiry.
+
+    Args:
+        max_entries: Maximum number of cached outputs.
+        max_bytes: Maximum total size of the serialized outputs.
+        ttl: Lifetime in seconds for payloads without ``freshness_seconds``;
+            ``None`` keeps such entries until they are evicted.
+        clock: Monotonic time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("cache bounds must be positive")
+        if ttl is not None and ttl < 0:
+            raise ValueError("ttl must be non-negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the serialized outputs currently held."""
+
+        return self._bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _ttl_for(self, data: dict[str, Any]) -> float | None:
+        fresh = data.get("freshness_seconds")
+        if not is_number(fresh):
+            return self.ttl
+        seconds = float(cast(float, fresh))
+        return seconds if seconds >= 0 else self.ttl
+
+    def _drop(self, key: str, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.blob)
+        CACHE_EVICTIONS.labels(reason=reason).inc()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return a fresh copy of the output stored under ``key``, if any."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= self._clock():
+                self._drop(key, "expired")
+                return None
+            self._entries.move_to_end(key)
+            blob = entry.blob
+        return cast(dict[str, Any], pickle.loads(blob))
+
+    def put(self, key: str, data: dict[str, Any], out: dict[str, Any]) -> None:
+        """Store ``out``, computed from ``data``, under ``key``."""
+
+        ttl = self._ttl_for(data)
+        if ttl is not None and ttl <= 0:
+            return
+        blob = pickle.dumps(out, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        expires = math.inf if ttl is None else self._clock() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key).blob)
+            self._entries[key] = _Entry(blob, expires)
+            self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), "lru")
+
+    def lookup(
+        self,
+        mode: str,
+        data: dict[str, Any],
+        asof: str,
+        compute: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Return the output for ``data``, computing and storing it on a miss.
+
+        Cached outputs are returned with ``asof`` and ``lineage`` taken from
+        the current call.
+        """
+
+        key, out = self.fetch(mode, data, asof)
+        if out is None:
+            out = compute()
+            if key is not None:
+                self.put(key, data, out)
+        return out
+
+    def fetch(
+        self, mode: str, data: dict[str, Any], asof: str
+    ) -> tuple[str | None, dict[str, Any] | None]:
+        """Return the key of ``data`` and its cached output, if any.
+
+        The split counterpart of :meth:`lookup` for callers that compute
+        misses in a batch and :meth:`put` them afterwards.  The key is
+        ``None`` when ``data`` cannot be cached.
+        """
+
+        key = cache_key(mode, data)
+        if key is None:
+            return None, None
+        out = self.get(key)
+        if out is None:
+            _MISSES[mode].inc()
+            return key, None
+        _HITS[mode].inc()
+        out["asof"] = asof
+        out["lineage"] = data.get("lineage", {})
+        return key, out
+
+
+__all__ = [
+    "KEY_FIELDS",
+    "CACHE_HITS",
+    "CACHE_MISSES",
+    "CACHE_EVICTIONS",
+    "cache_key",
+    "ResultCache",
+]
@@ -0,0 +1,374 @@
+"""Least-squares calibration of the v1 scenario weights and feature scales.
+
+The v1 engine predicts
+
+    overall = 0.7 * sum_k(w_k * tanh(x_k / s_k)) / sum_k(|w_k|) + 0.3 * nagr
+
+over the weighted features ``k`` present in a payload.  Both terms lie in
+[-1, 1], so the engine's clipping never binds and the model is smooth in the
+weights ``w`` and the log scales ``log s``.  :func:`calibrate` fits them to
+reference signals with :func:`scipy.optimize.least_squares`, using the
+analytic Jacobian of the residuals over the whole reference set laid out as
+one feature matrix.
+
+The base score is invariant to rescaling a scenario's weights, so fitted
+weights are reported rescaled to the ``sum(|w|)`` they started from.  Scales
+are shared by all scenarios; features without an entry in ``NORM_SCALE``
+keep the scale 1.0.
+
+Reference records look like ``examples/real_*.json``: an ``input`` payload
+with its ``reference_overall_signal``.  Records with a non-v1 payload are
+skipped and counted in the artifact.  The fitted configuration is
+written as a versioned JSON artifact that :func:`load_calibration` compiles
+into :mod:`btcmi.plans`.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Sequence, Tuple, cast
+
+import numpy as np
+from scipy import optimize
+
+from btcmi import batch, config, plans
+from btcmi import engine_v1 as v1
+from btcmi.batch import FeatureMatrix
+from btcmi.io import write_output
+
+FORMAT = "btcmi-calibration"
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ReferenceSet:
+    """Reference payloads laid out for vectorized scoring.
+
+    Attributes:
+        scenarios: Scenario names indexed by :attr:`scenario`.
+        scenario: ``(N,)`` scenario index of each row.
+        features: Raw features with columns ``NORM_SCALE`` first, then any
+            other weighted feature.
+        nagr: ``(N,)`` NAGR score of each row.
+        target: ``(N,)`` reference overall signal.
+        skipped: Number of records left out because their payload is not v1.
+    """
+
+    scenarios: Tuple[str, ...]
+    scenario: np.ndarray
+    features: FeatureMatrix
+    nagr: np.ndarray
+    target: np.ndarray
+    skipped: int = 0
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+
+def _records(path: Path) -> Iterator[Mapping[str, Any]]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".jsonl":
+        for line in text.splitlines():
+            if line.strip():
+                yield json.loads(line)
+        return
+    doc = json.loads(text)
+    yield from doc if isinstance(doc, list) else [doc]
+
+
+def reference_set(records: Iterable[Mapping[str, Any]]) -> ReferenceSet:
+    """Lay out reference records as a :class:`ReferenceSet`.
+
+    Args:
+        records: ``{"input": payload, "reference_overall_signal": value}``
+            mappings; records whose payload is not v1 are skipped.
+
+    Returns:
+        The v1 rows in input order.
+
+    Raises:
+        ValueError: If a v1 record has an unknown scenario or lacks a numeric
+            reference signal.
+    """
+
+    names = tuple(plans.SCENARIO_PLANS)
+    lookup = {k: i for i, k in enumerate(names)}
+    scenario, feats, nagr, target = [], [], [], []
+    skipped = 0
+    for i, rec in enumerate(records):
+        try:
+            data = rec["input"]
+            if data.get("mode", "v1") != "v1":
+                skipped += 1
+                continue
+            if data["scenario"] not in lookup:
+                raise ValueError(f"unknown scenario {data['scenario']!r}")
+            ref = float(rec["reference_overall_signal"])
+            if not math.isfinite(ref):
+                raise ValueError("reference_overall_signal must be finite")
+            scenario.append(lookup[data["scenario"]])
+            feats.append(data.get("features") or {})
+            nagr.append(v1.nagr_score(data.get("nagr_nodes", [])))
+            target.append(ref)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"reference record {i}: {exc}") from exc
+    norm = plans.V1_NORM.features
+    extra = dict.fromkeys(
+        k for p in plans.SCENARIO_PLANS.values() for k in p.features if k not in norm
+    )
+    return ReferenceSet(
+        names,
+        np.array(scenario, dtype=np.intp),
+        batch.feature_matrix(feats, norm + tuple(extra)),
+        np.array(nagr, dtype=float),
+        np.array(target, dtype=float),
+        skipped,
+    )
+
+
+def load_reference(paths: Sequence[str | Path]) -> ReferenceSet:
+    """Read reference records from JSON, JSON array or JSON lines files."""
+
+    return reference_set(rec for p in paths for rec in _records(Path(p)))
+
+
+class _Model:
+    """Residuals and Jacobian of the v1 model over a reference set."""
+
+    def __init__(
+        self,
+        ref: ReferenceSet,
+        scenario_weights: Mapping[str, Mapping[str, float]],
+        norm_scale: Mapping[str, float],
+        fit_scales: bool,
+    ) -> None:
+        cols = ref.features.columns
+        index = {k: j for j, k in enumerate(cols)}
+        used = np.unique(ref.scenario)
+        shape = (len(ref.scenarios), len(cols))
+        self.weights = np.zeros(shape)
+        self.weighted = np.zeros(shape, dtype=bool)
+        for s, name in enumerate(ref.scenarios):
+            for k, w in scenario_weights[name].items():
+                if k in index:
+                    self.weights[s, index[k]] = w
+                    self.weighted[s, index[k]] = s in used
+        self.log_scale = np.log([float(norm_scale.get(k, 1.0)) for k in cols])
+        self.fitted_scales = np.array([fit_scales and k in norm_scale for k in cols])
+        self.ref = ref
+        self.x = ref.features.values
+        self.present = ref.features.mask
+        self.target = ref.target
+
+    @property
+    def n_weights(self) -> int:
+        return int(self.weighted.sum())
+
+    def initial(self) -> np.ndarray:
+        return np.concatenate(
+            [self.weights[self.weighted], self.log_scale[self.fitted_scales]]
+        )
+
+    def unpack(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        weights = self.weights.copy()
+        weights[self.weighted] = theta[: self.n_weights]
+        log_scale = self.log_scale.copy()
+        log_scale[self.fitted_scales] = theta[self.n_weights :]
+        return weights, log_scale
+
+    def _terms(
+        self, theta: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        weights, log_scale = self.unpack(theta)
+        z = self.x * np.exp(-log_scale)
+        norm = np.where(self.present, np.tanh(z), 0.0)
+        rows = self.ref.scenario
+        w = weights[rows]
+        active = self.present & self.weighted[rows]
+        num = (active * w * norm).sum(axis=1)
+        den = (active * np.abs(w)).sum(axis=1)
+        base = np.divide(num, den, out=np.zeros(len(num)), where=den > 0)
+        return z, norm, w, active, den, base
+
+    def predict(self, theta: np.ndarray) -> np.ndarray:
+        base = self._terms(theta)[-1]
+        return cast(np.ndarray, 0.7 * base + 0.3 * self.ref.nagr)
+
+    def residuals(self, theta: np.ndarray) -> np.ndarray:
+        return cast(np.ndarray, self.predict(theta) - self.target)
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        z, norm, w, active, den, base = self._terms(theta)
+        inv = np.divide(0.7, den, out=np.zeros(len(den)), where=den > 0)[:, None]
+        # d base / d w_k = (n_k - base * sign(w_k)) / den on active features.
+        dw = active * (norm - base[:, None] * np.sign(w)) * inv
+        rows = self.ref.scenario
+        s_idx, k_idx = np.nonzero(self.weighted)
+        jac_w = dw[:, k_idx] * (rows[:, None] == s_idx)
+        # d tanh(x e^-t) / dt = -(1 - tanh^2) * x e^-t.
+        dn = -(1.0 - norm * norm) * z
+        jac_s = (active * w * dn * inv)[:, self.fitted_scales]
+        return np.hstack([jac_w, jac_s])
+
+
+def _current() -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    weights = {k: dict(p.weight_map) for k, p in plans.SCENARIO_PLANS.items()}
+    return weights, dict(plans.V1_NORM.scale_map)
+
+
+def predict(
+    ref: ReferenceSet,
+    scenario_weights: Mapping[str, Mapping[str, float]] | None = None,
+    norm_scale: Mapping[str, float] | None = None,
+) -> np.ndarray:
+    """Unrounded v1 overall signal of every reference row.
+
+    Defaults to the weights and scales of the compiled plans.
+    """
+
+    cur_w, cur_s = _current()
+    model = _Model(ref, scenario_weights or cur_w, norm_scale or cur_s, False)
+    return model.predict(model.initial())
+
+
+def metrics(pred: np.ndarray, target: np.ndarray) -> Dict[str, float | None]:
+    """Return ``mae``, ``rmse`` and Pearson ``corr`` of predictions."""
+
+    err = pred - target
+    corr = None
+    if len(pred) > 1 and np.ptp(pred) > 0 and np.ptp(target) > 0:
+        corr = float(np.corrcoef(pred, target)[0, 1])
+    return {
+        "mae": float(np.mean(np.abs(err))),
+        "rmse": float(np.sqrt(np.mean(err * err))),
+        "corr": corr,
+    }
+
+
+def calibrate(
+    ref: ReferenceSet,
+    *,
+    fit_scales: bool = False,
+    scenario_weights: Mapping[str, Mapping[str, float]] | None = None,
+    norm_scale: Mapping[str, float] | None = None,
+    max_nfev: int | None = None,
+) -> Dict[str, Any]:
+    """Fit scenario weights, and optionally scales, to reference signals.
+
+    Args:
+        ref: Reference set from :func:`load_reference`.
+        fit_scales: Also fit the ``NORM_SCALE`` entries.
+        scenario_weights: Starting weights; the compiled plans by default.
+            Only weights of scenarios with reference rows are fitted.
+        norm_scale: Starting scales; the compiled plans by default.
+        max_nfev: Maximum residual evaluations of the optimizer.
+
+    Returns:
+        Calibration artifact with the ``rows`` used, the ``skipped`` record
+        count, ``scenario_weights``, ``norm_scale``, ``metrics`` before and
+        after the fit and the optimizer status, ready for
+        :func:`write_calibration`.
+
+    Raises:
+        ValueError: If ``ref`` is empty.
+    """
+
+    if not len(ref):
+        raise ValueError("reference set is empty")
+    cur_w, cur_s = _current()
+    start_w = {k: dict(v) for k, v in (scenario_weights or cur_w).items()}
+    start_s = dict(norm_scale or cur_s)
+    model = _Model(ref, start_w, start_s, fit_scales)
+    theta0 = model.initial()
+    fit = optimize.least_squares(
+        model.residuals, theta0, jac=model.jacobian, method="trf", max_nfev=max_nfev
+    )
+    weights, log_scale = model.unpack(fit.x)
+    cols = ref.features.columns
+    fitted_w = {}
+    for s, name in enumerate(ref.scenarios):
+        old = start_w[name]
+        row = {
+            k: float(weights[s, cols.index(k)]) if k in cols else v
+            for k, v in old.items()
+        }
+        total = sum(abs(v) for v in row.values())
+        gauge = sum(abs(v) for v in old.values())
+        if total > 0 and gauge > 0:
+            row = {k: v * gauge / total for k, v in row.items()}
+        fitted_w[name] = row
+    fitted_s = {
+        k: float(np.exp(log_scale[cols.index(k)])) if k in cols else v
+        for k, v in start_s.items()
+    }
+    return {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "rows": len(ref),
+        "skipped": ref.skipped,
+        "fit_scales": fit_scales,
+        "scenario_weights": fitted_w,
+        "norm_scale": fitted_s,
+        "metrics": {
+            "before": metrics(model.predict(theta0), ref.target),
+            "after": metrics(model.predict(fit.x), ref.target),
+        },
+        "optimizer": {
+            "status": int(fit.status),
+            "message": str(fit.message),
+            "nfev": int(fit.nfev),
+            "cost": float(fit.cost),
+        },
+    }
+
+
+def write_calibration(path: str | Path, result: Mapping[str, Any]) -> None:
+    """Write a :func:`calibrate` result atomically as JSON."""
+
+    write_output(dict(result), path, atomic=True)
+
+
+def load_calibration(path: str | Path) -> None:
+    """Compile the weights and scales of a calibration file into the plans.
+
+    Args:
+        path: File written by :func:`write_calibration`.
+
+    Raises:
+        ValueError: If the file is not a calibration artifact of a supported
+            version or holds a non-positive scale.
+    """
+
+    try:
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        if doc.get("format") != FORMAT or doc.get("version") != FORMAT_VERSION:
+            raise ValueError(f"expected {FORMAT} version {FORMAT_VERSION}")
+        weights = {
+            name: {k: float(v) for k, v in row.items()}
+            for name, row in doc["scenario_weights"].items()
+        }
+        scales = {k: float(v) for k, v in doc["norm_scale"].items()}
+    except (AttributeError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"invalid calibration {path}: {exc}") from exc
+    if any(not (math.isfinite(v) and v > 0) for v in scales.values()):
+        raise ValueError("'norm_scale' values must be finite and positive")
+    if any(not math.isfinite(v) for row in weights.values() for v in row.values()):
+        raise ValueError("'scenario_weights' values must be finite")
+    plans.compile_plans(weights, scales, config.SCALES)
+
+
+__all__ = [
+    "FORMAT",
+    "FORMAT_VERSION",
+    "ReferenceSet",
+    "reference_set",
+    "load_reference",
+    "predict",
+    "metrics",
+    "calibrate",
+    "write_calibration",
+    "load_calibration",
+]
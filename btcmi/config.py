@@ -54,4 +54,41 @@ SCALES = {
     },
 }
 
-__all__ = ["SCENARIO_WEIGHTS", "NORM_SCALE", "SCALES"]
+# Volatility percentile cut points separating the low/mid/high router regimes
+# and the level weights applied in each regime.
+ROUTER_CUTS = (0.2, 0.6)
+
+ROUTER_LEVEL_WEIGHTS = {
+    "low": {"L1": 0.15, "L2": 0.35, "L3": 0.50},
+    "mid": {"L1": 0.25, "L2": 0.40, "L3": 0.35},
+    "high": {"L1": 0.40, "L2": 0.40, "L3": 0.20},
+}
+
+# Propagated NAGR: damping of the neighbour term, convergence tolerance on the
+# max-norm change of the node scores, and the iteration cap per solve.
+NAGR_GRAPH_DAMPING = 0.85
+NAGR_GRAPH_TOL = 1e-8
+NAGR_GRAPH_MAX_ITER = 200
+
+# Streaming vol_regime_pctl: returns per realized-volatility window, volatility
+# values kept for the percentile, and the log-spaced histogram bins (with
+# their per-bar volatility range) that bound the percentile error.
+VOL_REGIME_WINDOW = 60
+VOL_REGIME_HISTORY = 43200
+VOL_REGIME_BINS = 4096
+VOL_REGIME_RANGE = (1e-6, 1.0)
+
+__all__ = [
+    "SCENARIO_WEIGHTS",
+    "NORM_SCALE",
+    "SCALES",
+    "ROUTER_CUTS",
+    "ROUTER_LEVEL_WEIGHTS",
+    "NAGR_GRAPH_DAMPING",
+    "NAGR_GRAPH_TOL",
+    "NAGR_GRAPH_MAX_ITER",
+    "VOL_REGIME_WINDOW",
+    "VOL_REGIME_HISTORY",
+    "VOL_REGIME_BINS",
+    "VOL_REGIME_RANGE",
+]
@@ -1,10 +1,10 @@
 """NF3P prediction and backtest utilities."""
+
 from __future__ import annotations
 
 from typing import Dict, Tuple
 
-from btcmi.engine_v2 import SCALES, normalize_layer, layer_equal_weights
-from btcmi.feature_processing import weighted_score
+from btcmi.engine_v2 import equal_weight_score, normalize_levels
 
 
 def predictions_and_backtest(
@@ -25,18 +25,35 @@ def predictions_and_backtest(
         A tuple containing the predictions for each layer and basic
         backtest metrics computed from those predictions.
     """
-    n1 = normalize_layer(f1, SCALES["L1"])
-    n2 = normalize_layer(f2, SCALES["L2"])
-    n3 = normalize_layer(f3, SCALES["L3"])
+    n1, n2, n3 = normalize_levels(f1, f2, f3)
+
+    p1 = equal_weight_score("L1", n1)
+    p2 = equal_weight_score("L2", n2)
+    p3 = equal_weight_score("L3", n3)
+
+    return summarize_predictions(p1, p2, p3)
+
+
+def summarize_predictions(
+    p1: float, p2: float, p3: float
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Round level predictions and compute their backtest metrics.
 
-    w1 = layer_equal_weights(n1)
-    w2 = layer_equal_weights(n2)
-    w3 = layer_equal_weights(n3)
+    Parameters
+    ----------
+    p1, p2, p3:
+        Unrounded L1, L2 and L3 predictions.
 
-    p1, _ = weighted_score(n1, w1)
-    p2, _ = weighted_score(n2, w2)
-    p3, _ = weighted_score(n3, w3)
+    Returns
+    -------
+    Tuple[Dict[str, float], Dict[str, float]]
+        The rounded predictions and the metrics derived from them.
 
+    Notes
+    -----
+    ``mse`` and ``mae`` measure the predictions against zero.  Evaluation
+    against realized returns is done by :mod:`btcmi.backtest`.
+    """
     predictions = {
         "L1": round(p1, 6),
         "L2": round(p2, 6),
@@ -49,4 +66,4 @@ def predictions_and_backtest(
     return predictions, backtest
 
 
-__all__ = ["predictions_and_backtest"]
+__all__ = ["predictions_and_backtest", "summarize_predictions"]
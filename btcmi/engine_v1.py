@@ -1,12 +1,12 @@
 """First generation signal calculation utilities."""
 
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Any, Dict, Mapping
 from dataclasses import dataclass
 import logging
-from btcmi.utils import is_number
-from btcmi.config import NORM_SCALE, SCENARIO_WEIGHTS
-from btcmi.feature_processing import normalize_features, weighted_score
+from btcmi import plans
+from btcmi.nagr_graph import NodeGraph
+from btcmi.nodesets import NodeSet
 
 
 FeatureMap = Dict[str, float]
@@ -20,13 +20,14 @@ class BaseSignalResult:
     """Container for :func:`base_signal` outputs."""
 
     score: float
-    weights: FeatureMap
+    weights: Mapping[str, float]
     contributions: FeatureMap
 
+
 def normalize(features: FeatureMap) -> FeatureMap:
     """Scale raw feature values using hyperbolic tangent."""
 
-    return normalize_features(features, NORM_SCALE)
+    return plans.V1_NORM.normalize(features)
 
 
 def completeness(features: FeatureMap) -> float:
@@ -39,9 +40,7 @@ def completeness(features: FeatureMap) -> float:
         The proportion of expected features that are present and numeric.
 
     """
-    exp = set(NORM_SCALE.keys())
-    pres = {k for k, v in features.items() if k in exp and is_number(v)}
-    return len(pres) / len(exp) if exp else 1.0
+    return plans.V1_NORM.completeness(features)
 
 
 def base_signal(scenario: str, norm: FeatureMap) -> BaseSignalResult:
@@ -56,21 +55,25 @@ def base_signal(scenario: str, norm: FeatureMap) -> BaseSignalResult:
         individual contributions.
 
     """
-    weights = SCENARIO_WEIGHTS[scenario]
-    score, contrib = weighted_score(norm, weights)
-    return BaseSignalResult(score, weights, contrib)
+    plan = plans.SCENARIO_PLANS[scenario]
+    score, contrib = plan.score(norm)
+    return BaseSignalResult(score, plan.weight_map, contrib)
 
 
 def nagr_score(nodes: Any) -> float:
     """Aggregate a network graph rating score.
 
     Args:
-        nodes: Iterable of node dictionaries with ``weight`` and ``score``.
+        nodes: Iterable of node dictionaries with ``weight`` and ``score``,
+            or a :class:`~btcmi.nodesets.NodeSet` or
+            :class:`~btcmi.nagr_graph.NodeGraph` scoring itself.
 
     Returns:
         Weighted average score clipped to [-1, 1].
 
     """
+    if isinstance(nodes, (NodeSet, NodeGraph)):
+        return nodes.score()
     if not nodes:
         return 0.0
     num = 0.0
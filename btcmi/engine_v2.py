@@ -1,13 +1,20 @@
 """Second generation layered signal engine utilities."""
 
 from __future__ import annotations
-from typing import Dict, List
+from typing import Any, Dict, List, Mapping
+import json
 import math
 import logging
+from pathlib import Path
+from btcmi import config, plans
 from btcmi.config import SCALES as CONFIG_SCALES
 from btcmi.feature_processing import normalize_features, weighted_score
+from btcmi.nagr_graph import NodeGraph
+from btcmi.nodesets import NodeSet
 
 SCALES = CONFIG_SCALES
+ROUTER_REGIMES = ("low", "mid", "high")
+ROUTER_CONFIG_VERSION = 1
 logger = logging.getLogger(__name__)
 
 
@@ -23,12 +30,16 @@ def nagr(nodes: List[dict]) -> float:
     """Aggregate network graph ratings.
 
     Args:
-        nodes: Sequence of node dicts with ``weight`` and ``score``.
+        nodes: Sequence of node dicts with ``weight`` and ``score``, or a
+            :class:`~btcmi.nodesets.NodeSet` or
+            :class:`~btcmi.nagr_graph.NodeGraph` scoring itself.
 
     Returns:
         Weighted average score clipped to [-1, 1].
 
     """
+    if isinstance(nodes, (NodeSet, NodeGraph)):
+        return nodes.score()
     if not nodes:
         return 0.0
     num = 0.0
@@ -66,7 +77,34 @@ def level_signal(
     return 0.8 * base + 0.2 * nagr(nagr_nodes), contrib
 
 
-def router_weights(vol_pctl: float):
+def normalize_levels(
+    f1: Dict[str, float], f2: Dict[str, float], f3: Dict[str, float]
+) -> tuple[Dict[str, float], Dict[str, float], Dict[str, float]]:
+    """Normalize micro, mezo and macro features through the compiled plans."""
+
+    lp = plans.LAYER_PLANS
+    return lp["L1"].normalize(f1), lp["L2"].normalize(f2), lp["L3"].normalize(f3)
+
+
+def equal_weight_score(level: str, norm: Dict[str, float]) -> float:
+    """Score a normalized layer with equal feature weights.
+
+    Equivalent to ``weighted_score(norm, layer_equal_weights(norm))[0]`` using
+    the precomputed denominators of the level's plan.
+    """
+
+    return plans.LAYER_PLANS[level].equal_score(norm)[0]
+
+
+def plan_level_signal(
+    level: str, norm: Dict[str, float], nagr_nodes: List[dict[str, Any]]
+) -> float:
+    """Equal-weight counterpart of :func:`level_signal` for a named level."""
+
+    return 0.8 * equal_weight_score(level, norm) + 0.2 * nagr(nagr_nodes)
+
+
+def router_weights(vol_pctl: float) -> tuple[str, Dict[str, float]]:
     """Select level weights based on volume percentile.
 
     Args:
@@ -76,11 +114,56 @@ def router_weights(vol_pctl: float):
         A tuple of descriptor string and weight mapping for levels.
 
     """
-    if vol_pctl < 0.2:
-        return "low", {"L1": 0.15, "L2": 0.35, "L3": 0.50}
-    if vol_pctl < 0.6:
-        return "mid", {"L1": 0.25, "L2": 0.40, "L3": 0.35}
-    return "high", {"L1": 0.40, "L2": 0.40, "L3": 0.20}
+    low, high = config.ROUTER_CUTS
+    if vol_pctl < low:
+        regime = "low"
+    elif vol_pctl < high:
+        regime = "mid"
+    else:
+        regime = "high"
+    return regime, dict(config.ROUTER_LEVEL_WEIGHTS[regime])
+
+
+def load_router_config(path: str | Path) -> None:
+    """Install router cut points and level weights from a JSON file.
+
+    The file holds ``router_cuts`` (two percentiles) and
+    ``router_level_weights`` (L1/L2/L3 weights per regime) under ``version``
+    :data:`ROUTER_CONFIG_VERSION`, as written by
+    :func:`btcmi.router_tuning.write_router_config`.  They replace
+    ``config.ROUTER_CUTS`` and ``config.ROUTER_LEVEL_WEIGHTS`` for every
+    subsequent call of :func:`router_weights`.
+
+    Args:
+        path: Location of the JSON file.
+
+    Raises:
+        ValueError: If the file is malformed, has an unsupported ``version``
+            or a value is out of range.
+    """
+    try:
+        with open(path, encoding="utf-8") as fh:
+            doc = json.load(fh)
+        if doc.get("version") != ROUTER_CONFIG_VERSION:
+            raise ValueError(f"expected version {ROUTER_CONFIG_VERSION}")
+        low, high = (float(x) for x in doc["router_cuts"])
+        tables = {
+            regime: {
+                k: float(doc["router_level_weights"][regime][k])
+                for k in ("L1", "L2", "L3")
+            }
+            for regime in ROUTER_REGIMES
+        }
+    except (AttributeError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"invalid router config {path}: {exc}") from exc
+    if not 0.0 <= low <= high <= 1.0:
+        raise ValueError("'router_cuts' must satisfy 0 <= low <= high <= 1")
+    for regime, w in tables.items():
+        if any(v < 0 or not math.isfinite(v) for v in w.values()):
+            raise ValueError(f"weights of regime {regime!r} must be non-negative")
+        effective_level_weights(w)
+    config.ROUTER_CUTS = (low, high)
+    config.ROUTER_LEVEL_WEIGHTS = tables
 
 
 def combine_levels(L1: float, L2: float, L3: float, w):
@@ -95,6 +178,22 @@ def combine_levels(L1: float, L2: float, L3: float, w):
     Returns:
         Combined score clipped to [-1, 1].
 
+    """
+    w = effective_level_weights(w)
+    s = w["L1"] * L1 + w["L2"] * L2 + w["L3"] * L3
+    return max(-1.0, min(1.0, s))
+
+
+def effective_level_weights(w: Mapping[str, float]) -> Mapping[str, float]:
+    """Validate level weights and rescale them to sum to one if needed.
+
+    Args:
+        w: Weight mapping for each level.
+
+    Returns:
+        The mapping itself when it already sums to one, otherwise a
+        normalized copy.
+
     """
     req = {"L1", "L2", "L3"}
     if not req.issubset(w):
@@ -106,9 +205,7 @@ def combine_levels(L1: float, L2: float, L3: float, w):
         raise ValueError("sum of weights must be non-zero")
     if not math.isclose(total, 1.0, rel_tol=1e-9, abs_tol=1e-9):
         w = {k: v / total for k, v in w.items()}
-
-    s = w["L1"] * L1 + w["L2"] * L2 + w["L3"] * L3
-    return max(-1.0, min(1.0, s))
+    return w
 
 
 def layer_equal_weights(norm: Dict[str, float]) -> Dict[str, float]:
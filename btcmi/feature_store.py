@@ -0,0 +1,260 @@
+"""Server-side store of partial feature snapshots.
+
+Publishers send only the features that changed; the store keeps the latest
+value of every field keyed by ``(instrument, window, layer)``, where ``layer``
+is a payload block such as ``"features"`` or ``"features_micro"``.  Each field
+records when it was written and how long it stays fresh, taken from the
+``freshness_seconds`` of the update that wrote it or from the store default.
+A snapshot leaves stale fields out and lists them so callers can report them.
+Expired fields are kept for ``retention`` seconds so they can still be
+reported, then purged; keys left without fields are removed.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Tuple
+
+from btcmi.enums import Window
+from btcmi.utils import is_number
+
+# Payload blocks that hold feature mappings.
+LAYERS = ("features", "features_micro", "features_mezo", "features_macro")
+
+
+class _Field(NamedTuple):
+    value: float
+    updated: float
+    expires: float
+
+
+class Snapshot(NamedTuple):
+    """Fresh feature blocks of one ``(instrument, window)`` and stale field names.
+
+    Attributes:
+        layers: ``{layer: {feature: value}}`` for every stored layer.
+        stale: ``"layer.feature"`` names left out because they expired.
+    """
+
+    layers: Dict[str, Dict[str, float]]
+    stale: List[str]
+
+
+def _number(value: Any) -> float:
+    """Return ``value`` as a float; non-numbers give NaN, huge integers inf."""
+
+    if not is_number(value):
+        return math.nan
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf
+
+
+def _window(window: Any) -> str:
+    try:
+        return Window(window).value
+    except ValueError:
+        raise ValueError(f"invalid window: {window!r}") from None
+
+
+class FeatureStore:
+    """Thread-safe keyed store of feature values with per-field expiry.
+
+    Args:
+        default_ttl: Freshness in seconds of fields written without
+            ``freshness_seconds``; ``None`` keeps them fresh indefinitely.
+        max_keys: Maximum number of ``(instrument, window, layer)`` keys.
+        max_fields: Maximum number of fields stored under one key.
+        retention: Seconds an expired field is still reported as stale before
+            it is purged.
+        clock: Monotonic time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float | None = None,
+        max_keys: int = 10_000,
+        max_fields: int = 1_000,
+        retention: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if default_ttl is not None and default_ttl < 0:
+            raise ValueError("default_ttl must be non-negative")
+        if max_fields < 1:
+            raise ValueError("max_fields must be positive")
+        if retention < 0:
+            raise ValueError("retention must be non-negative")
+        self.default_ttl = default_ttl
+        self.max_keys = max_keys
+        self.max_fields = max_fields
+        self.retention = retention
+        self._clock = clock
+        self._data: Dict[Tuple[str, str, str], Dict[str, _Field]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _purge(self, key: Tuple[str, str, str], now: float) -> None:
+        """Drop the retired fields of ``key`` and ``key`` itself once empty."""
+
+        fields = self._data.get(key)
+        if fields is None:
+            return
+        cutoff = now - self.retention
+        for k in [k for k, f in fields.items() if f.expires <= cutoff]:
+            del fields[k]
+        if not fields:
+            del self._data[key]
+
+    def patch(
+        self,
+        instrument: str,
+        window: str,
+        layers: Mapping[str, Mapping[str, Any]],
+        freshness_seconds: float | None = None,
+    ) -> Dict[str, int]:
+        """Merge feature updates; a ``None`` value deletes the field.
+
+        Returns:
+            Number of fields stored per updated layer.
+
+        Raises:
+            ValueError: If the window, a layer name or a value is invalid, or
+                the store or a key is full; nothing is applied in that case.
+        """
+
+        win = _window(window)
+        unknown = set(layers) - set(LAYERS)
+        if unknown:
+            raise ValueError("unknown feature layers: " + ", ".join(sorted(unknown)))
+        for layer, feats in layers.items():
+            if not isinstance(feats, Mapping):
+                raise ValueError(f"'{layer}' must be an object")
+            for k, v in feats.items():
+                if v is not None and not math.isfinite(_number(v)):
+                    raise ValueError(f"'{layer}.{k}' must be a finite number or null")
+        ttl = self.default_ttl if freshness_seconds is None else freshness_seconds
+        if ttl is not None and not (_number(ttl) >= 0):
+            raise ValueError("'freshness_seconds' must be a non-negative number")
+        now = self._clock()
+        expires = math.inf if ttl is None else now + _number(ttl)
+        sizes: Dict[str, int] = {}
+        with self._lock:
+            new = [(instrument, win, layer) for layer in layers]
+            for key in new:
+                self._purge(key, now)
+            counts = []
+            for key, feats in zip(new, layers.values()):
+                held = self._data.get(key, {})
+                n = len(held)
+                for k, v in feats.items():
+                    n += (k not in held) if v is not None else -(k in held)
+                if n > self.max_fields:
+                    raise ValueError(f"more than {self.max_fields} fields per key")
+                counts.append(n)
+            missing = sum(
+                1 for key, n in zip(new, counts) if n and key not in self._data
+            )
+            if len(self._data) + missing > self.max_keys:
+                for key in list(self._data):
+                    self._purge(key, now)
+                if len(self._data) + missing > self.max_keys:
+                    raise ValueError("feature store is full")
+            for key, (layer, feats) in zip(new, layers.items()):
+                fields = self._data.setdefault(key, {})
+                for k, v in feats.items():
+                    if v is None:
+                        fields.pop(k, None)
+                    else:
+                        fields[k] = _Field(float(v), now, expires)
+                if not fields:
+                    del self._data[key]
+                sizes[layer] = len(fields)
+        return sizes
+
+    def snapshot(self, instrument: str, window: str) -> Snapshot:
+        """Return the fresh fields of ``instrument`` at ``window``."""
+
+        win = _window(window)
+        now = self._clock()
+        layers: Dict[str, Dict[str, float]] = {}
+        stale: List[str] = []
+        with self._lock:
+            for layer in LAYERS:
+                self._purge((instrument, win, layer), now)
+                fields = self._data.get((instrument, win, layer))
+                if fields is None:
+                    continue
+                block = layers[layer] = {}
+                for k, f in fields.items():
+                    if f.expires > now:
+                        block[k] = f.value
+                    else:
+                        stale.append(f"{layer}.{k}")
+        return Snapshot(layers, stale)
+
+    def describe(self, instrument: str, window: str) -> Dict[str, Dict[str, Any]]:
+        """Return every stored field with its age and staleness."""
+
+        win = _window(window)
+        now = self._clock()
+        with self._lock:
+            return {
+                layer: {
+                    k: {
+                        "value": f.value,
+                        "age_seconds": now - f.updated,
+                        "stale": f.expires <= now,
+                    }
+                    for k, f in fields.items()
+                }
+                for (inst, w, layer), fields in self._data.items()
+                if inst == instrument and w == win
+            }
+
+    def drop(self, instrument: str, window: str | None = None) -> int:
+        """Forget the fields of ``instrument``, at one window or all of them.
+
+        Returns:
+            Number of ``(instrument, window, layer)`` keys removed.
+        """
+
+        win = None if window is None else _window(window)
+        with self._lock:
+            keys = [
+                key
+                for key in self._data
+                if key[0] == instrument and (win is None or key[1] == win)
+            ]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+
+def merge_snapshot(data: Mapping[str, Any], snap: Snapshot) -> Dict[str, Any]:
+    """Overlay ``data``'s own feature blocks on the stored ``snap`` layers."""
+
+    merged = dict(data)
+    for layer, block in snap.layers.items():
+        own = data.get(layer)
+        merged[layer] = dict(block, **own) if isinstance(own, Mapping) else block
+    return merged
+
+
+def add_advisories(out: Dict[str, Any], stale: List[str]) -> Dict[str, Any]:
+    """Append ``stale_feature:<layer>.<name>`` advisories to a runner output."""
+
+    if not stale:
+        return out
+    notes = [f"stale_feature:{name}" for name in stale]
+    summary = out.get("summary")
+    target = summary if isinstance(summary, dict) else out
+    target["advisories"] = list(target.get("advisories", [])) + notes
+    return out
+
+
+__all__ = ["LAYERS", "Snapshot", "FeatureStore", "merge_snapshot", "add_advisories"]
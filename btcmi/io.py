@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
+import os
 from pathlib import Path
 from typing import Any
 
 
-def write_output(data: dict[str, Any], out_path: Path | str) -> None:
-    """Write ``data`` to ``out_path`` as JSON, creating parents if needed."""
+def write_output(
+    data: dict[str, Any], out_path: Path | str, *, atomic: bool = False
+) -> None:
+    """Write ``data`` to ``out_path`` as JSON, creating parents if needed.
+
+    With ``atomic=True`` the JSON is written to a temporary sibling file and
+    renamed into place, so ``out_path`` either holds a complete document or
+    does not exist.
+    """
 
     p = Path(out_path)
+    tmp = p.with_name(p.name + ".tmp") if atomic else p
     try:
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        if atomic:
+            os.replace(tmp, p)
     except OSError as e:  # pragma: no cover - handled by unit test
+        if atomic:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
         raise RuntimeError(f"failed to write output to {out_path}: {e}") from e
@@ -0,0 +1,181 @@
+"""Dynamic micro-batching of concurrent scoring requests.
+
+Requests submitted while a batch is open are collected until either the batch
+reaches ``max_batch`` items or ``max_delay`` seconds have passed since its
+first item.  The whole batch is then validated and scored by the batch runners
+in a single executor hop and each caller's future is resolved with its own
+result.  With a result cache, cached items skip scoring and new outputs are
+stored, as on the unbatched ``/run`` path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List, Sequence, Tuple
+
+from prometheus_client import Histogram
+
+from btcmi.cache import ResultCache
+from btcmi.runner import _asof, run_batch
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+# Resolves to one item's output, or to its validation or runner error.
+_Future = asyncio.Future[dict[str, Any]]
+
+QUEUE_DEPTH = Histogram(
+    "btcmi_microbatch_queue_depth",
+    "Pending requests when a request joins a micro-batch",
+    buckets=_SIZE_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+    "btcmi_microbatch_size",
+    "Requests scored per micro-batch",
+    buckets=_SIZE_BUCKETS,
+)
+
+
+class ItemValidationError(ValueError):
+    """A batched payload failed input schema validation."""
+
+
+def validate_and_run(
+    items: Sequence[Tuple[str, dict[str, Any]]],
+    fixed_ts: str | None = None,
+    cache: ResultCache | None = None,
+) -> List[dict[str, Any]]:
+    """Validate and score ``(mode, payload)`` pairs in one pass.
+
+    Returns one output or error record per item, in order.  Error records are
+    ``{"error": "input_schema_validation_failed" | "runner_error", "message": ...}``.
+    With ``cache``, items found there are not scored and every other
+    successful output is stored in it.
+    """
+
+    asof = _asof(fixed_ts)
+    results: List[dict[str, Any] | None] = [None] * len(items)
+    valid: List[int] = []
+    keys: List[str | None] = []
+    for i, (mode, data) in enumerate(items):
+        try:
+            validate_json(data, SCHEMA_REGISTRY["input"])
+        except Exception as exc:  # noqa: BLE001
+            results[i] = {
+                "error": "input_schema_validation_failed",
+                "message": str(exc),
+            }
+            continue
+        if cache is not None:
+            key, hit = cache.fetch(mode, data, asof)
+            if hit is not None:
+                results[i] = hit
+                continue
+            keys.append(key)
+        valid.append(i)
+    outputs = run_batch(
+        [dict(items[i][1], mode=items[i][0]) for i in valid],
+        asof,
+        layout="records",
+    )
+    for i, out in zip(valid, outputs):
+        results[i] = out
+    if cache is not None:
+        for i, key, out in zip(valid, keys, outputs):
+            if key is not None and "error" not in out:
+                cache.put(key, items[i][1], out)
+    return results  # type: ignore[return-value]
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches scored in one executor hop.
+
+    Args:
+        max_batch: Flush as soon as this many requests are pending.
+        max_delay: Seconds to wait for more requests after the first one.
+        cache: Optional result cache consulted and filled for every batch.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = 64,
+        max_delay: float = 0.002,
+        cache: ResultCache | None = None,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+        if max_delay < 0:
+            raise ValueError("max_delay must be non-negative")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = cache
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: List[Tuple[str, dict[str, Any], _Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, mode: str, data: dict[str, Any]) -> dict[str, Any]:
+        """Score ``data`` with the next batch and return its output.
+
+        Raises:
+            ItemValidationError: If ``data`` fails input schema validation.
+            ValueError: If the runner rejects ``data``.
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+        fut: _Future = loop.create_future()
+        self._pending.append((mode, data, fut))
+        QUEUE_DEPTH.observe(len(self._pending))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch or self._loop is None:
+            return
+        BATCH_SIZE.observe(len(batch))
+        task = self._loop.create_task(self._score(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch: List[Tuple[str, dict[str, Any], _Future]]) -> None:
+        try:
+            results = await asyncio.to_thread(
+                validate_and_run,
+                [(mode, data) for mode, data, _ in batch],
+                None,
+                self.cache,
+            )
+        except Exception as exc:  # noqa: BLE001
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, _, fut), res in zip(batch, results):
+            if fut.done():
+                continue
+            err = res.get("error")
+            if err == "input_schema_validation_failed":
+                fut.set_exception(ItemValidationError(res["message"]))
+            elif err is not None:
+                fut.set_exception(ValueError(res["message"]))
+            else:
+                fut.set_result(res)
+
+
+__all__ = [
+    "QUEUE_DEPTH",
+    "BATCH_SIZE",
+    "ItemValidationError",
+    "validate_and_run",
+    "MicroBatcher",
+]
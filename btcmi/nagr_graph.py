@@ -0,0 +1,314 @@
+"""Propagated NAGR scores over a sparse node graph.
+
+The flat NAGR score is the weight-averaged node score.  With an edge list
+between nodes, each node's score is first blended with those of its
+neighbours by the damped fixed-point iteration
+
+    x = (1 - d) * s + d * P x
+
+where ``s`` are the node scores and ``P`` is the row-normalized edge weight
+matrix (personalised PageRank with ``s`` as the teleport vector).  Nodes
+without outgoing edges keep their own value, so ``x`` stays within [-1, 1]
+and ``d = 0`` reproduces the flat score.  The propagated network score is the
+weight average of ``x``.
+
+``P`` is a :mod:`scipy.sparse` CSR matrix, so a solve costs O(edges) per
+iteration.  Each solve starts from the previous solution, so small updates
+converge in a few iterations and a solve of unchanged values is skipped.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from btcmi import config
+
+Edge = Tuple[str, str, float]
+
+
+def _edge(edge: Any) -> Edge:
+    if isinstance(edge, Mapping):
+        src, dst, w = edge.get("source"), edge.get("target"), edge.get("weight", 1.0)
+    else:
+        try:
+            src, dst, *rest = edge
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid edge {edge!r}") from None
+        w = rest[0] if rest else 1.0
+    if not isinstance(src, str) or not isinstance(dst, str):
+        raise ValueError(f"edge {edge!r}: 'source' and 'target' must be node ids")
+    try:
+        w = float(w)
+    except (TypeError, ValueError):
+        raise ValueError(f"edge {edge!r}: 'weight' must be a number") from None
+    if not math.isfinite(w) or w < 0:
+        raise ValueError(f"edge {edge!r}: 'weight' must be finite and non-negative")
+    return src, dst, w
+
+
+def parse_edges(edges: Iterable[Any]) -> List[Edge]:
+    """Parse ``{"source", "target", "weight"}`` mappings or tuples.
+
+    ``weight`` defaults to 1.0.
+
+    Raises:
+        ValueError: If an edge is malformed or has a negative weight.
+    """
+
+    return [_edge(e) for e in edges]
+
+
+class NodeGraph:
+    """Nodes with a sparse edge matrix scored by damped propagation.
+
+    Args:
+        ids: Node ids, defining the node order.
+        weights: Node weights.
+        scores: Node scores in [-1, 1].
+        src: Source node index of each edge.
+        dst: Target node index of each edge.
+        edge_weights: Non-negative edge weights; ``None`` weighs every edge 1.
+        damping: Weight of the neighbour term in [0, 1); defaults to
+            ``config.NAGR_GRAPH_DAMPING``.
+        tol: Stop once no node moves by more than this; defaults to
+            ``config.NAGR_GRAPH_TOL``.
+        max_iter: Iteration cap per solve; defaults to
+            ``config.NAGR_GRAPH_MAX_ITER``.
+        x0: Optional starting point for the first solve.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        weights: Any,
+        scores: Any,
+        src: Any = (),
+        dst: Any = (),
+        edge_weights: Any = None,
+        *,
+        damping: float | None = None,
+        tol: float | None = None,
+        max_iter: int | None = None,
+        x0: Any = None,
+    ) -> None:
+        if damping is None:
+            damping = config.NAGR_GRAPH_DAMPING
+        if tol is None:
+            tol = config.NAGR_GRAPH_TOL
+        if max_iter is None:
+            max_iter = config.NAGR_GRAPH_MAX_ITER
+        self.damping = float(damping)
+        self.tol = float(tol)
+        self.max_iter = int(max_iter)
+        if not 0.0 <= self.damping < 1.0:
+            raise ValueError("damping must be in [0, 1)")
+        if not self.tol > 0:
+            raise ValueError("tol must be positive")
+        if self.max_iter < 1:
+            raise ValueError("max_iter must be positive")
+
+        self.ids = list(ids)
+        n = len(self.ids)
+        self.index = {k: i for i, k in enumerate(self.ids)}
+        if len(self.index) != n:
+            raise ValueError("node ids must be unique")
+        self._weights = np.zeros(n)
+        self._scores = np.zeros(n)
+        self._set(weights, scores)
+
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if edge_weights is None:
+            ew = np.ones(len(src))
+        else:
+            ew = np.asarray(edge_weights, dtype=float)
+        if not src.shape == dst.shape == ew.shape or src.ndim != 1:
+            raise ValueError("edge arrays must be one-dimensional and of equal length")
+        lo = min(src.min(), dst.min()) if len(src) else 0
+        hi = max(src.max(), dst.max()) if len(src) else -1
+        if lo < 0 or hi >= n:
+            raise ValueError("edge endpoint out of range")
+        if not np.all(np.isfinite(ew)) or np.any(ew < 0):
+            raise ValueError("edge weights must be finite and non-negative")
+        mat = sparse.csr_matrix((ew, (src, dst)), shape=(n, n))
+        mat.sum_duplicates()
+        out = np.asarray(mat.sum(axis=1)).ravel()
+        inv = np.divide(1.0, out, out=np.zeros(n), where=out > 0)
+        mat.data *= np.repeat(inv, np.diff(mat.indptr))
+        self._matrix = mat
+        self._dangling = (out <= 0).astype(float)
+        self.num_edges = mat.nnz
+
+        self._lock = threading.RLock()
+        self.version = 0
+        self._x: np.ndarray | None = (
+            None if x0 is None else np.asarray(x0, dtype=float).copy()
+        )
+        self._solved = -1
+        self.iterations = 0
+        self.converged = True
+        self.residual = 0.0
+
+    @classmethod
+    def from_records(
+        cls,
+        nodes: Iterable[Mapping[str, Any]],
+        edges: Iterable[Any] = (),
+        **kwargs: Any,
+    ) -> "NodeGraph":
+        """Build a graph from ``nagr_nodes`` mappings and an edge list.
+
+        Raises:
+            ValueError: If a node or edge is malformed or an edge refers to an
+                unknown node.
+        """
+
+        nodes = list(nodes)
+        ids: List[str] = []
+        for n in nodes:
+            node_id = n.get("id")
+            if not isinstance(node_id, str):
+                raise ValueError("node 'id' must be a string")
+            ids.append(node_id)
+        index = {k: i for i, k in enumerate(ids)}
+        src: List[int] = []
+        dst: List[int] = []
+        ew: List[float] = []
+        for s, t, w in parse_edges(edges):
+            if s not in index or t not in index:
+                raise ValueError(f"edge {s!r} -> {t!r} refers to an unknown node")
+            src.append(index[s])
+            dst.append(index[t])
+            ew.append(w)
+        return cls(
+            ids,
+            [n.get("weight") for n in nodes],
+            [n.get("score") for n in nodes],
+            src,
+            dst,
+            ew,
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _set(self, weights: Any, scores: Any) -> None:
+        try:
+            w = np.asarray(weights, dtype=float)
+            s = np.asarray(scores, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("node weights and scores must be numbers") from None
+        if w.shape != self._weights.shape or s.shape != self._scores.shape:
+            raise ValueError("one weight and one score per node are required")
+        if not np.all(np.isfinite(w)):
+            raise ValueError("node weights must be finite")
+        if not np.all((s >= -1.0) & (s <= 1.0)):
+            raise ValueError("node scores must be in [-1, 1]")
+        self._weights, self._scores = w, s
+
+    def set_values(self, weights: Any, scores: Any) -> None:
+        """Replace every node's weight and score, keeping the edges.
+
+        The next solve is warm-started from the current solution.
+        """
+
+        with self._lock:
+            self._set(weights, scores)
+            self.version += 1
+
+    def update(self, nodes: Iterable[Mapping[str, Any]]) -> None:
+        """Change the weight and score of existing nodes by ``id``.
+
+        Raises:
+            ValueError: If a node is unknown or malformed.
+        """
+
+        with self._lock:
+            w, s = self._weights.copy(), self._scores.copy()
+            for n in nodes:
+                node_id = n.get("id")
+                i = self.index.get(node_id) if isinstance(node_id, str) else None
+                if i is None:
+                    raise ValueError(f"unknown node {node_id!r}")
+                try:
+                    w[i], s[i] = n.get("weight"), n.get("score")
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        f"node {node_id!r}: weight and score must be numbers"
+                    ) from None
+            self._set(w, s)
+            self.version += 1
+
+    def solution(self) -> Mapping[str, float]:
+        """Return the last propagated score of every node by id."""
+
+        with self._lock:
+            x = self._x if self._x is not None else self._scores
+            return dict(zip(self.ids, x.tolist()))
+
+    def propagate(self) -> np.ndarray:
+        """Solve for the propagated node scores.
+
+        Sets :attr:`iterations`, :attr:`converged` and :attr:`residual` for
+        this solve; a solve of unchanged values reuses the previous result
+        with zero iterations.
+        """
+
+        with self._lock:
+            if self._solved == self.version and self._x is not None and self.converged:
+                self.iterations = 0
+                return self._x
+            s = self._scores
+            x = self._x
+            if x is None or x.shape != s.shape:
+                x = s.copy()
+            d = self.damping
+            base = (1.0 - d) * s
+            keep = d * self._dangling
+            residual = 0.0
+            converged = len(s) == 0
+            k = 0
+            while not converged and k < self.max_iter:
+                k += 1
+                nxt = base + d * (self._matrix @ x) + keep * x
+                residual = float(np.max(np.abs(nxt - x)))
+                x = nxt
+                converged = residual <= self.tol
+            self._x = x
+            self._solved = self.version
+            self.iterations, self.converged, self.residual = k, converged, residual
+            return x
+
+    def score(self) -> float:
+        """Weight average of the propagated node scores, clipped to [-1, 1]."""
+
+        with self._lock:
+            x = self.propagate()
+            w = self._weights
+            den = float(np.abs(w).sum())
+            if not den:
+                return 0.0
+            return max(-1.0, min(1.0, float(w @ x) / den))
+
+    def diagnostics(self) -> List[str]:
+        """Notes describing the last solve, for output diagnostics."""
+
+        return [
+            f"nagr_propagation:iterations={self.iterations}"
+            f",converged={str(self.converged).lower()}"
+            f",residual={self.residual:.3g}"
+        ]
+
+    def token(self) -> Tuple[int, int]:
+        """Identity of the current contents, for cache keys."""
+
+        return (id(self), self.version)
+
+
+__all__ = ["Edge", "parse_edges", "NodeGraph"]
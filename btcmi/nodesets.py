@@ -0,0 +1,348 @@
+"""Registered NAGR node sets with incrementally maintained aggregates.
+
+A :class:`NodeSet` keeps its nodes by ``id`` together with the running
+numerator ``sum(weight * score)`` and denominator ``sum(|weight|)`` used by the
+NAGR score, so an upsert or delete costs O(1) instead of a walk over every
+node.  Running sums use compensated (Neumaier) accumulation and are rebuilt
+from scratch once as many changes as there are nodes have been applied, which
+keeps the aggregates within floating-point tolerance of a full recomputation
+at amortized O(1) cost.
+
+:class:`NodeSetRegistry` hands out opaque handles for registered node sets.
+Engines accept a :class:`NodeSet` wherever an inline ``nagr_nodes`` list is
+accepted.  A node set given an edge list with :meth:`NodeSet.set_edges` is
+scored by propagation over the graph (:mod:`btcmi.nagr_graph`) instead.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, cast
+
+from btcmi.nagr_graph import Edge, NodeGraph, parse_edges
+from btcmi.utils import RunningSum, is_number
+
+
+def _node(node: Mapping[str, Any]) -> Tuple[str, float, float]:
+    if not isinstance(node, Mapping):
+        raise ValueError("node must be an object")
+    node_id = node.get("id")
+    if not isinstance(node_id, str):
+        raise ValueError("node 'id' must be a string")
+    raw_w = node.get("weight")
+    raw_sc = node.get("score")
+    try:
+        w = float(cast(float, raw_w)) if is_number(raw_w) else math.nan
+    except OverflowError:  # integers beyond the float range
+        w = math.inf
+    if not math.isfinite(w):
+        raise ValueError(f"node {node_id!r}: 'weight' must be a finite number")
+    if not is_number(raw_sc) or not -1.0 <= (sc := cast(float, raw_sc)) <= 1.0:
+        raise ValueError(f"node {node_id!r}: 'score' must be a number in [-1, 1]")
+    return node_id, w, float(sc)
+
+
+class NodeSet:
+    """A keyed set of NAGR nodes with O(1) aggregate maintenance.
+
+    Args:
+        nodes: Initial node mappings with ``id``, ``weight`` and ``score``.
+        handle: Registry handle, if the set is registered.
+    """
+
+    def __init__(
+        self, nodes: Iterable[Mapping[str, Any]] = (), handle: str | None = None
+    ) -> None:
+        self.handle = handle
+        self.version = 0
+        self._nodes: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._num = RunningSum()
+        self._den = RunningSum()
+        self._changes = 0
+        # Bumped when a node is added or removed; the graph is rebuilt on change.
+        self._membership_version = 0
+        self._edges: List[Edge] | None = None
+        self._graph_params: Dict[str, Any] = {}
+        self._graph: NodeGraph | None = None
+        self._graph_state = (-1, -1)
+        self.upsert(nodes)
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._nodes
+
+    def _rebuild(self) -> None:
+        self._num, self._den = RunningSum(), RunningSum()
+        for w, sc in self._nodes.values():
+            self._num.add(w * sc)
+            self._den.add(abs(w))
+        self._changes = 0
+
+    def _applied(self, n: int) -> None:
+        self.version += 1
+        self._changes += n
+        if self._changes > max(len(self._nodes), 64):
+            self._rebuild()
+
+    def upsert(self, nodes: Iterable[Mapping[str, Any]]) -> int:
+        """Insert or replace nodes by ``id``; return how many were applied.
+
+        Raises:
+            ValueError: If a node is malformed; no node of the call is applied.
+        """
+
+        parsed = [_node(n) for n in nodes]
+        with self._lock:
+            self._upsert(parsed)
+        return len(parsed)
+
+    def _upsert(self, parsed: List[Tuple[str, float, float]]) -> None:
+        for node_id, w, sc in parsed:
+            old = self._nodes.get(node_id)
+            if old is not None:
+                self._num.add(-(old[0] * old[1]))
+                self._den.add(-abs(old[0]))
+            else:
+                self._membership_version += 1
+            self._nodes[node_id] = (w, sc)
+            self._num.add(w * sc)
+            self._den.add(abs(w))
+        self._applied(len(parsed))
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Remove nodes by ``id``; unknown ids are ignored.
+
+        Returns:
+            Number of nodes removed.
+        """
+
+        with self._lock:
+            return self._delete(ids)
+
+    def _delete(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for node_id in ids:
+            old = self._nodes.pop(node_id, None)
+            if old is None:
+                continue
+            self._num.add(-(old[0] * old[1]))
+            self._den.add(-abs(old[0]))
+            self._membership_version += 1
+            removed += 1
+        if not self._nodes:
+            self._rebuild()
+        self._applied(removed)
+        return removed
+
+    def update(
+        self,
+        upsert: Iterable[Mapping[str, Any]] = (),
+        delete: Iterable[str] = (),
+        *,
+        edges: Iterable[Any] | None = None,
+        params: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Apply upserts, deletions and an edge change as one update.
+
+        ``edges`` replaces the edge list and ``params`` the propagation
+        options (see :meth:`set_edges`); with only ``params`` the current
+        edges are kept.
+
+        Raises:
+            ValueError: If a node, edge or option is invalid; nothing is
+                applied.
+        """
+
+        parsed = [_node(n) for n in upsert]
+        ids = list(delete)
+        new_edges = None if edges is None else parse_edges(edges)
+        rewire = edges is not None or params is not None
+        if rewire:
+            NodeGraph([], [], [], **(params or {}))
+        with self._lock:
+            if rewire:
+                if new_edges is not None:
+                    self._edges = new_edges
+                self._graph_params = dict(params or {})
+                self._graph = None
+                self.version += 1
+            if parsed:
+                self._upsert(parsed)
+            if ids:
+                self._delete(ids)
+
+    def aggregates(self) -> Tuple[float, float]:
+        """Return the current ``(numerator, denominator)`` pair."""
+
+        with self._lock:
+            return self._num.value, self._den.value
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edges or ())
+
+    def edges(self) -> list[dict[str, Any]]:
+        """Return the edge list as ``{"source", "target", "weight"}`` mappings."""
+
+        return [
+            {"source": s, "target": t, "weight": w} for s, t, w in self._edges or ()
+        ]
+
+    def set_edges(self, edges: Iterable[Any] | None, **params: Any) -> None:
+        """Score the set by propagation over ``edges``; ``None`` stops it.
+
+        Edges are ``{"source", "target", "weight"}`` mappings between node ids;
+        edges touching an id that is not (or no longer) in the set are
+        ignored.  ``params`` are the ``damping``, ``tol`` and ``max_iter``
+        options of :class:`~btcmi.nagr_graph.NodeGraph`.
+
+        Raises:
+            ValueError: If an edge or option is invalid.
+        """
+
+        parsed = None if edges is None else parse_edges(edges)
+        NodeGraph([], [], [], **params)  # validate the options up front
+        with self._lock:
+            self._edges = parsed
+            self._graph_params = params
+            self._graph = None
+            self.version += 1
+
+    def _propagated(self) -> NodeGraph:
+        ids = list(self._nodes)
+        values = list(self._nodes.values())
+        weights = [w for w, _ in values]
+        scores = [sc for _, sc in values]
+        g = self._graph
+        if g is not None and self._graph_state[0] == self._membership_version:
+            if self._graph_state[1] != self.version:
+                g.set_values(weights, scores)
+        else:
+            index = {k: i for i, k in enumerate(ids)}
+            kept = [
+                (index[s], index[t], w)
+                for s, t, w in self._edges or ()
+                if s in index and t in index
+            ]
+            src, dst, ew = zip(*kept) if kept else ((), (), ())
+            x0 = None
+            if g is not None:
+                prev = g.solution()
+                x0 = [prev.get(k, sc) for k, sc in zip(ids, scores)]
+            g = NodeGraph(
+                ids, weights, scores, src, dst, ew, x0=x0, **self._graph_params
+            )
+            self._graph = g
+        self._graph_state = (self._membership_version, self.version)
+        return g
+
+    def score(self) -> float:
+        """NAGR score: weighted average score clipped to [-1, 1].
+
+        With edges set this is the propagated score of
+        :meth:`NodeGraph.score <btcmi.nagr_graph.NodeGraph.score>`.
+        """
+
+        if self._edges is not None:
+            with self._lock:
+                return self._propagated().score()
+        if not self._nodes:
+            return 0.0
+        num, den = self.aggregates()
+        return max(-1.0, min(1.0, num / den if den else 0.0))
+
+    def diagnostics(self) -> List[str]:
+        """Notes describing the last propagation, if the set has edges."""
+
+        g = self._graph
+        if self._edges is None or g is None:
+            return []
+        return g.diagnostics()
+
+    def nodes(self) -> list[dict[str, Any]]:
+        """Return the nodes as ``nagr_nodes`` mappings."""
+
+        with self._lock:
+            return [
+                {"id": k, "weight": w, "score": sc}
+                for k, (w, sc) in self._nodes.items()
+            ]
+
+    def token(self) -> Tuple[str | None, int, int]:
+        """Identity of the current contents, for cache keys."""
+
+        return (self.handle, id(self), self.version)
+
+
+class NodeSetRegistry:
+    """Thread-safe mapping of opaque handles to :class:`NodeSet` objects.
+
+    Args:
+        max_sets: Maximum number of registered node sets.
+    """
+
+    def __init__(self, max_sets: int = 1024) -> None:
+        self.max_sets = max_sets
+        self._sets: Dict[str, NodeSet] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def register(
+        self,
+        nodes: Iterable[Mapping[str, Any]],
+        edges: Iterable[Any] | None = None,
+        **params: Any,
+    ) -> NodeSet:
+        """Register a new node set and return it; its ``handle`` is set.
+
+        ``edges`` and ``params`` are passed to :meth:`NodeSet.set_edges`.
+
+        Raises:
+            ValueError: If a node, edge or option is invalid or the registry
+                is full.
+        """
+
+        handle = uuid.uuid4().hex
+        ns = NodeSet(nodes, handle=handle)
+        if edges is not None:
+            ns.set_edges(edges, **params)
+            ns.version = 0
+        with self._lock:
+            if len(self._sets) >= self.max_sets:
+                raise ValueError("node-set registry is full")
+            self._sets[handle] = ns
+        return ns
+
+    def get(self, handle: str) -> NodeSet:
+        """Return the node set for ``handle``.
+
+        Raises:
+            KeyError: If ``handle`` is not registered.
+        """
+
+        try:
+            return self._sets[handle]
+        except KeyError:
+            raise KeyError(f"unknown node set: {handle}") from None
+
+    def drop(self, handle: str) -> None:
+        """Forget ``handle``.
+
+        Raises:
+            KeyError: If ``handle`` is not registered.
+        """
+
+        with self._lock:
+            if self._sets.pop(handle, None) is None:
+                raise KeyError(f"unknown node set: {handle}")
+
+
+__all__ = ["NodeSet", "NodeSetRegistry"]
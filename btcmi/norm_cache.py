@@ -0,0 +1,244 @@
+"""Persisted normalized feature matrices for reweight-only recomputation.
+
+Normalization (``tanh(value / scale)``) depends only on the raw features and
+the scale configuration, while weights and router tables are applied to its
+output.  :class:`NormCache` stores the normalized values of a
+:class:`~btcmi.batch.FeatureMatrix` on disk, memory-mapped, under a key
+hashed from its columns and scales, so changing weights reuses the cached
+data and normalization only reruns when the scales change.
+
+Each entry is a directory ``<name>-<key>-<fingerprint>`` holding
+``data.bin``, an ``(N, 2K)`` little-endian float64 array with the normalized
+values in the first ``K`` columns and the presence mask as 0/1 in the last
+``K``, and ``meta.json``, written last.  The :func:`matrix_fingerprint` of the
+raw features is part of the entry, so changed features never hit stale data
+even under an unchanged ``name``.  Both files are written to temporary
+siblings and renamed into place, so a reader memory-mapping an entry never
+sees a file being rewritten.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Sequence, Tuple, cast
+
+import numpy as np
+
+from btcmi import batch, plans
+from btcmi.batch import FeatureMatrix
+
+FORMAT = "btcmi-norm"
+FORMAT_VERSION = 1
+
+
+def scale_key(
+    columns: Sequence[str], scales: Mapping[str, float], *, exact: bool = True
+) -> str:
+    """Hash the scale configuration that normalization depends on."""
+
+    doc = {
+        "columns": list(columns),
+        "scales": [float(scales.get(k, 1.0)) for k in columns],
+        "exact": exact,
+    }
+    blob = json.dumps(doc, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def matrix_fingerprint(matrix: FeatureMatrix) -> str:
+    """Hash the columns, raw values and presence mask of ``matrix``."""
+
+    h = hashlib.blake2b(digest_size=8)
+    h.update(json.dumps([list(matrix.columns), list(matrix.values.shape)]).encode())
+    h.update(np.ascontiguousarray(matrix.values, dtype="<f8").data)
+    h.update(np.ascontiguousarray(matrix.mask, dtype=bool).data)
+    return h.hexdigest()
+
+
+def _replace(path: Path, write: Callable[[Path], object]) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@dataclass(frozen=True)
+class NormalizedMatrix:
+    """Normalized values and presence mask side by side.
+
+    Attributes:
+        columns: Feature names in column order.
+        key: :func:`scale_key` of the scales used.
+        data: ``(N, 2K)`` normalized values followed by the 0/1 mask.
+    """
+
+    columns: Tuple[str, ...]
+    key: str
+    data: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def norm(self) -> np.ndarray:
+        """``(N, K)`` normalized values; masked entries are 0."""
+
+        return self.data[:, : len(self.columns)]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """``(N, K)`` presence mask."""
+
+        return cast(np.ndarray, self.data[:, len(self.columns) :] != 0)
+
+    def scores(self, profiles: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """Weighted scores of every row under several weight profiles.
+
+        The numerators ``norm @ w`` and denominators ``mask @ |w|`` of all
+        profiles come from one product with the cached data, so a weight
+        change costs no normalization.  Results equal
+        :func:`btcmi.batch.weighted_score_matrix` up to summation order.
+
+        Args:
+            profiles: ``{feature: weight}`` mappings; unknown features are
+                ignored.
+
+        Returns:
+            ``(N, P)`` scores clipped to [-1, 1], 0 where no weighted feature
+            is present.
+        """
+
+        k = len(self.columns)
+        index = {c: j for j, c in enumerate(self.columns)}
+        w = np.zeros((2 * k, 2 * len(profiles)))
+        for p, weights in enumerate(profiles):
+            for name, value in weights.items():
+                j = index.get(name)
+                if j is not None:
+                    w[j, p] = value
+                    w[k + j, len(profiles) + p] = abs(value)
+        prod = self.data @ w
+        num, den = prod[:, : len(profiles)], prod[:, len(profiles) :]
+        ratio = np.divide(num, den, out=np.zeros_like(num), where=den != 0)
+        return np.where(den != 0, batch.clip_unit(ratio), 0.0)
+
+    def score(self, weights: Mapping[str, float]) -> np.ndarray:
+        """``(N,)`` weighted scores under one profile; see :meth:`scores`."""
+
+        return self.scores([weights])[:, 0]
+
+    def scenario_scores(self) -> Dict[str, np.ndarray]:
+        """v1 base score of every row under each compiled scenario plan."""
+
+        names = tuple(plans.SCENARIO_PLANS)
+        out = self.scores([plans.SCENARIO_PLANS[n].weight_map for n in names])
+        return {n: out[:, i] for i, n in enumerate(names)}
+
+
+def normalized(
+    matrix: FeatureMatrix, scales: Mapping[str, float], *, exact: bool = True
+) -> NormalizedMatrix:
+    """Normalize ``matrix`` in memory into a :class:`NormalizedMatrix`."""
+
+    norm = batch.normalize_matrix(matrix, scales, exact=exact)
+    data = np.hstack([norm, matrix.mask.astype(float)])
+    key = scale_key(matrix.columns, scales, exact=exact)
+    return NormalizedMatrix(matrix.columns, key, data)
+
+
+class NormCache:
+    """Directory of normalized matrices keyed by name, scales and raw data."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def path(self, name: str, key: str, fingerprint: str) -> Path:
+        """Directory of the entry ``name`` normalized with scales ``key``."""
+
+        return self.root / f"{name}-{key}-{fingerprint}"
+
+    def get(
+        self,
+        name: str,
+        matrix: FeatureMatrix,
+        scales: Mapping[str, float],
+        *,
+        exact: bool = True,
+    ) -> NormalizedMatrix:
+        """Return the cached normalization of ``matrix``, computing it once.
+
+        Args:
+            name: Label of the raw data behind ``matrix``; entries are also
+                keyed by :func:`matrix_fingerprint`.
+            matrix: Raw features.
+            scales: Per-feature scale factors.
+            exact: Forwarded to :func:`btcmi.batch.normalize_matrix`.
+
+        Returns:
+            A memory-mapped :class:`NormalizedMatrix`.
+        """
+
+        key = scale_key(matrix.columns, scales, exact=exact)
+        fingerprint = matrix_fingerprint(matrix)
+        entry = self.path(name, key, fingerprint)
+        cached = self._open(entry, key, fingerprint, matrix)
+        if cached is not None:
+            return cached
+        entry.mkdir(parents=True, exist_ok=True)
+        result = normalized(matrix, scales, exact=exact)
+        _replace(entry / "data.bin", result.data.astype("<f8").tofile)
+        meta = {
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "key": key,
+            "fingerprint": fingerprint,
+            "rows": len(result),
+            "columns": list(matrix.columns),
+            "scales": {k: float(scales.get(k, 1.0)) for k in matrix.columns},
+            "exact": exact,
+        }
+        text = json.dumps(meta, indent=2)
+        _replace(entry / "meta.json", lambda p: p.write_text(text))
+        reopened = self._open(entry, key, fingerprint, matrix)
+        return result if reopened is None else reopened
+
+    @staticmethod
+    def _open(
+        entry: Path, key: str, fingerprint: str, matrix: FeatureMatrix
+    ) -> NormalizedMatrix | None:
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        rows, cols = len(matrix), tuple(matrix.columns)
+        if (
+            meta.get("format") != FORMAT
+            or meta.get("version") != FORMAT_VERSION
+            or meta.get("fingerprint") != fingerprint
+            or meta.get("rows") != rows
+            or tuple(meta.get("columns", ())) != cols
+        ):
+            return None
+        shape = (rows, 2 * len(cols))
+        if not rows or not cols:
+            return NormalizedMatrix(cols, key, np.zeros(shape))
+        data = np.memmap(entry / "data.bin", dtype="<f8", mode="r", shape=shape)
+        return NormalizedMatrix(cols, key, data)
+
+
+__all__ = [
+    "FORMAT",
+    "FORMAT_VERSION",
+    "scale_key",
+    "matrix_fingerprint",
+    "NormalizedMatrix",
+    "normalized",
+    "NormCache",
+]
@@ -0,0 +1,329 @@
+"""Vectorized OHLCV bars to v2 layer features.
+
+:func:`build_features` turns columnar OHLCV arrays into the L1/L2/L3 feature
+blocks consumed by :mod:`btcmi.engine_v2`, evaluating every rolling window
+with prefix sums so the cost is O(bars) NumPy work and no Python loop runs
+per bar.  Each layer looks back over its own number of bars
+(:class:`FeatureWindows`).
+
+Features that can be derived from price and volume are computed; the rest
+are passed through from optional columns of the same name:
+
+=====  ==============================  =====================================
+layer  feature                         definition over the layer window ``w``
+=====  ==============================  =====================================
+L1     ``price_change_pct``            ``100 * (close / close[-w] - 1)``
+L1     ``volume_change_pct``           volume of the window vs the previous
+                                       window, in percent
+L1     ``micro_liquidity_gaps``        bars opening more than
+                                       ``gap_threshold`` away from the
+                                       previous close
+L1     ``oi_change_pct``               like ``price_change_pct`` on an
+                                       ``open_interest`` column
+L2     ``net_positioning_index``       ``sum(volume * sign(close - open)) /
+                                       sum(volume)``
+L2     ``liquidation_heatmap_entropy`` normalized entropy of the volume
+                                       distribution across the window's bars
+L3     ``macro_regime_score``          window log return over its expected
+                                       size ``sigma * sqrt(w)``
+L3     ``supply_in_profit_pct``        ``close / VWAP - 1`` with the typical
+                                       price ``(high + low + close) / 3``
+=====  ==============================  =====================================
+
+The L2 and L3 definitions are price/volume proxies for the positioning and
+on-chain inputs of the same names.  Rows whose window is not yet filled
+leave the feature out.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from btcmi import plans
+from btcmi.batch import FeatureMatrix
+
+# Payload block of each layer.
+LAYER_BLOCKS = {"L1": "features_micro", "L2": "features_mezo", "L3": "features_macro"}
+
+
+@dataclass(frozen=True)
+class FeatureWindows:
+    """Lookback of each layer in bars and the L1 gap threshold.
+
+    The defaults suit minute bars: an hour, a day and thirty days.
+    """
+
+    micro: int = 60
+    mezo: int = 1440
+    macro: int = 43200
+    gap_threshold: float = 0.001
+
+    def __post_init__(self) -> None:
+        if min(self.micro, self.mezo, self.macro) < 2:
+            raise ValueError("feature windows must span at least two bars")
+        if self.gap_threshold < 0:
+            raise ValueError("gap_threshold must be non-negative")
+
+    @classmethod
+    def for_bar_seconds(cls, seconds: int) -> "FeatureWindows":
+        """Default lookbacks counted in bars of ``seconds`` instead of minutes.
+
+        Each layer keeps spanning an hour, a day and thirty days, with at
+        least two bars per layer.
+
+        Raises:
+            ValueError: If ``seconds`` is not positive.
+        """
+
+        if seconds <= 0:
+            raise ValueError("bar length must be positive")
+        d = cls()
+        micro, mezo, macro = (
+            max(2, round(n * 60 / seconds)) for n in (d.micro, d.mezo, d.macro)
+        )
+        return cls(micro, mezo, macro, d.gap_threshold)
+
+
+@dataclass(frozen=True)
+class OHLCVFeatures:
+    """Layer features for every emitted bar.
+
+    Attributes:
+        index: Bar positions of the rows in the input arrays.
+        timestamps: Timestamps of the rows, if the input had them.
+        layers: ``{"L1" | "L2" | "L3": FeatureMatrix}`` in the batch engine
+            layout, columns in the order of the layer's scales.
+    """
+
+    index: np.ndarray
+    timestamps: np.ndarray | None
+    layers: Dict[str, FeatureMatrix]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def blocks(self) -> Iterator[Dict[str, Dict[str, float]]]:
+        """Yield ``{"features_micro": ..., ...}`` feature blocks per row."""
+
+        per_layer = []
+        for level, block in LAYER_BLOCKS.items():
+            m = self.layers[level]
+            per_layer.append((block, m.columns, m.values.tolist(), m.mask.tolist()))
+        for r in range(len(self)):
+            yield {
+                block: {k: v for k, v, ok in zip(cols, vals[r], mask[r]) if ok}
+                for block, cols, vals, mask in per_layer
+            }
+
+    def payloads(
+        self, base: Mapping[str, Any] | None = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield v2 payloads: ``base`` plus each row's feature blocks.
+
+        String timestamps become the payload ``asof``.
+        """
+
+        base = dict(base or {})
+        stamps = self.timestamps.tolist() if self.timestamps is not None else None
+        for r, blocks in enumerate(self.blocks()):
+            data = dict(base, **blocks)
+            if stamps is not None and isinstance(stamps[r], str):
+                data["asof"] = stamps[r]
+            yield data
+
+
+def load_ohlcv(path: str | Path) -> Dict[str, np.ndarray]:
+    """Load OHLCV bars from a CSV file or a JSON array of records.
+
+    Returns:
+        Column name to array; ``timestamp`` stays a string array.
+    """
+
+    p = Path(path)
+    if p.suffix.lower() == ".json":
+        frame = pd.DataFrame.from_records(json.loads(p.read_text()))
+    else:
+        frame = pd.read_csv(p, dtype={"timestamp": str})
+    cols: Dict[str, np.ndarray] = {}
+    for name in frame.columns:
+        if name == "timestamp":
+            cols[name] = frame[name].astype(str).to_numpy()
+        else:
+            cols[name] = frame[name].to_numpy(dtype=float)
+    return cols
+
+
+def _prefix(x: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x) + 1)
+    out[0] = 0.0
+    np.cumsum(x, out=out[1:])
+    return out
+
+
+def _rolling_sum(x: np.ndarray, w: int) -> np.ndarray:
+    """Sum of the ``w`` values ending at each bar; NaN until the window fills."""
+
+    c = _prefix(x)
+    out = np.full(len(x), np.nan)
+    if len(x) >= w:
+        out[w - 1 :] = c[w:] - c[:-w]
+    return out
+
+
+def _lagged(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if k < len(x):
+        out[k:] = x[:-k] if k else x
+    return out
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den != 0, num / den, np.nan)
+
+
+def _micro(cols: Mapping[str, np.ndarray], w: FeatureWindows) -> Dict[str, np.ndarray]:
+    close = cols["close"]
+    feats = {"price_change_pct": 100.0 * (_ratio(close, _lagged(close, w.micro)) - 1.0)}
+    if "volume" in cols:
+        vol = _rolling_sum(cols["volume"], w.micro)
+        feats["volume_change_pct"] = 100.0 * (_ratio(vol, _lagged(vol, w.micro)) - 1.0)
+    if "open" in cols:
+        prev = _lagged(close, 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gap = np.abs(cols["open"] - prev) > w.gap_threshold * np.abs(prev)
+        counts = _rolling_sum(gap.astype(float), w.micro)
+        counts[: min(w.micro, len(close))] = np.nan  # first bar has no previous close
+        feats["micro_liquidity_gaps"] = counts
+    if "open_interest" in cols:
+        oi = cols["open_interest"]
+        feats["oi_change_pct"] = 100.0 * (_ratio(oi, _lagged(oi, w.micro)) - 1.0)
+    return feats
+
+
+def _mezo(cols: Mapping[str, np.ndarray], w: FeatureWindows) -> Dict[str, np.ndarray]:
+    if "volume" not in cols:
+        return {}
+    vol = cols["volume"]
+    total = _rolling_sum(vol, w.mezo)
+    feats: Dict[str, np.ndarray] = {}
+    if "open" in cols:
+        signed = _rolling_sum(vol * np.sign(cols["close"] - cols["open"]), w.mezo)
+        feats["net_positioning_index"] = np.clip(_ratio(signed, total), -1.0, 1.0)
+    # H = log(V) - sum(v log v) / V, normalized by log(w).
+    vlogv = np.where(vol > 0, vol * np.log(np.where(vol > 0, vol, 1.0)), 0.0)
+    s = _rolling_sum(vlogv, w.mezo)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ent = (np.log(total) - s / total) / np.log(w.mezo)
+    feats["liquidation_heatmap_entropy"] = np.where(
+        total > 0, np.clip(ent, 0.0, 1.0), np.nan
+    )
+    return feats
+
+
+def _macro(cols: Mapping[str, np.ndarray], w: FeatureWindows) -> Dict[str, np.ndarray]:
+    close = cols["close"]
+    n = len(close)
+    feats: Dict[str, np.ndarray] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logc = np.log(close)
+    r = np.diff(logc, prepend=np.nan)
+    r0 = np.where(np.isfinite(r), r, 0.0)
+    s1 = _rolling_sum(r0, w.macro)
+    s2 = _rolling_sum(r0 * r0, w.macro)
+    var = np.maximum(s2 - s1 * s1 / w.macro, 0.0) / (w.macro - 1)
+    trend = logc - _lagged(logc, w.macro)
+    score = _ratio(trend, np.sqrt(var * w.macro))
+    if n:
+        score[: min(w.macro, n)] = np.nan  # the first return is undefined
+    feats["macro_regime_score"] = score
+    if {"high", "low", "volume"} <= cols.keys():
+        vol = cols["volume"]
+        typical = (cols["high"] + cols["low"] + close) / 3.0
+        vwap = _ratio(_rolling_sum(typical * vol, w.macro), _rolling_sum(vol, w.macro))
+        feats["supply_in_profit_pct"] = _ratio(close, vwap) - 1.0
+    return feats
+
+
+_BUILDERS = {"L1": _micro, "L2": _mezo, "L3": _macro}
+# Columns entering rolling sums, where one NaN would poison every later bar.
+_ROLLED = ("open", "high", "low", "close", "volume", "open_interest")
+
+
+def build_features(
+    ohlcv: Mapping[str, Any],
+    windows: FeatureWindows = FeatureWindows(),
+    *,
+    step: int = 1,
+    start: int = 0,
+) -> OHLCVFeatures:
+    """Compute L1/L2/L3 features for OHLCV bars.
+
+    Args:
+        ohlcv: Column mapping (or DataFrame) with at least ``close``;
+            ``open``, ``high``, ``low``, ``volume``, ``open_interest``,
+            ``timestamp`` and any layer feature columns are optional.
+        windows: Lookback of each layer.
+        step: Emit every ``step``-th bar.
+        start: First bar to emit.
+
+    Returns:
+        :class:`OHLCVFeatures` with one row per emitted bar.
+
+    Raises:
+        ValueError: If ``close`` is missing or the columns differ in length.
+    """
+
+    if step < 1 or start < 0:
+        raise ValueError("step must be positive and start non-negative")
+    if "close" not in ohlcv:
+        raise ValueError("OHLCV data requires a 'close' column")
+    stamps = ohlcv["timestamp"] if "timestamp" in ohlcv else None
+    cols: Dict[str, np.ndarray] = {}
+    for name in ohlcv.keys():
+        if name == "timestamp":
+            continue
+        try:
+            cols[name] = np.asarray(ohlcv[name], dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(f"column {name!r} must be numeric") from None
+    n = len(cols["close"])
+    if any(len(v) != n for v in cols.values()):
+        raise ValueError("OHLCV columns must have equal length")
+    for name in _ROLLED:
+        if name in cols and not np.all(np.isfinite(cols[name])):
+            raise ValueError(f"column {name!r} must be finite")
+    idx = np.arange(start, n, step)
+
+    layers: Dict[str, FeatureMatrix] = {}
+    for level, build in _BUILDERS.items():
+        computed = build(cols, windows)
+        columns: Tuple[str, ...] = plans.LAYER_PLANS[level].features
+        values = np.zeros((len(idx), len(columns)))
+        mask = np.zeros((len(idx), len(columns)), dtype=bool)
+        for j, name in enumerate(columns):
+            series = computed.get(name, cols.get(name))
+            if series is None:
+                continue
+            col = series[idx]
+            ok = np.isfinite(col)
+            values[ok, j] = col[ok]
+            mask[:, j] = ok
+        layers[level] = FeatureMatrix(columns, values, mask)
+    ts = None if stamps is None else np.asarray(stamps)[idx]
+    return OHLCVFeatures(idx, ts, layers)
+
+
+__all__ = [
+    "LAYER_BLOCKS",
+    "FeatureWindows",
+    "OHLCVFeatures",
+    "load_ohlcv",
+    "build_features",
+]
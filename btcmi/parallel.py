@@ -0,0 +1,232 @@
+"""Parallel scoring of input files into a mirrored output tree.
+
+Files are sent to worker processes in chunks so each inter-process round trip
+carries many payloads, and every chunk is scored through the batch runners.
+Outputs are written atomically, which makes an existing output file proof
+that its input was completed; a resumed run skips those files.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+from btcmi.io import write_output
+from btcmi.runner import run_batch
+from btcmi.schema_util import SCHEMA_REGISTRY, load_json, validate_json
+from btcmi.stream import iter_chunks
+
+DEFAULT_CHUNK_SIZE = 32
+
+_MAGIC = "*?["
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Outcome for one input file.
+
+    Attributes:
+        path: Input file.
+        out_path: Mirrored output file.
+        status: ``"ok"``, ``"skipped"`` (already done on resume) or an error
+            code such as ``"invalid_json"`` or ``"runner_error"``.
+        message: Error details, if any.
+    """
+
+    path: str
+    out_path: str
+    status: str
+    message: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "skipped")
+
+
+def discover(
+    source: str | Path, exclude: str | Path | None = None
+) -> Tuple[Path, List[Path]]:
+    """Resolve a directory or glob pattern into a root and its input files.
+
+    A directory yields every ``*.json`` file below it.  For a glob the root is
+    the longest leading path without wildcard characters.  Files below
+    ``exclude``, typically the output directory of a previous run inside the
+    input tree, are left out so outputs are never scored as inputs.
+    """
+
+    src = str(source)
+    p = Path(src)
+    if not any(c in src for c in _MAGIC):
+        if p.is_dir():
+            root = p
+            files = sorted(f for f in p.rglob("*.json") if f.is_file())
+        else:
+            root, files = p.parent, [p] if p.is_file() else []
+    else:
+        fixed = []
+        for part in p.parts:
+            if any(c in part for c in _MAGIC):
+                break
+            fixed.append(part)
+        root = Path(*fixed) if fixed else Path(".")
+        files = sorted(
+            Path(f) for f in glob.glob(src, recursive=True) if Path(f).is_file()
+        )
+    if exclude is not None:
+        skip = Path(exclude).resolve()
+        files = [f for f in files if not f.resolve().is_relative_to(skip)]
+    return root, files
+
+
+def mirrored_path(path: Path, root: Path, out_dir: Path) -> Path:
+    """Return the output location of ``path`` below ``out_dir``."""
+
+    return Path(out_dir) / Path(path).relative_to(root)
+
+
+def is_done(path: Path, out_path: Path) -> bool:
+    """Return True if ``out_path`` exists and is not older than ``path``."""
+
+    try:
+        return out_path.stat().st_mtime >= path.stat().st_mtime
+    except OSError:
+        return False
+
+
+def score_files(
+    tasks: Sequence[Tuple[str, str]], mode: str | None, fixed_ts: str | None
+) -> List[FileResult]:
+    """Score ``(input, output)`` path pairs and write each output.
+
+    This is the unit of work sent to a worker process.
+    """
+
+    results: List[FileResult | None] = [None] * len(tasks)
+    payloads = []
+    loaded: List[int] = []
+    for pos, (src, dst) in enumerate(tasks):
+        try:
+            data = load_json(src)
+        except FileNotFoundError:
+            results[pos] = FileResult(src, dst, "input_file_not_found")
+            continue
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            results[pos] = FileResult(src, dst, "invalid_json", str(e))
+            continue
+        try:
+            validate_json(data, SCHEMA_REGISTRY["input"])
+        except Exception as e:  # noqa: BLE001
+            results[pos] = FileResult(
+                src, dst, "input_schema_validation_failed", str(e)
+            )
+            continue
+        loaded.append(pos)
+        payloads.append(data)
+
+    outputs = run_batch(payloads, fixed_ts, mode=mode)
+    for pos, data, out in zip(loaded, payloads, outputs):
+        src, dst = tasks[pos]
+        if "error" in out:
+            results[pos] = FileResult(src, dst, "runner_error", out["message"])
+            continue
+        if (mode or data.get("mode", "v1")) != "v2.nf3p":
+            try:
+                validate_json(out, SCHEMA_REGISTRY["output"])
+            except Exception as e:  # noqa: BLE001
+                results[pos] = FileResult(
+                    src, dst, "output_schema_validation_failed", str(e)
+                )
+                continue
+        try:
+            write_output(out, dst, atomic=True)
+        except RuntimeError as e:
+            results[pos] = FileResult(src, dst, "output_write_failed", str(e))
+            continue
+        results[pos] = FileResult(src, dst, "ok")
+    return results  # type: ignore[return-value]
+
+
+def run_many(
+    files: Iterable[Path],
+    root: Path,
+    out_dir: Path,
+    *,
+    mode: str | None = None,
+    fixed_ts: str | None = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = False,
+) -> List[FileResult]:
+    """Score ``files`` in parallel into a tree mirroring ``root`` under ``out_dir``.
+
+    Parameters
+    ----------
+    files:
+        Input JSON files below ``root``.
+    root:
+        Directory whose layout is mirrored under ``out_dir``.
+    out_dir:
+        Destination directory.
+    mode:
+        Engine mode for every file; ``None`` uses each payload's ``mode``.
+    fixed_ts:
+        Timestamp used for the ``asof`` field.
+    workers:
+        Worker processes; ``None`` uses ``os.cpu_count()`` and ``1`` scores
+        in the calling process.
+    chunk_size:
+        Files sent to a worker per task.
+    resume:
+        Skip files whose output already exists and is up to date.
+
+    Returns
+    -------
+    list of FileResult
+        One result per input file, in input order.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk size must be positive")
+    workers = workers or os.cpu_count() or 1
+    files = list(files)
+    results: List[FileResult] = []
+    tasks: List[Tuple[str, str]] = []
+    for f in files:
+        dst = mirrored_path(f, root, out_dir)
+        if resume and is_done(Path(f), dst):
+            results.append(FileResult(str(f), str(dst), "skipped"))
+        else:
+            tasks.append((str(f), str(dst)))
+
+    chunks = list(iter_chunks(tasks, chunk_size))
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            results.extend(score_files(chunk, mode, fixed_ts))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(score_files, c, mode, fixed_ts) for c in chunks]
+            try:
+                for fut in as_completed(futures):
+                    results.extend(fut.result())
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+    order = {str(f): i for i, f in enumerate(files)}
+    return sorted(results, key=lambda r: order[r.path])
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "FileResult",
+    "discover",
+    "mirrored_path",
+    "is_done",
+    "score_files",
+    "run_many",
+]
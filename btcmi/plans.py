@@ -0,0 +1,252 @@
+"""Scoring plans compiled once from :mod:`btcmi.config`.
+
+A plan freezes everything a request would otherwise rebuild from the config
+dictionaries: interned feature-name tuples, scale and weight vectors and the
+weight denominators for every subset of present features.  Engines look the
+plans up through this module's attributes so a reloaded configuration takes
+effect without re-importing them.
+
+Plans reproduce :func:`btcmi.feature_processing.normalize_features` and
+:func:`btcmi.feature_processing.weighted_score` exactly, including the order
+in which weights are summed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Tuple
+import math
+import sys
+
+from btcmi.config import NORM_SCALE, SCALES, SCENARIO_WEIGHTS
+from btcmi.utils import is_number
+
+
+FeatureMap = Dict[str, float]
+
+# Precompute denominators for every presence bitmask up to this many features.
+_MAX_TABLE_BITS = 12
+# Precompute equal-weight denominators for layers with up to this many keys.
+_MAX_EQUAL_TABLE = 64
+# Exact types accepted without the slower ``numbers.Real`` check.
+_FAST_NUMBER = frozenset({float, int})
+
+
+def _intern(names: Iterable[Any]) -> Tuple[str, ...]:
+    return tuple(sys.intern(str(k)) for k in names)
+
+
+def _normalize(features: Mapping[str, Any], scales: Mapping[str, float]) -> FeatureMap:
+    get = scales.get
+    tanh = math.tanh
+    return {
+        k: tanh(v / get(k, 1.0))
+        for k, v in features.items()
+        if type(v) in _FAST_NUMBER or is_number(v)
+    }
+
+
+def _clip(x: float) -> float:
+    return max(-1.0, min(1.0, x))
+
+
+def _sequential_abs_sum(weights: Tuple[float, ...], bits: int) -> float:
+    den = 0.0
+    for i, w in enumerate(weights):
+        if bits >> i & 1:
+            den += abs(w)
+    return den
+
+
+def _equal_denominator(n: int) -> float:
+    w = 1.0 / n
+    den = 0.0
+    for _ in range(n):
+        den += w
+    return den
+
+
+@dataclass(frozen=True)
+class NormPlan:
+    """Feature scales for one normalization domain.
+
+    Attributes:
+        features: Expected feature names in config order.
+        scales: Scale factor for each expected feature.
+        scale_map: ``{feature: scale}`` view of the same data.
+        feature_set: ``features`` as a frozenset for membership checks.
+    """
+
+    features: Tuple[str, ...]
+    scales: Tuple[float, ...]
+    scale_map: Mapping[str, float]
+    feature_set: FrozenSet[str]
+
+    def normalize(self, features: Mapping[str, Any]) -> FeatureMap:
+        """Normalize ``features`` like :func:`normalize_features`."""
+
+        return _normalize(features, self.scale_map)
+
+    def completeness(self, features: Mapping[str, Any]) -> float:
+        """Return the fraction of expected features present and numeric."""
+
+        if not self.features:
+            return 1.0
+        exp = self.feature_set.intersection(features)
+        pres = [k for k in exp if is_number(features[k])]
+        return len(pres) / len(self.features)
+
+
+@dataclass(frozen=True)
+class ScenarioPlan:
+    """Weight profile for one v1 scenario.
+
+    Attributes:
+        name: Scenario key.
+        features: Weighted feature names in weight order.
+        weights: Weight for each feature.
+        weight_map: The ``{feature: weight}`` mapping reported in outputs.
+        denominators: ``sum(|w|)`` over present features indexed by the
+            presence bitmask, or empty when there are too many features.
+        terms: ``(feature, weight, bit)`` triples in weight order.
+    """
+
+    name: str
+    features: Tuple[str, ...]
+    weights: Tuple[float, ...]
+    weight_map: Mapping[str, float]
+    denominators: Tuple[float, ...]
+    terms: Tuple[Tuple[str, float, int], ...]
+
+    def score(self, norm: Mapping[str, float]) -> Tuple[float, FeatureMap]:
+        """Weighted score of ``norm`` like :func:`weighted_score`."""
+
+        s = 0.0
+        bits = 0
+        contrib: FeatureMap = {}
+        for k, w, bit in self.terms:
+            if k in norm:
+                c = norm[k] * w
+                contrib[k] = c
+                s += c
+                bits |= bit
+        if self.denominators:
+            den = self.denominators[bits]
+        else:
+            den = _sequential_abs_sum(self.weights, bits)
+        return (_clip(s / den) if den else 0.0), contrib
+
+
+@dataclass(frozen=True)
+class LayerPlan:
+    """Normalization and equal-weight scoring for one v2 layer.
+
+    Attributes:
+        name: Layer key (``"L1"``, ``"L2"`` or ``"L3"``).
+        norm: Scales for the layer's features.
+        equal_denominators: Sum of ``1 / n`` taken ``n`` times, indexed by
+            ``n``, matching the denominator of an equal-weight score.
+    """
+
+    name: str
+    norm: NormPlan
+    equal_denominators: Tuple[float, ...]
+
+    @property
+    def features(self) -> Tuple[str, ...]:
+        return self.norm.features
+
+    def normalize(self, features: Mapping[str, Any]) -> FeatureMap:
+        """Normalize a layer's feature mapping."""
+
+        return self.norm.normalize(features)
+
+    def equal_denominator(self, n: int) -> float:
+        if n < len(self.equal_denominators):
+            return self.equal_denominators[n]
+        return _equal_denominator(n)
+
+    def equal_score(self, norm: Mapping[str, float]) -> Tuple[float, FeatureMap]:
+        """Score ``norm`` with equal weights on every present feature.
+
+        Equivalent to ``weighted_score(norm, layer_equal_weights(norm))``
+        without building the weight mapping.
+        """
+
+        n = len(norm)
+        if not n:
+            return 0.0, {}
+        w = 1.0 / n
+        s = 0.0
+        contrib: FeatureMap = {}
+        for k, v in norm.items():
+            c = v * w
+            contrib[k] = c
+            s += c
+        den = self.equal_denominator(n)
+        return (_clip(s / den) if den else 0.0), contrib
+
+
+def compile_norm_plan(scales: Mapping[str, float]) -> NormPlan:
+    """Compile a :class:`NormPlan` from a ``{feature: scale}`` mapping."""
+
+    features = _intern(scales)
+    values = tuple(float(scales[k]) for k in features)
+    return NormPlan(features, values, dict(zip(features, values)), frozenset(features))
+
+
+def compile_scenario_plan(name: str, weights: Mapping[str, float]) -> ScenarioPlan:
+    """Compile a :class:`ScenarioPlan` from a ``{feature: weight}`` mapping."""
+
+    features = _intern(weights)
+    values = tuple(weights[k] for k in features)
+    dens: Tuple[float, ...] = ()
+    if len(features) <= _MAX_TABLE_BITS:
+        dens = tuple(
+            _sequential_abs_sum(values, bits) for bits in range(1 << len(features))
+        )
+    terms = tuple((k, w, 1 << i) for i, (k, w) in enumerate(zip(features, values)))
+    return ScenarioPlan(sys.intern(name), features, values, weights, dens, terms)
+
+
+def compile_layer_plan(name: str, scales: Mapping[str, float]) -> LayerPlan:
+    """Compile a :class:`LayerPlan` from a layer's scale mapping."""
+
+    size = max(_MAX_EQUAL_TABLE, len(scales) + 1)
+    dens = (0.0,) + tuple(_equal_denominator(n) for n in range(1, size))
+    return LayerPlan(sys.intern(name), compile_norm_plan(scales), dens)
+
+
+def compile_plans(
+    scenario_weights: Mapping[str, Mapping[str, float]] = SCENARIO_WEIGHTS,
+    norm_scale: Mapping[str, float] = NORM_SCALE,
+    scales: Mapping[str, Mapping[str, float]] = SCALES,
+) -> None:
+    """(Re)build the module-level plans from configuration mappings."""
+
+    global V1_NORM, SCENARIO_PLANS, LAYER_PLANS
+    V1_NORM = compile_norm_plan(norm_scale)
+    SCENARIO_PLANS = {
+        k: compile_scenario_plan(k, w) for k, w in scenario_weights.items()
+    }
+    LAYER_PLANS = {k: compile_layer_plan(k, s) for k, s in scales.items()}
+
+
+V1_NORM: NormPlan
+SCENARIO_PLANS: Dict[str, ScenarioPlan]
+LAYER_PLANS: Dict[str, LayerPlan]
+compile_plans()
+
+
+__all__ = [
+    "NormPlan",
+    "ScenarioPlan",
+    "LayerPlan",
+    "compile_norm_plan",
+    "compile_scenario_plan",
+    "compile_layer_plan",
+    "compile_plans",
+    "V1_NORM",
+    "SCENARIO_PLANS",
+    "LAYER_PLANS",
+]
@@ -0,0 +1,447 @@
+"""Grid search over the v2 router cut points and level weights.
+
+The router only decides how the three level signals ``s1``, ``s2`` and
+``s3`` of a payload are combined, so they are computed once per timestamp
+(:class:`LevelSignals`, which can be saved and reloaded together with a
+description of the inputs they were built from) and every candidate
+configuration is then scored against realized returns with array
+operations: candidates are processed in chunks of shape
+``(candidates, rows)`` and chunks may be spread over worker processes.
+
+Candidates hold the low/high volatility-percentile cuts and an L1/L2/L3
+weight row per regime.  Objectives, computed on rows with a finite target:
+
+* ``"ic"``: Pearson correlation of the overall signal with the target.
+* ``"hit_rate"``: share of rows with non-zero signal and target whose signs
+  agree.
+* ``"sharpe"``: mean over standard deviation of ``signal * target``.
+
+The winner is written as JSON for :func:`btcmi.engine_v2.load_router_config`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, cast
+
+import numpy as np
+
+from btcmi import config
+from btcmi.backtest import forward_returns, layer_predictions
+from btcmi.bars import Bars
+from btcmi.engine_v2 import ROUTER_CONFIG_VERSION, ROUTER_REGIMES
+from btcmi.io import write_output
+from btcmi.norm_cache import NormCache
+from btcmi.ohlcv import FeatureWindows, build_features
+from btcmi.runner import run_v2_batch
+from btcmi.vol_regime import VolRegimeEstimator
+
+OBJECTIVES = ("ic", "hit_rate", "sharpe")
+CONFIG_VERSION = ROUTER_CONFIG_VERSION
+# Candidate x row elements evaluated per chunk.
+CHUNK_ELEMENTS = 1 << 22
+
+
+@dataclass(frozen=True)
+class LevelSignals:
+    """Per-timestamp inputs of the router.
+
+    Attributes:
+        signals: ``(N, 3)`` level signals ``s1``, ``s2`` and ``s3``.
+        vol: ``(N,)`` volatility percentiles.
+        target: ``(N,)`` realized returns; NaN rows are ignored.
+        meta: JSON description of the inputs, see :func:`signals_meta`.
+    """
+
+    signals: np.ndarray
+    vol: np.ndarray
+    target: np.ndarray
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        n = len(self.vol)
+        if self.signals.shape != (n, 3) or self.target.shape != (n,):
+            raise ValueError("signals, vol and target must have matching rows")
+
+    def __len__(self) -> int:
+        return len(self.vol)
+
+    def save(self, path: str | Path) -> None:
+        """Write the arrays and :attr:`meta` to an ``.npz`` file at ``path``.
+
+        The file is written to ``path`` as given; no suffix is appended.
+        """
+
+        with open(path, "wb") as fh:
+            np.savez(
+                fh,
+                signals=self.signals,
+                vol=self.vol,
+                target=self.target,
+                meta=np.array(json.dumps(self.meta, sort_keys=True)),
+            )
+
+    @classmethod
+    def load(
+        cls, path: str | Path, expect: Mapping[str, Any] | None = None
+    ) -> "LevelSignals":
+        """Read arrays written by :meth:`save`.
+
+        Args:
+            path: File written by :meth:`save`.
+            expect: Entries the stored :attr:`meta` must contain, usually from
+                :func:`signals_meta`.
+
+        Raises:
+            ValueError: If an entry of ``expect`` differs from the stored
+                metadata; files without metadata never match.
+        """
+
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"])) if "meta" in z.files else {}
+            stale = sorted(k for k, v in (expect or {}).items() if meta.get(k) != v)
+            if stale:
+                raise ValueError(
+                    f"signals cache {path} was built with a different "
+                    + ", ".join(stale)
+                )
+            return cls(z["signals"], z["vol"], z["target"], meta)
+
+
+def bars_fingerprint(bars: Bars) -> str:
+    """Short hash of the timestamps and columns of ``bars``."""
+
+    h = hashlib.blake2b(digest_size=8)
+    h.update(np.ascontiguousarray(bars.timestamps).tobytes())
+    for name in sorted(bars.columns):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(bars.columns[name], dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def signals_meta(
+    bars: Bars | None,
+    windows: FeatureWindows = FeatureWindows(),
+    *,
+    horizon: int = 60,
+    vol_window: int = config.VOL_REGIME_WINDOW,
+    vol_history: int = config.VOL_REGIME_HISTORY,
+) -> Dict[str, Any]:
+    """Describe the inputs of :func:`signals_from_bars`.
+
+    The ``input`` fingerprint of :func:`bars_fingerprint` is left out when
+    ``bars`` is None, so a cache can still be checked against the settings
+    alone.
+    """
+
+    meta: Dict[str, Any] = {
+        "horizon": int(horizon),
+        "windows": [
+            windows.micro,
+            windows.mezo,
+            windows.macro,
+            float(windows.gap_threshold),
+        ],
+        "vol_window": int(vol_window),
+        "vol_history": int(vol_history),
+    }
+    if bars is not None:
+        meta["input"] = bars_fingerprint(bars)
+    return meta
+
+
+def signals_from_payloads(
+    payloads: Sequence[Dict[str, Any]], target: Sequence[float]
+) -> LevelSignals:
+    """Score v2 payloads once and keep their level signals.
+
+    Payloads that fail to score get a NaN target.
+    """
+
+    res = run_v2_batch(payloads, None, layout="columns")
+    n = len(payloads)
+    signals = np.zeros((n, 3))
+    for j, level in enumerate(("L1", "L2", "L3")):
+        signals[res.index, j] = res.columns[f"overall_signal_{level}"]
+    vol = np.full(n, 0.5)
+    tgt = np.asarray(target, dtype=float).copy()
+    ok = np.zeros(n, dtype=bool)
+    ok[res.index] = True
+    for i in res.index.tolist():
+        vol[i] = float(payloads[i].get("vol_regime_pctl", 0.5))
+    tgt[~ok] = np.nan
+    return LevelSignals(signals, vol, tgt)
+
+
+def signals_from_bars(
+    bars: Bars,
+    windows: FeatureWindows = FeatureWindows(),
+    *,
+    horizon: int = 60,
+    vol_window: int = config.VOL_REGIME_WINDOW,
+    vol_history: int = config.VOL_REGIME_HISTORY,
+    norm_cache: NormCache | None = None,
+    name: str = "features",
+) -> LevelSignals:
+    """Level signals of OHLCV bars with their forward returns.
+
+    The level signals are the v2 layer scores of
+    :func:`btcmi.ohlcv.build_features` without NAGR nodes, the volatility
+    percentile comes from a :class:`~btcmi.vol_regime.VolRegimeEstimator`
+    fed with the closes, and the target is the ``horizon``-bar forward log
+    return.  ``norm_cache`` and ``name`` are forwarded to
+    :func:`btcmi.backtest.layer_predictions`.  The result carries the
+    :func:`signals_meta` of its inputs.
+    """
+
+    feats = build_features(bars.columns, windows)
+    preds, _ = layer_predictions(feats.layers, cache=norm_cache, name=name)
+    est = VolRegimeEstimator(vol_window, vol_history)
+    vol = np.fromiter(
+        map(est.update, bars["close"].tolist()), dtype=float, count=len(bars)
+    )
+    meta = signals_meta(
+        bars, windows, horizon=horizon, vol_window=vol_window, vol_history=vol_history
+    )
+    target = forward_returns(bars["close"], horizon)
+    return LevelSignals(0.8 * preds, vol, target, meta)
+
+
+@dataclass(frozen=True)
+class Candidates:
+    """Router configurations to evaluate.
+
+    Attributes:
+        cuts: ``(C, 2)`` low and high percentile cuts.
+        weights: ``(C, 3, 3)`` L1/L2/L3 weights of the low, mid and high
+            regimes.
+    """
+
+    cuts: np.ndarray
+    weights: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.cuts)
+
+    def config(self, i: int) -> Dict[str, Any]:
+        """Return candidate ``i`` in the router config layout."""
+
+        lo, hi = self.cuts[i].tolist()
+        return {
+            "router_cuts": [lo, hi],
+            "router_level_weights": {
+                regime: dict(zip(("L1", "L2", "L3"), self.weights[i, r].tolist()))
+                for r, regime in enumerate(ROUTER_REGIMES)
+            },
+        }
+
+
+def simplex(step: float) -> np.ndarray:
+    """L1/L2/L3 weight rows on a grid of ``step`` that sum to one."""
+
+    k = round(1.0 / step)
+    if k < 1 or not np.isclose(k * step, 1.0):
+        raise ValueError("step must divide 1")
+    rows = [(a, b, k - a - b) for a in range(k + 1) for b in range(k + 1 - a)]
+    return np.array(rows, dtype=float) / k
+
+
+def candidate_grid(cuts: Iterable[float], weight_step: float = 0.25) -> Candidates:
+    """Every cut pair ``low < high`` from ``cuts`` with every weight choice.
+
+    Each regime picks its weights independently from :func:`simplex`, so the
+    grid has ``pairs * len(simplex(weight_step)) ** 3`` candidates.
+    """
+
+    values = sorted(set(float(c) for c in cuts))
+    pairs = [(lo, hi) for lo, hi in itertools.combinations(values, 2)]
+    if not pairs:
+        raise ValueError("at least two distinct cuts are required")
+    rows = simplex(weight_step)
+    m = len(rows)
+    idx = np.stack(
+        np.meshgrid(np.arange(m), np.arange(m), np.arange(m), indexing="ij"), -1
+    ).reshape(-1, 3)
+    tables = rows[idx]
+    cut_arr = np.repeat(np.array(pairs), len(tables), axis=0)
+    weights = np.tile(tables, (len(pairs), 1, 1))
+    return Candidates(cut_arr, weights)
+
+
+def blend(signals: np.ndarray, vol: np.ndarray, candidates: Candidates) -> np.ndarray:
+    """Overall signal of every candidate and row.
+
+    Vectorized :func:`btcmi.engine_v2.router_weights` followed by
+    :func:`btcmi.engine_v2.combine_levels`.
+
+    Args:
+        signals: ``(N, 3)`` level signals.
+        vol: ``(N,)`` volatility percentiles.
+        candidates: Configurations to apply.
+
+    Returns:
+        ``(C, N)`` overall signals clipped to [-1, 1].
+    """
+
+    cuts, weights = candidates.cuts, candidates.weights
+    w = weights / weights.sum(axis=2, keepdims=True)
+    regime = (vol >= cuts[:, :1]).astype(np.intp) + (vol >= cuts[:, 1:])
+    overall = np.zeros(regime.shape)
+    for j in range(3):
+        overall += np.take_along_axis(w[:, :, j], regime, axis=1) * signals[:, j]
+    return np.clip(overall, -1.0, 1.0, out=overall)
+
+
+def _evaluate_chunk(
+    signals: LevelSignals, candidates: Candidates, objective: str
+) -> np.ndarray:
+    ok = np.isfinite(signals.target)
+    r = signals.target[ok]
+    overall = blend(signals.signals[ok], signals.vol[ok], candidates)
+    if objective == "ic":
+        x = overall - overall.mean(axis=1, keepdims=True)
+        y = r - r.mean()
+        den = np.sqrt((x * x).sum(axis=1) * (y @ y))
+        ic = np.divide(x @ y, den, out=np.full(len(x), -np.inf), where=den > 0)
+        return cast(np.ndarray, ic)
+    if objective == "hit_rate":
+        signed = (overall != 0) & (r != 0)
+        hits = (np.sign(overall) == np.sign(r)) & signed
+        n = signed.sum(axis=1)
+        undefined = np.full(len(n), -np.inf)
+        rate = np.divide(hits.sum(axis=1), n, out=undefined, where=n > 0)
+        return cast(np.ndarray, rate)
+    pnl = overall * r
+    std = pnl.std(axis=1, ddof=1) if pnl.shape[1] > 1 else np.zeros(len(pnl))
+    sharpe = np.divide(
+        pnl.mean(axis=1), std, out=np.full(len(std), -np.inf), where=std > 0
+    )
+    return cast(np.ndarray, sharpe)
+
+
+def evaluate(
+    signals: LevelSignals,
+    candidates: Candidates,
+    objective: str = "ic",
+    *,
+    workers: int = 1,
+    chunk_elements: int = CHUNK_ELEMENTS,
+) -> np.ndarray:
+    """Score every candidate; higher is better.
+
+    Args:
+        signals: Cached router inputs.
+        candidates: Configurations to score.
+        objective: One of :data:`OBJECTIVES`.
+        workers: Worker processes; ``1`` evaluates in this process.
+        chunk_elements: Candidate x row elements per chunk.
+
+    Returns:
+        ``(C,)`` objective values; ``-inf`` where undefined.
+
+    Raises:
+        ValueError: If ``objective`` is unknown or no row has a target.
+    """
+
+    if objective not in OBJECTIVES:
+        raise ValueError("'objective' must be one of: " + ", ".join(OBJECTIVES))
+    rows = int(np.isfinite(signals.target).sum())
+    if not rows:
+        raise ValueError("no rows with a finite target")
+    size = max(1, chunk_elements // rows)
+    bounds = range(0, len(candidates), size)
+    chunks = [
+        Candidates(candidates.cuts[i : i + size], candidates.weights[i : i + size])
+        for i in bounds
+    ]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_evaluate_chunk, signals, chunk, objective)
+                for chunk in chunks
+            ]
+            parts = [f.result() for f in futures]
+    else:
+        parts = [_evaluate_chunk(signals, chunk, objective) for chunk in chunks]
+    return np.concatenate(parts) if parts else np.zeros(0)
+
+
+def search(
+    signals: LevelSignals,
+    candidates: Candidates,
+    objective: str = "ic",
+    *,
+    top: int = 10,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """Rank the candidates by :func:`evaluate`.
+
+    Returns:
+        The ``top`` configurations, best first, each with its ``rank``,
+        ``objective`` and ``score`` plus the router config fields.
+
+    Raises:
+        ValueError: If ``top`` is not positive, or as :func:`evaluate`.
+    """
+
+    if top < 1:
+        raise ValueError("top must be positive")
+    scores = evaluate(signals, candidates, objective, workers=workers)
+    order = np.argsort(-scores, kind="stable")[:top]
+    return [
+        {
+            "rank": r + 1,
+            "objective": objective,
+            "score": float(scores[i]),
+            **candidates.config(int(i)),
+        }
+        for r, i in enumerate(order.tolist())
+    ]
+
+
+def write_router_config(path: str | Path, result: Dict[str, Any]) -> None:
+    """Write a :func:`search` result as a versioned router config file."""
+
+    doc = {
+        "version": CONFIG_VERSION,
+        "router_cuts": result["router_cuts"],
+        "router_level_weights": result["router_level_weights"],
+        "objective": result.get("objective"),
+        "score": result.get("score"),
+    }
+    write_output(doc, path, atomic=True)
+
+
+def current_candidate() -> Candidates:
+    """The configured router as a single candidate."""
+
+    weights = [
+        [config.ROUTER_LEVEL_WEIGHTS[regime][k] for k in ("L1", "L2", "L3")]
+        for regime in ROUTER_REGIMES
+    ]
+    return Candidates(
+        np.array([config.ROUTER_CUTS], dtype=float), np.array([weights], dtype=float)
+    )
+
+
+__all__ = [
+    "OBJECTIVES",
+    "LevelSignals",
+    "Candidates",
+    "signals_from_payloads",
+    "signals_from_bars",
+    "signals_meta",
+    "bars_fingerprint",
+    "simplex",
+    "candidate_grid",
+    "current_candidate",
+    "blend",
+    "evaluate",
+    "search",
+    "write_router_config",
+]
@@ -1,18 +1,55 @@
 from __future__ import annotations
 
 import datetime as dt
+import math
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Sequence,
+    overload,
+)
 
+import numpy as np
+
+from btcmi import batch
 from btcmi import engine_v1 as v1
 from btcmi import engine_v2 as v2
 from btcmi import engine_nf3p as nf3p
+from btcmi import plans
+from btcmi.bars import Bars, parse_window, resample_many
+from btcmi.cache import ResultCache
 from btcmi.enums import Scenario, Window
 from btcmi.io import write_output as write_output  # noqa: F401
+from btcmi.nagr_graph import NodeGraph
+from btcmi.nodesets import NodeSet
+from btcmi.ohlcv import FeatureWindows, OHLCVFeatures, build_features
+from btcmi.utils import is_number
+from btcmi.vol_regime import VolRegimeEstimator
+
+LAYOUTS = ("records", "columns")
+_ITEM_ERRORS = (ArithmeticError, AttributeError, KeyError, TypeError, ValueError)
+
+# Validated (scenario, window) pairs keyed by their raw payload values.  Only
+# enumerated windows are memoized, which bounds the cache by the enum sizes.
+_SCENARIO_WINDOW_CACHE: dict[tuple[Any, Any], tuple[Scenario, Window | str]] = {}
 
 
-def _validate_scenario_window(data: dict[str, Any]) -> tuple[Scenario, Window]:
-    """Return the scenario and window ensuring both are valid."""
+def _validate_scenario_window(
+    data: dict[str, Any],
+) -> tuple[Scenario, Window | str]:
+    """Return the scenario and window ensuring both are valid.
+
+    Enumerated windows come back as :class:`Window` members; any other
+    window matching the input schema's ``N(m|h|d)`` pattern is returned
+    unchanged.
+    """
 
     scenario = data.get("scenario")
     if scenario is None:
@@ -28,53 +65,93 @@ def _validate_scenario_window(data: dict[str, Any]) -> tuple[Scenario, Window]:
     window = data.get("window")
     if window is None:
         raise ValueError("'window' field is required")
+    if isinstance(window, Window):
+        return scenario_enum, window
     try:
-        window_enum = window if isinstance(window, Window) else Window(window)
-    except ValueError as exc:  # pragma: no cover - defensive
-        allowed = ", ".join(sorted(w.value for w in Window))
-        raise ValueError("'window' must be one of: " + allowed) from exc
-    return scenario_enum, window_enum
+        return scenario_enum, Window(window)
+    except ValueError:
+        pass
+    try:
+        parse_window(window)
+    except ValueError as exc:
+        raise ValueError("'window' must match N(m|h|d), e.g. 5m, 4h or 1d") from exc
+    return scenario_enum, window
 
 
-def run_v1(
+def _window_value(window: Window | str) -> str:
+    return window.value if isinstance(window, Window) else window
+
+
+def _cached_scenario_window(
     data: dict[str, Any],
-    fixed_ts: str | None,
-    out_path: str | Path | None = None,
-) -> dict[str, Any]:
-    """Run the v1 engine and optionally persist the output.
+) -> tuple[Scenario, Window | str]:
+    """Memoized :func:`_validate_scenario_window` for batch runs.
 
-    Parameters
-    ----------
-    data:
-        Input payload conforming to the input schema.
-    fixed_ts:
-        Timestamp used for the ``asof`` field.  When ``None`` the current
-        UTC time is used.
-    out_path:
-        Optional path where the rendered JSON output should be written.  When
-        ``None`` (the default) the output is only returned and no file is
-        created.
+    Windows outside :class:`Window` are validated on every call so arbitrary
+    client-supplied windows cannot grow the cache.
     """
-    scenario, window = _validate_scenario_window(data)
-    feats: Dict[str, float] = data.get("features", {})
-    norm = v1.normalize(feats)
-    base_res = v1.base_signal(scenario.value, norm)
-    ng = v1.nagr_score(data.get("nagr_nodes", []))
-    overall = v1.combine(base_res.score, ng)
-    comp = v1.completeness(feats)
+
+    key = (data.get("scenario"), data.get("window"))
+    try:
+        return _SCENARIO_WINDOW_CACHE[key]
+    except (KeyError, TypeError):
+        pass
+    res = _validate_scenario_window(data)
+    if isinstance(res[1], Window):
+        _SCENARIO_WINDOW_CACHE[key] = res
+    return res
+
+
+def _asof(fixed_ts: str | None) -> str:
+    return fixed_ts or dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+
+def _vol_regime_pctl(data: dict[str, Any]) -> float:
+    try:
+        vol_pctl = float(data.get("vol_regime_pctl", 0.5))
+    except (TypeError, ValueError) as exc:
+        raise ValueError("'vol_regime_pctl' must be a number in [0, 1]") from exc
+    if not 0.0 <= vol_pctl <= 1.0:
+        raise ValueError("'vol_regime_pctl' must be a number in [0, 1]")
+    return vol_pctl
+
+
+def _nagr_notes(data: dict[str, Any], notes: list[str]) -> list[str]:
+    """Diagnostics notes: ``notes`` plus NAGR propagation and vol estimates."""
+    extra: list[str] = []
+    nodes = data.get("nagr_nodes")
+    if isinstance(nodes, (NodeSet, NodeGraph)):
+        extra += nodes.diagnostics()
+    vol = data.get("vol_regime_pctl")
+    if isinstance(vol, VolRegimeEstimator):
+        extra += vol.diagnostics()
+    return notes + extra if extra else notes
+
+
+def _v1_output(
+    data: dict[str, Any],
+    scenario: Scenario,
+    window: Window | str,
+    asof: str,
+    norm: Dict[str, float],
+    weights: Mapping[str, float],
+    contributions: Dict[str, float],
+    ng: float,
+    overall: float,
+    comp: float,
+) -> dict[str, Any]:
     conf = round(0.5 + 0.5 * comp, 3)
     notes: list[str] = []
     constraints = False
     if comp < 0.6:
         notes.append("low_feature_completeness")
-    asof = fixed_ts or dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    out: dict[str, Any] = {
+    return {
         "schema_version": data.get("schema_version", "2.0.0"),
         "lineage": data.get("lineage", {}),
         "asof": asof,
         "summary": {
             "scenario": scenario.value,
-            "window": window.value,
+            "window": _window_value(window),
             "overall_signal": round(overall, 6),
             "confidence": conf,
             "router_path": f"{scenario.value}/v1",
@@ -83,57 +160,85 @@ def run_v1(
         },
         "details": {
             "normalized_features": {k: round(v, 6) for k, v in norm.items()},
-            "weights": base_res.weights,
+            "weights": weights,
+            "contributions": {k: round(v, 6) for k, v in contributions.items()},
+            "constraints_applied": constraints,
+            "diagnostics": {
+                "completeness": round(comp, 3),
+                "notes": _nagr_notes(data, notes),
+            },
+        },
+    }
+
+
+def _v1_all_output(
+    data: dict[str, Any],
+    window: Window | str,
+    asof: str,
+    norm: Dict[str, float],
+    scores: Dict[str, tuple[float, Dict[str, float]]],
+    ng: float,
+    comp: float,
+) -> dict[str, Any]:
+    conf = round(0.5 + 0.5 * comp, 3)
+    notes: list[str] = []
+    if comp < 0.6:
+        notes.append("low_feature_completeness")
+    return {
+        "schema_version": data.get("schema_version", "2.0.0"),
+        "lineage": data.get("lineage", {}),
+        "asof": asof,
+        "summaries": {
+            name: {
+                "scenario": name,
+                "window": _window_value(window),
+                "overall_signal": round(overall, 6),
+                "confidence": conf,
+                "router_path": f"{name}/v1",
+                "nagr_score": round(ng, 6),
+                "advisories": notes,
+            }
+            for name, (overall, _) in scores.items()
+        },
+        "details": {
+            "normalized_features": {k: round(v, 6) for k, v in norm.items()},
+            "weights": {name: plans.SCENARIO_PLANS[name].weight_map for name in scores},
             "contributions": {
-                k: round(v, 6) for k, v in base_res.contributions.items()
+                name: {k: round(v, 6) for k, v in contrib.items()}
+                for name, (_, contrib) in scores.items()
+            },
+            "constraints_applied": False,
+            "diagnostics": {
+                "completeness": round(comp, 3),
+                "notes": _nagr_notes(data, notes),
             },
-            "constraints_applied": constraints,
-            "diagnostics": {"completeness": round(comp, 3), "notes": notes},
         },
     }
-    if out_path is not None:
-        write_output(out, out_path)
-    return out
 
 
-def run_v2(
+def _v2_output(
     data: dict[str, Any],
-    fixed_ts: str | None,
-    out_path: str | Path | None = None,
+    scenario: Scenario,
+    window: Window | str,
+    asof: str,
+    layers: tuple[Dict[str, float], Dict[str, float], Dict[str, float]],
+    signals: tuple[float, float, float],
+    regime: str,
+    alphas: Dict[str, float],
+    overall: float,
 ) -> dict[str, Any]:
-    """Run the v2 fractal engine and optionally persist the output."""
-    scenario, window = _validate_scenario_window(data)
-    f1 = data.get("features_micro", {})
-    f2 = data.get("features_mezo", {})
-    f3 = data.get("features_macro", {})
-    try:
-        vol_pctl = float(data.get("vol_regime_pctl", 0.5))
-    except (TypeError, ValueError) as exc:
-        raise ValueError("'vol_regime_pctl' must be a number in [0, 1]") from exc
-    if not 0.0 <= vol_pctl <= 1.0:
-        raise ValueError("'vol_regime_pctl' must be a number in [0, 1]")
-    n1 = v2.normalize_layer(f1, v2.SCALES["L1"])
-    n2 = v2.normalize_layer(f2, v2.SCALES["L2"])
-    n3 = v2.normalize_layer(f3, v2.SCALES["L3"])
-    w1 = v2.layer_equal_weights(n1)
-    w2 = v2.layer_equal_weights(n2)
-    w3 = v2.layer_equal_weights(n3)
-    s1, _ = v2.level_signal(n1, w1, data.get("nagr_nodes", []))
-    s2, _ = v2.level_signal(n2, w2, data.get("nagr_nodes", []))
-    s3, _ = v2.level_signal(n3, w3, data.get("nagr_nodes", []))
-    regime, alphas = v2.router_weights(vol_pctl)
-    overall = v2.combine_levels(s1, s2, s3, alphas)
-    coverage = sum(len(x) > 0 for x in [n1, n2, n3]) / 3.0
+    n1, n2, n3 = layers
+    s1, s2, s3 = signals
+    coverage = sum(len(x) > 0 for x in layers) / 3.0
     conf = round(0.5 + 0.5 * min(coverage, 1.0), 3)
     notes: list[str] = []
-    asof = fixed_ts or dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    out: dict[str, Any] = {
+    return {
         "schema_version": data.get("schema_version", "2.0.0"),
         "lineage": data.get("lineage", {}),
         "asof": asof,
         "summary": {
             "scenario": scenario.value,
-            "window": window.value,
+            "window": _window_value(window),
             "overall_signal": round(overall, 6),
             "confidence": conf,
             "router_path": f"{scenario.value}/v2.fractal",
@@ -149,38 +254,847 @@ def run_v2(
             "normalized_mezo": {k: round(v, 6) for k, v in n2.items()},
             "normalized_macro": {k: round(v, 6) for k, v in n3.items()},
             "router_regime": regime,
-            "diagnostics": {"completeness": round(coverage, 3), "notes": notes},
+            "diagnostics": {
+                "completeness": round(coverage, 3),
+                "notes": _nagr_notes(data, notes),
+            },
         },
     }
+
+
+def _nf3p_output(
+    data: dict[str, Any],
+    scenario: Scenario,
+    window: Window | str,
+    asof: str,
+    predictions: Dict[str, float],
+    backtest: Dict[str, float],
+) -> dict[str, Any]:
+    return {
+        "schema_version": data.get("schema_version", "2.0.0"),
+        "lineage": data.get("lineage", {}),
+        "asof": asof,
+        "scenario": scenario.value,
+        "window": _window_value(window),
+        "predictions": predictions,
+        "backtest": backtest,
+    }
+
+
+def _score_v1(
+    data: dict[str, Any], scenario: Scenario, window: Window | str, asof: str
+) -> dict[str, Any]:
+    feats: Dict[str, float] = data.get("features", {})
+    norm = v1.normalize(feats)
+    base_res = v1.base_signal(scenario.value, norm)
+    ng = v1.nagr_score(data.get("nagr_nodes", []))
+    overall = v1.combine(base_res.score, ng)
+    comp = v1.completeness(feats)
+    return _v1_output(
+        data,
+        scenario,
+        window,
+        asof,
+        norm,
+        base_res.weights,
+        base_res.contributions,
+        ng,
+        overall,
+        comp,
+    )
+
+
+_LEVELS = ("L1", "L2", "L3")
+
+Layers = tuple[
+    tuple[Dict[str, float], Dict[str, float], Dict[str, float]],
+    tuple[float, float, float],
+]
+
+
+def _layers(data: dict[str, Any]) -> Layers:
+    """Normalized v2 layers and their equal-weight scores."""
+    norms = v2.normalize_levels(
+        data.get("features_micro", {}),
+        data.get("features_mezo", {}),
+        data.get("features_macro", {}),
+    )
+    e1, e2, e3 = (v2.equal_weight_score(lv, n) for lv, n in zip(_LEVELS, norms))
+    return norms, (e1, e2, e3)
+
+
+def _score_v2(
+    data: dict[str, Any],
+    scenario: Scenario,
+    window: Window | str,
+    asof: str,
+    layers: Layers | None = None,
+) -> dict[str, Any]:
+    vol_pctl = _vol_regime_pctl(data)
+    norms, (e1, e2, e3) = layers or _layers(data)
+    ng = v2.nagr(data.get("nagr_nodes", []))
+    s1 = 0.8 * e1 + 0.2 * ng
+    s2 = 0.8 * e2 + 0.2 * ng
+    s3 = 0.8 * e3 + 0.2 * ng
+    regime, alphas = v2.router_weights(vol_pctl)
+    overall = v2.combine_levels(s1, s2, s3, alphas)
+    return _v2_output(
+        data,
+        scenario,
+        window,
+        asof,
+        norms,
+        (s1, s2, s3),
+        regime,
+        alphas,
+        overall,
+    )
+
+
+def _score_nf3p(
+    data: dict[str, Any],
+    scenario: Scenario,
+    window: Window | str,
+    asof: str,
+    layers: Layers | None = None,
+) -> dict[str, Any]:
+    _, scores = layers or _layers(data)
+    predictions, backtest = nf3p.summarize_predictions(*scores)
+    return _nf3p_output(data, scenario, window, asof, predictions, backtest)
+
+
+_SCORERS: Dict[str, Callable[..., dict[str, Any]]] = {
+    "v1": _score_v1,
+    "v2.fractal": _score_v2,
+    "v2.nf3p": _score_nf3p,
+}
+
+
+def _run(
+    mode: str,
+    score: Callable[[dict[str, Any], Scenario, Window | str, str], dict[str, Any]],
+    data: dict[str, Any],
+    fixed_ts: str | None,
+    out_path: str | Path | None,
+    cache: ResultCache | None,
+) -> dict[str, Any]:
+    scenario, window = _validate_scenario_window(data)
+    asof = _asof(fixed_ts)
+    if cache is None:
+        out = score(data, scenario, window, asof)
+    else:
+        out = cache.lookup(
+            mode, data, asof, lambda: score(data, scenario, window, asof)
+        )
     if out_path is not None:
         write_output(out, out_path)
     return out
 
 
+def run_v1(
+    data: dict[str, Any],
+    fixed_ts: str | None,
+    out_path: str | Path | None = None,
+    *,
+    cache: ResultCache | None = None,
+) -> dict[str, Any]:
+    """Run the v1 engine and optionally persist the output.
+
+    Parameters
+    ----------
+    data:
+        Input payload conforming to the input schema.
+    fixed_ts:
+        Timestamp used for the ``asof`` field.  When ``None`` the current
+        UTC time is used.
+    out_path:
+        Optional path where the rendered JSON output should be written.  When
+        ``None`` (the default) the output is only returned and no file is
+        created.
+    cache:
+        Optional :class:`~btcmi.cache.ResultCache` memoizing outputs of
+        identical payloads.
+    """
+    return _run("v1", _score_v1, data, fixed_ts, out_path, cache)
+
+
+def run_v2(
+    data: dict[str, Any],
+    fixed_ts: str | None,
+    out_path: str | Path | None = None,
+    *,
+    cache: ResultCache | None = None,
+) -> dict[str, Any]:
+    """Run the v2 fractal engine and optionally persist the output."""
+    return _run("v2.fractal", _score_v2, data, fixed_ts, out_path, cache)
+
+
 def run_nf3p(
     data: dict[str, Any],
     fixed_ts: str | None,
     out_path: str | Path | None = None,
+    *,
+    cache: ResultCache | None = None,
 ) -> dict[str, Any]:  # noqa: D401 - short wrapper
     """Run the NF3P engine and optionally persist the output."""
+    return _run("v2.nf3p", _score_nf3p, data, fixed_ts, out_path, cache)
+
+
+def run_v1_all(
+    data: dict[str, Any],
+    fixed_ts: str | None,
+    out_path: str | Path | None = None,
+) -> dict[str, Any]:
+    """Score a v1 payload under every scenario in one pass.
+
+    Features are normalized once and all scenario weight profiles are applied
+    through :func:`btcmi.batch.scenario_matrix`.  The output holds one summary
+    per scenario under ``summaries`` and shared ``details`` whose ``weights``
+    and ``contributions`` are keyed by scenario; each summary equals the one
+    :func:`run_v1` returns for that scenario.
+    """
+    _, window = _validate_scenario_window(data)
+    feats: Dict[str, float] = data.get("features", {})
+    norm = v1.normalize(feats)
+    ng = v1.nagr_score(data.get("nagr_nodes", []))
+    comp = v1.completeness(feats)
+    mat = batch.scenario_matrix()
+    x = np.array([[norm.get(k, 0.0) for k in mat.columns]])
+    present = np.array([[k in norm for k in mat.columns]])
+    score, contrib = mat.score(x, present)
+    scores: Dict[str, tuple[float, Dict[str, float]]] = {}
+    for i, (name, row) in enumerate(zip(mat.scenarios, contrib[0].tolist())):
+        features = plans.SCENARIO_PLANS[name].features
+        scores[name] = (
+            v1.combine(float(score[0, i]), ng),
+            {k: c for k, c in zip(features, row) if k in norm},
+        )
+    out = _v1_all_output(data, window, _asof(fixed_ts), norm, scores, ng, comp)
+    if out_path is not None:
+        write_output(out, out_path)
+    return out
+
+
+def run_multi(
+    data: dict[str, Any],
+    fixed_ts: str | None,
+    modes: Sequence[str],
+    out_path: str | Path | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Run several engine modes on one payload, sharing common work.
+
+    The v2 layers are normalized and scored once and reused by both
+    ``v2.fractal`` and ``v2.nf3p``; every output shares the same ``asof``.
+
+    Parameters
+    ----------
+    data:
+        Input payload conforming to the input schema for each mode.
+    fixed_ts:
+        Timestamp used for the ``asof`` field.
+    modes:
+        Engine modes to run; duplicates are ignored.
+    out_path:
+        Optional path where the ``{mode: output}`` mapping is written.
+
+    Returns
+    -------
+    dict
+        One output per requested mode, in request order.
+    """
+    unknown = [m for m in modes if m not in _SCORERS]
+    if unknown:
+        raise ValueError("unknown mode: " + ", ".join(map(str, unknown)))
+    if not modes:
+        raise ValueError("at least one mode is required")
     scenario, window = _validate_scenario_window(data)
-    f1 = data.get("features_micro", {})
-    f2 = data.get("features_mezo", {})
-    f3 = data.get("features_macro", {})
-    predictions, backtest = nf3p.predictions_and_backtest(f1, f2, f3)
-    asof = fixed_ts or dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    out: dict[str, Any] = {
-        "schema_version": data.get("schema_version", "2.0.0"),
-        "lineage": data.get("lineage", {}),
-        "asof": asof,
-        "scenario": scenario.value,
-        "window": window.value,
-        "predictions": predictions,
-        "backtest": backtest,
-    }
+    asof = _asof(fixed_ts)
+    layers = _layers(data) if any(m != "v1" for m in modes) else None
+    out: dict[str, dict[str, Any]] = {}
+    for m in dict.fromkeys(modes):
+        if m == "v1":
+            out[m] = _score_v1(data, scenario, window, asof)
+        else:
+            out[m] = _SCORERS[m](data, scenario, window, asof, layers)
+    if out_path is not None:
+        write_output(out, out_path)
+    return out
+
+
+def run_windows(
+    bars: Bars,
+    windows: Sequence[Window | str],
+    base: dict[str, Any],
+    fixed_ts: str | None = None,
+    *,
+    feature_windows: FeatureWindows | Mapping[str, FeatureWindows] | None = None,
+    out_path: str | Path | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Score the latest bar of one OHLCV series at several windows.
+
+    The series is resampled once per window through
+    :func:`btcmi.bars.resample_many`, which derives longer windows from
+    shorter ones; each window's features come from
+    :func:`btcmi.ohlcv.build_features` and all windows are scored in a
+    single :func:`run_v2_batch` call.
+
+    Parameters
+    ----------
+    bars:
+        Base series, typically minute bars from :func:`btcmi.bars.open_bars`.
+    windows:
+        Windows to score; duplicates are ignored.
+    base:
+        Payload fields shared by every window, such as ``schema_version``,
+        ``lineage`` and ``scenario``; ``window`` and the feature blocks are
+        filled in per window.
+    fixed_ts:
+        Timestamp used for the ``asof`` field.
+    feature_windows:
+        Layer lookbacks in bars of each window, either shared or keyed by
+        window string.  Windows without an entry use
+        :meth:`FeatureWindows.for_bar_seconds` of their length, so every
+        window looks back over the same hour, day and thirty days.
+    out_path:
+        Optional path where the ``{window: output}`` mapping is written.
+
+    Returns
+    -------
+    dict
+        One :func:`run_v2` output per window, in request order.  Any
+        ``N(m|h|d)`` window is scored; a window without bars maps to an error
+        record.
+    """
+    if not windows:
+        raise ValueError("at least one window is required")
+    resampled = resample_many(bars, windows)
+    payloads: List[dict[str, Any]] = []
+    empty: List[str] = []
+    for key, series in resampled.items():
+        if not len(series):
+            empty.append(key)
+            continue
+        if isinstance(feature_windows, FeatureWindows):
+            fw = feature_windows
+        elif feature_windows is not None and key in feature_windows:
+            fw = feature_windows[key]
+        else:
+            fw = FeatureWindows.for_bar_seconds(parse_window(key))
+        last = series.between(series.timestamps[-1])
+        feats = build_features(series.columns, fw, start=len(series) - 1)
+        stamped = OHLCVFeatures(feats.index, last.iso_timestamps(), feats.layers)
+        payloads.append(next(stamped.payloads(dict(base, window=key))))
+    scored = iter(run_v2_batch(payloads, fixed_ts))
+    out: dict[str, dict[str, Any]] = {}
+    for key in resampled:
+        if key in empty:
+            out[key] = _item_error(f"no bars for window {key}")
+        else:
+            out[key] = next(scored)
     if out_path is not None:
         write_output(out, out_path)
     return out
 
 
-__all__ = ["run_v1", "run_v2", "run_nf3p"]
+@dataclass
+class ColumnarBatch:
+    """Compact result of a batch run.
+
+    Attributes:
+        mode: Engine mode that produced the batch.
+        asof: Timestamp shared by every item.
+        index: Input positions of the successfully scored items.
+        columns: Per-item values aligned with ``index``.  Numeric columns are
+            unrounded ``float64`` arrays; ``scenario``, ``window`` and
+            ``router_regime`` are lists of strings.
+        errors: Error message for each failed input position.
+    """
+
+    mode: str
+    asof: str
+    index: np.ndarray
+    columns: Dict[str, Any]
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return int(self.index.shape[0])
+
+
+def _item_error(message: str) -> dict[str, Any]:
+    return {"error": "runner_error", "message": message}
+
+
+def _check_layout(layout: str) -> None:
+    if layout not in LAYOUTS:
+        raise ValueError("'layout' must be one of: " + ", ".join(LAYOUTS))
+
+
+def _mapping(data: dict[str, Any], key: str) -> dict[str, Any]:
+    value = data.get(key, {})
+    if not isinstance(value, dict):
+        raise ValueError(f"'{key}' must be an object")
+    return value
+
+
+def _finish(
+    mode: str,
+    asof: str,
+    layout: str,
+    records: List[Any],
+    errors: Dict[int, str],
+    parts: List[tuple[np.ndarray, Dict[str, Any]]],
+) -> List[dict[str, Any]] | ColumnarBatch:
+    if layout == "records":
+        for i, msg in errors.items():
+            records[i] = _item_error(msg)
+        return records
+    if not parts:
+        return ColumnarBatch(mode, asof, np.zeros(0, dtype=np.intp), {}, errors)
+    index = np.concatenate([p[0] for p in parts])
+    order = np.argsort(index, kind="stable")
+    columns: Dict[str, Any] = {}
+    for key, first in parts[0][1].items():
+        if isinstance(first, np.ndarray):
+            columns[key] = np.concatenate([p[1][key] for p in parts])[order]
+        else:
+            merged = [v for p in parts for v in p[1][key]]
+            columns[key] = [merged[j] for j in order.tolist()]
+    return ColumnarBatch(mode, asof, index[order], columns, errors)
+
+
+def _score_groups(
+    score: Callable[[List[int]], None], idx: List[int], errors: Dict[int, str]
+) -> None:
+    # Score a whole group at once; if that fails, retry one item at a time so
+    # a single bad payload (for instance an integer too large for float64)
+    # does not fail its neighbours.
+    try:
+        score(idx)
+        return
+    except _ITEM_ERRORS as exc:
+        if len(idx) == 1:
+            errors[idx[0]] = str(exc)
+            return
+    for i in idx:
+        try:
+            score([i])
+        except _ITEM_ERRORS as exc:
+            errors[i] = str(exc)
+
+
+def run_v1_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    layout: str = "records",
+) -> List[dict[str, Any]] | ColumnarBatch:
+    """Run the v1 engine over many payloads.
+
+    Payloads are grouped by scenario and each group is scored with the
+    vectorized engine in :mod:`btcmi.batch`.  Invalid items fail individually.
+
+    Parameters
+    ----------
+    payloads:
+        Input payloads conforming to the input schema.
+    fixed_ts:
+        Timestamp used for every ``asof`` field.  When ``None`` the current
+        UTC time is taken once for the whole batch.
+    layout:
+        ``"records"`` (default) returns a list aligned with ``payloads``
+        holding the :func:`run_v1` output, or an ``{"error", "message"}``
+        dict for items that failed.  ``"columns"`` returns a
+        :class:`ColumnarBatch`.
+    """
+    _check_layout(layout)
+    items = list(payloads)
+    asof = _asof(fixed_ts)
+    records: List[Any] = [None] * len(items)
+    errors: Dict[int, str] = {}
+    parts: List[tuple[np.ndarray, Dict[str, Any]]] = []
+    prepared: Dict[int, tuple[Scenario, Window | str, dict[str, Any], float]] = {}
+    groups: Dict[Scenario, List[int]] = {}
+    for i, data in enumerate(items):
+        try:
+            scenario, window = _cached_scenario_window(data)
+            feats = _mapping(data, "features")
+            ng = v1.nagr_score(data.get("nagr_nodes", []))
+        except _ITEM_ERRORS as exc:
+            errors[i] = str(exc)
+            continue
+        prepared[i] = (scenario, window, feats, ng)
+        groups.setdefault(scenario, []).append(i)
+
+    norm_plan = plans.V1_NORM
+    n_expected = len(norm_plan.features)
+
+    def score_group(scenario: Scenario, idx: List[int]) -> None:
+        plan = plans.SCENARIO_PLANS[scenario.value]
+        cols = norm_plan.features + tuple(
+            k for k in plan.features if k not in norm_plan.feature_set
+        )
+        fm = batch.feature_matrix([prepared[i][2] for i in idx], cols)
+        res = batch.score_matrix(fm, norm_plan.scale_map, plan.weight_map)
+        ng = np.array([prepared[i][3] for i in idx], dtype=float)
+        overall = batch.clip_unit(0.7 * res.score + 0.3 * ng)
+        if n_expected:
+            comp = fm.mask[:, :n_expected].sum(axis=1) / n_expected
+        else:
+            comp = np.ones(len(idx))
+        if layout == "columns":
+            parts.append(
+                (
+                    np.array(idx, dtype=np.intp),
+                    {
+                        "scenario": [scenario.value] * len(idx),
+                        "window": [_window_value(prepared[i][1]) for i in idx],
+                        "overall_signal": overall,
+                        "confidence": 0.5 + 0.5 * comp,
+                        "nagr_score": ng,
+                        "base_score": res.score,
+                        "completeness": comp,
+                    },
+                )
+            )
+            return
+        col_index = {k: j for j, k in enumerate(cols)}
+        weighted = [(k, col_index[k]) for k in plan.features]
+        rows = zip(
+            idx,
+            res.normalized.tolist(),
+            fm.mask.tolist(),
+            res.contributions.tolist(),
+            overall.tolist(),
+            comp.tolist(),
+        )
+        for i, norm_row, mask_row, contrib_row, ov, cp in rows:
+            _, window, feats, ng_i = prepared[i]
+            norm: Dict[str, float] = {}
+            for k, v in feats.items():
+                j = col_index.get(k)
+                if j is not None:
+                    if mask_row[j]:
+                        norm[k] = norm_row[j]
+                elif is_number(v):
+                    norm[k] = math.tanh(v / 1.0)
+            contrib = {k: contrib_row[j] for k, j in weighted if mask_row[j]}
+            records[i] = _v1_output(
+                items[i],
+                scenario,
+                window,
+                asof,
+                norm,
+                plan.weight_map,
+                contrib,
+                ng_i,
+                ov,
+                cp,
+            )
+
+    for scenario, idx in groups.items():
+        _score_groups(lambda sub: score_group(scenario, sub), idx, errors)
+    return _finish("v1", asof, layout, records, errors, parts)
+
+
+def _layer_batch(
+    level: str, rows: Sequence[dict[str, Any]], want_dicts: bool
+) -> tuple[np.ndarray, np.ndarray, List[Dict[str, float]]]:
+    """Equal-weight scores of one layer for every row.
+
+    Rows are grouped by the key order of their feature mapping so that the
+    column order, and therefore the summation order, matches the scalar path.
+    Returns scores, the number of normalized features per row and, when
+    ``want_dicts`` is set, the normalized mappings.
+    """
+
+    plan = plans.LAYER_PLANS[level]
+    scores = np.zeros(len(rows))
+    counts = np.zeros(len(rows), dtype=np.intp)
+    dicts: List[Dict[str, float]] = [{} for _ in rows] if want_dicts else []
+    by_keys: Dict[tuple[str, ...], List[int]] = {}
+    for r, feats in enumerate(rows):
+        by_keys.setdefault(tuple(feats), []).append(r)
+    for keys, idx in by_keys.items():
+        if not keys:
+            continue
+        fm = batch.feature_matrix([rows[r] for r in idx], keys)
+        norm = batch.normalize_matrix(fm, plan.norm.scale_map)
+        score, _ = batch.equal_weight_score_matrix(
+            norm, fm.mask, plan.equal_denominator
+        )
+        scores[idx] = score
+        counts[idx] = fm.mask.sum(axis=1)
+        if want_dicts:
+            for r, norm_row, mask_row in zip(idx, norm.tolist(), fm.mask.tolist()):
+                dicts[r] = batch.row_dict(norm_row, mask_row, keys)
+    return scores, counts, dicts
+
+
+def _prepare_layers(
+    items: Sequence[Any], errors: Dict[int, str], *, with_vol: bool
+) -> Dict[int, tuple[Any, ...]]:
+    prepared: Dict[int, tuple[Any, ...]] = {}
+    for i, data in enumerate(items):
+        try:
+            scenario, window = _cached_scenario_window(data)
+            layers = tuple(
+                _mapping(data, k)
+                for k in ("features_micro", "features_mezo", "features_macro")
+            )
+            extra: tuple[Any, ...] = ()
+            if with_vol:
+                extra = (_vol_regime_pctl(data), v2.nagr(data.get("nagr_nodes", [])))
+        except _ITEM_ERRORS as exc:
+            errors[i] = str(exc)
+            continue
+        prepared[i] = (scenario, window, layers) + extra
+    return prepared
+
+
+def _score_layers(
+    prepared: Sequence[tuple[Any, ...]], want_dicts: bool
+) -> List[tuple[np.ndarray, np.ndarray, List[Dict[str, float]]]]:
+    return [
+        _layer_batch(level, [p[2][j] for p in prepared], want_dicts)
+        for j, level in enumerate(_LEVELS)
+    ]
+
+
+@overload
+def run_v2_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    layout: Literal["records"] = ...,
+) -> List[dict[str, Any]]: ...
+
+
+@overload
+def run_v2_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    layout: Literal["columns"],
+) -> ColumnarBatch: ...
+
+
+def run_v2_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    layout: str = "records",
+) -> List[dict[str, Any]] | ColumnarBatch:
+    """Run the v2 fractal engine over many payloads.
+
+    See :func:`run_v1_batch` for the meaning of the arguments; the records
+    layout holds :func:`run_v2` outputs.
+    """
+    _check_layout(layout)
+    items = list(payloads)
+    asof = _asof(fixed_ts)
+    records: List[Any] = [None] * len(items)
+    errors: Dict[int, str] = {}
+    parts: List[tuple[np.ndarray, Dict[str, Any]]] = []
+    prepared = _prepare_layers(items, errors, with_vol=True)
+
+    def score_group(idx: List[int]) -> None:
+        group = [prepared[i] for i in idx]
+        layers = _score_layers(group, layout == "records")
+        ng = np.array([p[4] for p in group], dtype=float)
+        s1, s2, s3 = (0.8 * base + 0.2 * ng for base, _, _ in layers)
+        vol = np.array([p[3] for p in group], dtype=float)
+        regime_idx, alphas = batch.router_matrix(vol)
+        overall = batch.combine_levels_matrix(s1, s2, s3, alphas)
+        if layout == "columns":
+            coverage = sum((counts > 0).astype(int) for _, counts, _ in layers) / 3.0
+            parts.append(
+                (
+                    np.array(idx, dtype=np.intp),
+                    {
+                        "scenario": [p[0].value for p in group],
+                        "window": [_window_value(p[1]) for p in group],
+                        "overall_signal": overall,
+                        "confidence": 0.5 + 0.5 * np.minimum(coverage, 1.0),
+                        "overall_signal_L1": s1,
+                        "overall_signal_L2": s2,
+                        "overall_signal_L3": s3,
+                        "router_regime": [
+                            v2.ROUTER_REGIMES[k] for k in regime_idx.tolist()
+                        ],
+                        "completeness": coverage,
+                    },
+                )
+            )
+            return
+        d1, d2, d3 = (dicts for _, _, dicts in layers)
+        rows = zip(idx, group, s1.tolist(), s2.tolist(), s3.tolist(), overall.tolist())
+        for r, (i, p, a, b, c, ov) in enumerate(rows):
+            regime, alpha = v2.router_weights(p[3])
+            records[i] = _v2_output(
+                items[i],
+                p[0],
+                p[1],
+                asof,
+                (d1[r], d2[r], d3[r]),
+                (a, b, c),
+                regime,
+                alpha,
+                ov,
+            )
+
+    if prepared:
+        _score_groups(score_group, list(prepared), errors)
+    return _finish("v2.fractal", asof, layout, records, errors, parts)
+
+
+def run_nf3p_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    layout: str = "records",
+) -> List[dict[str, Any]] | ColumnarBatch:
+    """Run the NF3P engine over many payloads.
+
+    See :func:`run_v1_batch` for the meaning of the arguments; the records
+    layout holds :func:`run_nf3p` outputs.  Columnar ``mse`` and ``mae`` are
+    computed from unrounded predictions.
+    """
+    _check_layout(layout)
+    items = list(payloads)
+    asof = _asof(fixed_ts)
+    records: List[Any] = [None] * len(items)
+    errors: Dict[int, str] = {}
+    parts: List[tuple[np.ndarray, Dict[str, Any]]] = []
+    prepared = _prepare_layers(items, errors, with_vol=False)
+
+    def score_group(idx: List[int]) -> None:
+        group = [prepared[i] for i in idx]
+        p1, p2, p3 = (base for base, _, _ in _score_layers(group, False))
+        if layout == "columns":
+            parts.append(
+                (
+                    np.array(idx, dtype=np.intp),
+                    {
+                        "scenario": [p[0].value for p in group],
+                        "window": [_window_value(p[1]) for p in group],
+                        "L1": p1,
+                        "L2": p2,
+                        "L3": p3,
+                        "mse": (p1 * p1 + p2 * p2 + p3 * p3) / 3.0,
+                        "mae": (np.abs(p1) + np.abs(p2) + np.abs(p3)) / 3.0,
+                    },
+                )
+            )
+            return
+        rows = zip(idx, group, p1.tolist(), p2.tolist(), p3.tolist())
+        for i, p, a, b, c in rows:
+            predictions, backtest = nf3p.summarize_predictions(a, b, c)
+            records[i] = _nf3p_output(items[i], p[0], p[1], asof, predictions, backtest)
+
+    if prepared:
+        _score_groups(score_group, list(prepared), errors)
+    return _finish("v2.nf3p", asof, layout, records, errors, parts)
+
+
+BATCH_RUNNERS: Dict[str, Callable[..., Any]] = {
+    "v1": run_v1_batch,
+    "v2.fractal": run_v2_batch,
+    "v2.nf3p": run_nf3p_batch,
+}
+
+
+@overload
+def run_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    mode: str | None = ...,
+    layout: Literal["records"] = ...,
+) -> List[dict[str, Any]]: ...
+
+
+@overload
+def run_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    mode: str | None = ...,
+    layout: Literal["columns"],
+) -> Dict[str, ColumnarBatch]: ...
+
+
+def run_batch(
+    payloads: Iterable[dict[str, Any]],
+    fixed_ts: str | None,
+    *,
+    mode: str | None = None,
+    layout: str = "records",
+) -> List[dict[str, Any]] | Dict[str, ColumnarBatch]:
+    """Run a mixed batch, grouping payloads by mode.
+
+    Parameters
+    ----------
+    payloads:
+        Input payloads conforming to the input schema.
+    fixed_ts:
+        Timestamp used for every ``asof`` field.
+    mode:
+        Engine mode applied to every payload.  When ``None`` each payload's
+        own ``mode`` is used, defaulting to ``"v1"``.
+    layout:
+        ``"records"`` returns one output or error dict per payload in input
+        order.  ``"columns"`` returns a :class:`ColumnarBatch` per mode whose
+        ``index`` and ``errors`` refer to positions in ``payloads``.
+    """
+    _check_layout(layout)
+    items = list(payloads)
+    asof = _asof(fixed_ts)
+    groups: Dict[str, List[int]] = {}
+    unknown: Dict[int, str] = {}
+    for i, data in enumerate(items):
+        m = mode
+        if m is None:
+            m = (data.get("mode") or "v1") if isinstance(data, dict) else "v1"
+        if not isinstance(m, str) or m not in BATCH_RUNNERS:
+            unknown[i] = f"unknown mode: {m}"
+            continue
+        groups.setdefault(m, []).append(i)
+
+    if layout == "columns":
+        out: Dict[str, ColumnarBatch] = {}
+        for m, idx in groups.items():
+            res = BATCH_RUNNERS[m]([items[i] for i in idx], asof, layout=layout)
+            res.index = np.asarray(idx, dtype=np.intp)[res.index]
+            res.errors = {idx[k]: v for k, v in res.errors.items()}
+            out[m] = res
+        if unknown:
+            out.setdefault(
+                "unknown",
+                ColumnarBatch("unknown", asof, np.zeros(0, dtype=np.intp), {}),
+            ).errors.update(unknown)
+        return out
+
+    records: List[Any] = [None] * len(items)
+    for m, idx in groups.items():
+        res = BATCH_RUNNERS[m]([items[i] for i in idx], asof)
+        for i, r in zip(idx, res):
+            records[i] = r
+    for i, msg in unknown.items():
+        records[i] = _item_error(msg)
+    return records
+
+
+__all__ = [
+    "run_v1",
+    "run_v2",
+    "run_nf3p",
+    "run_v1_all",
+    "run_multi",
+    "run_windows",
+    "run_v1_batch",
+    "run_v2_batch",
+    "run_nf3p_batch",
+    "run_batch",
+    "ColumnarBatch",
+    "BATCH_RUNNERS",
+]
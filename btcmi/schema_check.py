@@ -0,0 +1,196 @@
+"""Fast validity checks compiled from JSON schemas.
+
+:func:`compile_checker` turns a schema into a predicate that answers whether
+an instance is valid, without collecting errors.  It supports the keywords
+used by ``input_schema.json`` and ``output_schema.json`` (``type``,
+``const``, ``enum``, ``pattern``, ``minimum``, ``maximum``, ``required``,
+``properties``, ``additionalProperties``, ``items`` and ``oneOf``) with the
+semantics of ``jsonschema``'s Draft 2020-12 validator; annotation keywords
+such as ``title`` and ``format`` are ignored as they are there.  Schemas using
+anything else raise :class:`UnsupportedSchema`.
+"""
+
+from __future__ import annotations
+
+import numbers
+import re
+from typing import Any, Callable, Dict, List, Mapping
+
+Check = Callable[[Any], bool]
+
+_ANNOTATIONS = frozenset(
+    {
+        "$schema",
+        "$id",
+        "$comment",
+        "title",
+        "description",
+        "format",
+        "default",
+        "examples",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+    }
+)
+_FAST_NUMBER = frozenset({float, int})
+
+
+class UnsupportedSchema(ValueError):
+    """The schema uses a keyword :func:`compile_checker` does not implement."""
+
+
+def _is_number(x: Any) -> bool:
+    if type(x) in _FAST_NUMBER:
+        return True
+    return not isinstance(x, bool) and isinstance(x, numbers.Number)
+
+
+def _is_integer(x: Any) -> bool:
+    if isinstance(x, bool):
+        return False
+    return isinstance(x, int) or (isinstance(x, float) and x.is_integer())
+
+
+_TYPES: Dict[str, Check] = {
+    "string": lambda x: isinstance(x, str),
+    "number": _is_number,
+    "integer": _is_integer,
+    "boolean": lambda x: isinstance(x, bool),
+    "null": lambda x: x is None,
+    "object": lambda x: isinstance(x, dict),
+    "array": lambda x: isinstance(x, list),
+}
+
+
+def _always(_x: Any) -> bool:
+    return True
+
+
+def _never(_x: Any) -> bool:
+    return False
+
+
+def _string_values(values: Any, keyword: str) -> List[str]:
+    vals = values if keyword == "enum" else [values]
+    if not isinstance(vals, list) or not all(type(v) is str for v in vals):
+        raise UnsupportedSchema(f"'{keyword}' is only supported for strings")
+    return vals
+
+
+def _type_check(types: Any) -> Check:
+    names = types if isinstance(types, list) else [types]
+    try:
+        preds = [_TYPES[t] for t in names]
+    except (KeyError, TypeError) as exc:
+        raise UnsupportedSchema(f"unknown type {types!r}") from exc
+    if len(preds) == 1:
+        return preds[0]
+    return lambda x: any(p(x) for p in preds)
+
+
+def _object_check(schema: Mapping[str, Any]) -> Check | None:
+    required = tuple(schema.get("required", ()))
+    props = {k: compile_checker(v) for k, v in schema.get("properties", {}).items()}
+    extra_schema = schema.get("additionalProperties", True)
+    extra: Check | None = (
+        None if extra_schema is True else compile_checker(extra_schema)
+    )
+    if not required and not props and extra is None:
+        return None
+
+    def check(x: Any) -> bool:
+        if not isinstance(x, dict):
+            return True
+        for r in required:
+            if r not in x:
+                return False
+        for k, v in x.items():
+            sub = props.get(k)
+            if sub is None:
+                sub = extra
+                if sub is None:
+                    continue
+            if not sub(v):
+                return False
+        return True
+
+    return check
+
+
+def compile_checker(schema: Any) -> Check:
+    """Compile ``schema`` into a predicate returning True for valid instances.
+
+    Raises:
+        UnsupportedSchema: If the schema uses an unsupported keyword.
+    """
+
+    if schema is True:
+        return _always
+    if schema is False:
+        return _never
+    if not isinstance(schema, dict):
+        raise UnsupportedSchema(f"invalid schema {schema!r}")
+    known = {
+        "type",
+        "const",
+        "enum",
+        "pattern",
+        "minimum",
+        "maximum",
+        "required",
+        "properties",
+        "additionalProperties",
+        "items",
+        "oneOf",
+    }
+    unknown = set(schema) - known - _ANNOTATIONS
+    if unknown:
+        raise UnsupportedSchema("unsupported keywords: " + ", ".join(sorted(unknown)))
+
+    checks: List[Check] = []
+    if "type" in schema:
+        checks.append(_type_check(schema["type"]))
+    if "const" in schema:
+        (const,) = _string_values(schema["const"], "const")
+        checks.append(lambda x: x == const)
+    if "enum" in schema:
+        enum = tuple(_string_values(schema["enum"], "enum"))
+        checks.append(lambda x: any(x == e for e in enum))
+    if "pattern" in schema:
+        search = re.compile(schema["pattern"]).search
+        checks.append(lambda x: not isinstance(x, str) or search(x) is not None)
+    if "minimum" in schema:
+        lo = schema["minimum"]
+        checks.append(lambda x: not _is_number(x) or not x < lo)
+    if "maximum" in schema:
+        hi = schema["maximum"]
+        checks.append(lambda x: not _is_number(x) or not x > hi)
+    obj = _object_check(schema)
+    if obj is not None:
+        checks.append(obj)
+    if "items" in schema:
+        item = compile_checker(schema["items"])
+        checks.append(lambda x: not isinstance(x, list) or all(item(v) for v in x))
+    if "oneOf" in schema:
+        branches = tuple(compile_checker(s) for s in schema["oneOf"])
+        checks.append(lambda x: sum(1 for b in branches if b(x)) == 1)
+
+    if not checks:
+        return _always
+    if len(checks) == 1:
+        return checks[0]
+    first, *rest = checks
+
+    def check_all(x: Any) -> bool:
+        if not first(x):
+            return False
+        for c in rest:
+            if not c(x):
+                return False
+        return True
+
+    return check_all
+
+
+__all__ = ["UnsupportedSchema", "compile_checker"]
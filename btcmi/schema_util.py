@@ -1,6 +1,9 @@
 import json
 from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable
+
+from btcmi.schema_check import UnsupportedSchema, compile_checker
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 SCHEMA_REGISTRY = {
@@ -8,7 +11,14 @@ SCHEMA_REGISTRY = {
     "output": BASE_DIR / "output_schema.json",
 }
 
-__all__ = ["load_json", "_load_schema", "validate_json", "SCHEMA_REGISTRY"]
+__all__ = [
+    "load_json",
+    "_load_schema",
+    "_validator",
+    "_fast_checker",
+    "validate_json",
+    "SCHEMA_REGISTRY",
+]
 
 
 def load_json(path: str | Path) -> dict:
@@ -60,11 +70,47 @@ def _load_schema(schema_path: str | Path) -> dict:
     return load_json(schema_path)
 
 
+@lru_cache(maxsize=None)
+def _validator(schema_path: str | Path) -> Any:
+    """Return a cached ``Draft202012Validator`` for the schema at *schema_path*.
+
+    Raises
+    ------
+    ImportError
+        If the ``jsonschema`` package is not installed.
+    """
+
+    schema = _load_schema(schema_path)
+    try:
+        from jsonschema import Draft202012Validator
+    except ImportError as exc:  # pragma: no cover - exercised in tests
+        raise ImportError(
+            "jsonschema is required for validate_json. Install with `pip install jsonschema`."
+        ) from exc
+    return Draft202012Validator(schema)
+
+
+@lru_cache(maxsize=None)
+def _fast_checker(schema_path: str | Path) -> Callable[[Any], bool] | None:
+    """Return a compiled validity check for *schema_path*, if it supports one.
+
+    The check only answers whether an instance is valid; error messages still
+    come from ``jsonschema``.  ``None`` means the schema uses keywords that
+    :func:`btcmi.schema_check.compile_checker` does not implement.
+    """
+
+    try:
+        return compile_checker(_load_schema(schema_path))
+    except UnsupportedSchema:
+        return None
+
+
 def validate_json(data: dict, schema_path: str | Path) -> None:
     """Validate *data* against the JSON schema at *schema_path*.
 
     Requires the external ``jsonschema`` package. Install it with
-    ``pip install jsonschema``.
+    ``pip install jsonschema``.  Valid payloads are accepted by a check
+    compiled from the schema; ``jsonschema`` only runs to report errors.
 
     Parameters
     ----------
@@ -85,15 +131,14 @@ def validate_json(data: dict, schema_path: str | Path) -> None:
         If the schema file contains invalid JSON.
     """
 
-    schema = _load_schema(schema_path)
-    try:
-        from jsonschema import Draft202012Validator
-    except ImportError as exc:  # pragma: no cover - exercised in tests
-        raise ImportError(
-            "jsonschema is required for validate_json. Install with `pip install jsonschema`."
-        ) from exc
-
-    v = Draft202012Validator(schema)
+    v = _validator(schema_path)
+    check = _fast_checker(schema_path)
+    if check is not None:
+        try:
+            if check(data):
+                return
+        except Exception:  # noqa: BLE001 - fall back to the full validator
+            pass
     errors = sorted(v.iter_errors(data), key=lambda e: e.path)
     if errors:
         msgs = []
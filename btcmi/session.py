@@ -0,0 +1,322 @@
+"""Incremental v2 scoring sessions for streaming feature updates.
+
+A :class:`SignalSession` holds the normalized layers of one v2 payload
+together with a running sum of each layer's normalized values, so a delta
+such as ``{"features_micro": {"price_change_pct": 0.9}}`` re-normalizes only
+the changed features and recombines the layer and overall signals in
+O(changed features).  Results match :func:`btcmi.runner.run_v2` on the
+merged payload to within floating-point tolerance; the running sums are
+rebuilt from the layer state periodically so rounding errors do not
+accumulate.
+
+Deltas merge like JSON merge patches: a number sets a feature and ``null``
+removes it.  ``vol_regime_pctl``, ``nagr_nodes`` and ``lineage`` may be
+replaced as well.  A delta is validated and normalized in full before any of
+it is applied.
+
+:class:`SessionRegistry` closes sessions left idle for longer than its
+``idle_ttl``.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Tuple
+
+from btcmi import engine_v2 as v2
+from btcmi import plans
+from btcmi.runner import _asof, _v2_output, _validate_scenario_window, _vol_regime_pctl
+from btcmi.utils import RunningSum, is_number
+
+# Payload field of each layer, in level order.
+LAYER_FIELDS: Dict[str, str] = {
+    "features_micro": "L1",
+    "features_mezo": "L2",
+    "features_macro": "L3",
+}
+_FIELDS = frozenset(LAYER_FIELDS) | {"vol_regime_pctl", "nagr_nodes", "lineage"}
+
+
+class _Layer:
+    """Raw and normalized features of one level with a running value sum."""
+
+    __slots__ = ("plan", "raw", "norm", "total", "changes", "score")
+
+    def __init__(self, plan: plans.LayerPlan, features: Mapping[str, Any]) -> None:
+        self.plan = plan
+        self.raw = dict(features)
+        try:
+            self.norm = plan.normalize(self.raw)
+        except OverflowError:
+            raise ValueError("feature value is out of range") from None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.total = RunningSum()
+        for v in self.norm.values():
+            self.total.add(v)
+        self.changes = 0
+        self._rescore()
+
+    def _rescore(self) -> None:
+        n = len(self.norm)
+        if not n:
+            self.score = 0.0
+            return
+        den = self.plan.equal_denominator(n)
+        s = self.total.value * (1.0 / n)
+        self.score = max(-1.0, min(1.0, s / den)) if den else 0.0
+
+    def apply(self, changes: Mapping[str, Tuple[float, float] | None]) -> None:
+        """Apply ``{feature: (raw, normalized) | None}`` from :func:`_layer_delta`."""
+
+        for k, change in changes.items():
+            old = self.norm.pop(k, None) if change is None else self.norm.get(k)
+            if old is not None:
+                self.total.add(-old)
+            if change is None:
+                self.raw.pop(k, None)
+                continue
+            self.raw[k], nv = change
+            self.norm[k] = nv
+            self.total.add(nv)
+        self.changes += len(changes)
+        if self.changes > max(len(self.norm), 64):
+            self._rebuild()
+        else:
+            self._rescore()
+
+
+def _layer_delta(
+    field: str, delta: Any, plan: plans.LayerPlan
+) -> Dict[str, Tuple[float, float] | None]:
+    """Validate and normalize one layer's delta without touching any state."""
+
+    if not isinstance(delta, Mapping):
+        raise ValueError(f"'{field}' must be an object")
+    scale = plan.norm.scale_map.get
+    out: Dict[str, Tuple[float, float] | None] = {}
+    for k, v in delta.items():
+        if v is None:
+            out[k] = None
+            continue
+        if type(v) is not float and not is_number(v):
+            raise ValueError(f"'{field}.{k}' must be a number or null")
+        try:
+            out[k] = (v, math.tanh(v / scale(k, 1.0)))
+        except OverflowError:
+            raise ValueError(f"'{field}.{k}' is out of range") from None
+    return out
+
+
+class SignalSession:
+    """Stateful v2 scoring of one payload under incremental updates.
+
+    Args:
+        data: Initial payload conforming to the input schema.
+
+    Raises:
+        ValueError: If the scenario, window or ``vol_regime_pctl`` is invalid.
+    """
+
+    def __init__(self, data: Mapping[str, Any], handle: str | None = None) -> None:
+        data = dict(data)
+        self.handle = handle
+        self.scenario, self.window = _validate_scenario_window(data)
+        self._base = {k: v for k, v in data.items() if k not in LAYER_FIELDS}
+        self._vol = _vol_regime_pctl(data)
+        self._regime, self._alphas = v2.router_weights(self._vol)
+        self._nagr = v2.nagr(data.get("nagr_nodes", []))
+        self._layers = tuple(
+            _Layer(plans.LAYER_PLANS[level], data.get(field, {}))
+            for field, level in LAYER_FIELDS.items()
+        )
+        self._lock = threading.Lock()
+        self.version = 0
+        self._combine()
+
+    def _combine(self) -> None:
+        ng = 0.2 * self._nagr
+        self._signals = tuple(0.8 * layer.score + ng for layer in self._layers)
+        s1, s2, s3 = self._signals
+        self._overall = v2.combine_levels(s1, s2, s3, self._alphas)
+
+    def update(self, delta: Mapping[str, Any]) -> Dict[str, Any]:
+        """Merge ``delta`` into the session and return :meth:`signals`.
+
+        Raises:
+            ValueError: If ``delta`` holds an unsupported field or an invalid
+                value; nothing is applied in that case.
+        """
+
+        if not isinstance(delta, Mapping):
+            raise ValueError("delta must be an object")
+        unknown = set(delta) - _FIELDS
+        if unknown:
+            raise ValueError("unsupported delta fields: " + ", ".join(sorted(unknown)))
+        layers = {
+            field: _layer_delta(field, delta[field], layer.plan)
+            for layer, field in zip(self._layers, LAYER_FIELDS)
+            if field in delta
+        }
+        route = None
+        if "vol_regime_pctl" in delta:
+            vol = _vol_regime_pctl(dict(delta))
+            route = vol, v2.router_weights(vol)
+        nagr = None
+        if "nagr_nodes" in delta:
+            if not isinstance(delta["nagr_nodes"], list):
+                raise ValueError("'nagr_nodes' must be an array")
+            nagr = v2.nagr(delta["nagr_nodes"])
+        with self._lock:
+            for layer, field in zip(self._layers, LAYER_FIELDS):
+                if field in layers:
+                    layer.apply(layers[field])
+            if route is not None:
+                self._vol, (self._regime, self._alphas) = route
+                self._base["vol_regime_pctl"] = self._vol
+            if nagr is not None:
+                self._nagr = nagr
+                self._base["nagr_nodes"] = delta["nagr_nodes"]
+            if "lineage" in delta:
+                self._base["lineage"] = delta["lineage"]
+            self._combine()
+            self.version += 1
+            return self._summary()
+
+    def _summary(self) -> Dict[str, Any]:
+        s1, s2, s3 = self._signals
+        return {
+            "version": self.version,
+            "overall_signal": round(self._overall, 6),
+            "overall_signal_L1": round(s1, 6),
+            "overall_signal_L2": round(s2, 6),
+            "overall_signal_L3": round(s3, 6),
+            "level_weights": dict(self._alphas),
+            "router_regime": self._regime,
+        }
+
+    def signals(self) -> Dict[str, Any]:
+        """Return the current level and overall signals without the details."""
+
+        with self._lock:
+            return self._summary()
+
+    def payload(self) -> Dict[str, Any]:
+        """Return the merged payload the session currently represents."""
+
+        with self._lock:
+            data = dict(self._base)
+            for layer, field in zip(self._layers, LAYER_FIELDS):
+                data[field] = dict(layer.raw)
+            return data
+
+    def output(self, fixed_ts: str | None = None) -> Dict[str, Any]:
+        """Render the full ``run_v2`` output for the current state."""
+
+        with self._lock:
+            norms: Tuple[Dict[str, float], ...] = tuple(
+                dict(layer.norm) for layer in self._layers
+            )
+            return _v2_output(
+                self._base,
+                self.scenario,
+                self.window,
+                _asof(fixed_ts),
+                norms,  # type: ignore[arg-type]
+                self._signals,  # type: ignore[arg-type]
+                self._regime,
+                dict(self._alphas),
+                self._overall,
+            )
+
+
+class SessionRegistry:
+    """Thread-safe mapping of opaque handles to :class:`SignalSession` objects.
+
+    Args:
+        max_sessions: Maximum number of open sessions.
+        idle_ttl: Seconds after its last use at which a session is closed;
+            ``None`` keeps sessions until they are closed explicitly.
+        clock: Monotonic time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1024,
+        idle_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if idle_ttl is not None and idle_ttl <= 0:
+            raise ValueError("idle_ttl must be positive")
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        # Handles in order of last use, with the time of that use.
+        self._sessions: OrderedDict[str, Tuple[SignalSession, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float) -> None:
+        if self.idle_ttl is None:
+            return
+        while self._sessions:
+            handle, (_, used) = next(iter(self._sessions.items()))
+            if now - used < self.idle_ttl:
+                break
+            del self._sessions[handle]
+
+    def open(self, data: Mapping[str, Any]) -> SignalSession:
+        """Open a session on ``data``; its ``handle`` is set.
+
+        Raises:
+            ValueError: If ``data`` is invalid or the registry is full.
+        """
+
+        handle = uuid.uuid4().hex
+        session = SignalSession(data, handle=handle)
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if len(self._sessions) >= self.max_sessions:
+                raise ValueError("session registry is full")
+            self._sessions[handle] = (session, now)
+        return session
+
+    def get(self, handle: str) -> SignalSession:
+        """Return the session for ``handle`` and mark it as used.
+
+        Raises:
+            KeyError: If ``handle`` is not open or has expired.
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            entry = self._sessions.get(handle)
+            if entry is None:
+                raise KeyError(f"unknown session: {handle}")
+            self._sessions[handle] = (entry[0], now)
+            self._sessions.move_to_end(handle)
+            return entry[0]
+
+    def close(self, handle: str) -> None:
+        """Close ``handle``.
+
+        Raises:
+            KeyError: If ``handle`` is not open.
+        """
+
+        with self._lock:
+            if self._sessions.pop(handle, None) is None:
+                raise KeyError(f"unknown session: {handle}")
+
+
+__all__ = ["LAYER_FIELDS", "SignalSession", "SessionRegistry"]
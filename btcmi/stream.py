@@ -0,0 +1,247 @@
+"""Chunked scoring of newline-delimited JSON payloads.
+
+Lines are consumed lazily in bounded chunks so memory stays constant no
+matter how long the stream is.  Every input line produces exactly one result
+in input order: the runner output, or an error record of the form
+``{"error": <code>, "line": <n>, "message": <text>}``.
+
+The ``a``-prefixed helpers do the same for asynchronous byte streams such as
+an HTTP request body.  Lines longer than ``max_line`` bytes are not buffered;
+they surface as ``None`` and are reported as ``line_too_long``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Tuple,
+)
+
+from btcmi.runner import BATCH_RUNNERS
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_LINE_BYTES = 1 << 20
+
+
+def error_record(code: str, line: int, message: str) -> dict[str, Any]:
+    """Return the error record emitted for a failed line."""
+
+    return {"error": code, "line": line, "message": message}
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most ``size`` items."""
+
+    if size < 1:
+        raise ValueError("chunk size must be positive")
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def numbered_lines(lines: Iterable[str | bytes]) -> Iterator[Tuple[int, str | bytes]]:
+    """Pair non-blank lines with their 1-based line number."""
+
+    for n, line in enumerate(lines, start=1):
+        if line.strip():
+            yield n, line
+
+
+def score_chunk(
+    lines: List[Tuple[int, str | bytes]],
+    mode: str,
+    fixed_ts: str | None,
+    *,
+    validate_output: bool = True,
+) -> List[dict[str, Any]]:
+    """Parse, validate and score one chunk of numbered lines.
+
+    Parameters
+    ----------
+    lines:
+        ``(line_number, text)`` pairs.
+    mode:
+        Engine mode used for every line.
+    fixed_ts:
+        Timestamp used for the ``asof`` field.
+    validate_output:
+        Validate v1/v2 outputs against ``output_schema.json``.
+
+    Returns
+    -------
+    list
+        One output or error record per input line, in order.
+    """
+
+    runner = BATCH_RUNNERS[mode]
+    results: List[dict[str, Any] | None] = [None] * len(lines)
+    valid: List[int] = []
+    payloads: List[dict[str, Any]] = []
+    for pos, (n, text) in enumerate(lines):
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            results[pos] = error_record("invalid_json", n, str(e))
+            continue
+        try:
+            validate_json(data, SCHEMA_REGISTRY["input"])
+        except Exception as e:  # noqa: BLE001
+            results[pos] = error_record("input_schema_validation_failed", n, str(e))
+            continue
+        valid.append(pos)
+        payloads.append(data)
+
+    for pos, out in zip(valid, runner(payloads, fixed_ts)):
+        n = lines[pos][0]
+        if "error" in out:
+            results[pos] = error_record("runner_error", n, out["message"])
+            continue
+        if validate_output and mode != "v2.nf3p":
+            try:
+                validate_json(out, SCHEMA_REGISTRY["output"])
+            except Exception as e:  # noqa: BLE001
+                out = error_record("output_schema_validation_failed", n, str(e))
+        results[pos] = out
+    return results  # type: ignore[return-value]
+
+
+def score_lines(
+    lines: Iterable[str | bytes],
+    mode: str,
+    fixed_ts: str | None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    validate_output: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """Lazily score newline-delimited payloads, one result per non-blank line."""
+
+    for chunk in iter_chunks(numbered_lines(lines), chunk_size):
+        yield from score_chunk(chunk, mode, fixed_ts, validate_output=validate_output)
+
+
+def score_with_runners(
+    lines: List[Tuple[int, str | bytes | None]],
+    default_mode: str,
+    runners: Mapping[str, Callable[..., dict[str, Any]]],
+    fixed_ts: str | None = None,
+) -> List[dict[str, Any]]:
+    """Score numbered lines one by one through single-payload ``runners``.
+
+    Each line is dispatched on its own ``mode`` field, falling back to
+    ``default_mode``.  Nothing is written to disk.  ``None`` stands for a
+    line dropped by :func:`alines` for exceeding its length limit.
+    """
+
+    results: List[dict[str, Any]] = []
+    for n, text in lines:
+        if text is None:
+            results.append(error_record("line_too_long", n, "line too long"))
+            continue
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            results.append(error_record("invalid_json", n, str(e)))
+            continue
+        mode = (data.get("mode") if isinstance(data, dict) else None) or default_mode
+        runner = runners.get(mode) if isinstance(mode, str) else None
+        if runner is None:
+            results.append(error_record("unknown_mode", n, f"unknown mode: {mode}"))
+            continue
+        try:
+            validate_json(data, SCHEMA_REGISTRY["input"])
+        except Exception as e:  # noqa: BLE001
+            results.append(error_record("input_schema_validation_failed", n, str(e)))
+            continue
+        try:
+            results.append(runner(data, fixed_ts, out_path=None))
+        except (ArithmeticError, KeyError, TypeError, ValueError) as e:
+            results.append(error_record("runner_error", n, str(e)))
+        except Exception:  # noqa: BLE001
+            logger.exception("runner_error")
+            results.append(error_record("internal_error", n, "internal error"))
+    return results
+
+
+async def alines(
+    chunks: AsyncIterable[bytes], max_line: int = MAX_LINE_BYTES
+) -> AsyncIterator[bytes | None]:
+    """Split an asynchronous byte stream into lines without the newline.
+
+    A line longer than ``max_line`` bytes is discarded as it arrives and
+    yielded as ``None``, so memory stays bounded by ``max_line``.
+    """
+
+    parts: List[bytes] = []
+    size = 0
+    too_long = False
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        for piece in lines:
+            if too_long or size + len(piece) > max_line:
+                yield None
+            else:
+                parts.append(piece)
+                yield b"".join(parts)
+            parts, size, too_long = [], 0, False
+        if too_long or not rest:
+            continue
+        size += len(rest)
+        if size > max_line:
+            parts, too_long = [], True
+        else:
+            parts.append(rest)
+    if too_long:
+        yield None
+    elif parts:
+        yield b"".join(parts)
+
+
+async def anumbered_chunks(
+    lines: AsyncIterable[str | bytes | None], size: int
+) -> AsyncIterator[List[Tuple[int, str | bytes | None]]]:
+    """Group non-blank lines with their 1-based numbers into chunks of ``size``."""
+
+    if size < 1:
+        raise ValueError("chunk size must be positive")
+    chunk: List[Tuple[int, str | bytes | None]] = []
+    n = 0
+    async for line in lines:
+        n += 1
+        if line is not None and not line.strip():
+            continue
+        chunk.append((n, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "MAX_LINE_BYTES",
+    "error_record",
+    "iter_chunks",
+    "numbered_lines",
+    "score_chunk",
+    "score_lines",
+    "score_with_runners",
+    "alines",
+    "anumbered_chunks",
+]
@@ -7,3 +7,29 @@ from typing import Any
 def is_number(x: Any) -> bool:
     """Return True if *x* is a real numeric value (excluding bool)."""
     return isinstance(x, Real) and not isinstance(x, bool)
+
+
+class RunningSum:
+    """Neumaier compensated running sum that also supports removal.
+
+    Adding ``-x`` removes a previously added ``x`` without the cancellation
+    error of a plain running total.
+    """
+
+    __slots__ = ("total", "comp")
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self.comp = 0.0
+
+    def add(self, x: float) -> None:
+        t = self.total + x
+        if abs(self.total) >= abs(x):
+            self.comp += (self.total - t) + x
+        else:
+            self.comp += (x - t) + self.total
+        self.total = t
+
+    @property
+    def value(self) -> float:
+        return self.total + self.comp
@@ -0,0 +1,222 @@
+"""Streaming estimate of ``vol_regime_pctl`` from a price feed.
+
+:class:`VolRegimeEstimator` keeps the realized volatility of the last
+``window`` log returns as a running sum of squares and ranks the current
+volatility among the last ``history`` volatility values.  The history is a
+histogram over log-spaced bins held in a Fenwick tree, so a tick costs one
+O(1) volatility update plus O(log bins) work to insert the new value, expire
+the oldest one and query the rank.
+
+Values sharing the current value's bin cannot be ordered, so the estimate
+is the mid-rank ``(below + in_bin / 2) / n`` and differs from the exact
+empirical mid-rank by at most ``in_bin / (2 n)``.  That bound is reported
+with the estimate in the diagnostics notes.
+
+The estimator can be passed as the ``vol_regime_pctl`` of a payload: the
+runners read its current value through ``float()`` and add its diagnostics
+to ``details.diagnostics.notes``.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from btcmi import config
+from btcmi import engine_v2 as v2
+from btcmi.utils import RunningSum
+
+
+class _Fenwick:
+    """Binary indexed tree of bin counts."""
+
+    __slots__ = ("tree",)
+
+    def __init__(self, size: int) -> None:
+        self.tree = [0] * (size + 1)
+
+    def add(self, i: int, delta: int) -> None:
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def below(self, i: int) -> int:
+        """Total count of bins ``< i``."""
+
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+
+class VolRegimeEstimator:
+    """Rolling realized-volatility percentile updated per price tick.
+
+    Args:
+        window: Log returns per realized-volatility value.
+        history: Volatility values the percentile ranks against.
+        bins: Log-spaced histogram bins; more bins tighten the error bound.
+        vol_range: Per-bar volatility covered by the bins; values outside
+            fall into the edge bins.
+
+    Raises:
+        ValueError: If a parameter is out of range.
+    """
+
+    def __init__(
+        self,
+        window: int = config.VOL_REGIME_WINDOW,
+        history: int = config.VOL_REGIME_HISTORY,
+        *,
+        bins: int = config.VOL_REGIME_BINS,
+        vol_range: Tuple[float, float] = config.VOL_REGIME_RANGE,
+    ) -> None:
+        lo, hi = vol_range
+        if window < 1 or history < 1 or bins < 2:
+            raise ValueError("window and history must be positive and bins >= 2")
+        if not 0 < lo < hi:
+            raise ValueError("vol_range must satisfy 0 < low < high")
+        self.window = window
+        self.history = history
+        self.bins = bins
+        self._log_lo = math.log(lo)
+        self._scale = bins / (math.log(hi) - self._log_lo)
+        self._returns: deque[float] = deque()
+        self._sq = RunningSum()
+        self._since_rebuild = 0
+        self._last_price: float | None = None
+        self._ring = np.zeros(history, dtype=np.int32)
+        self._head = 0
+        self._n = 0
+        self._counts = [0] * bins
+        self._tree = _Fenwick(bins)
+        self._vol: float | None = None
+        self._pctl = 0.5
+        self._error = 0.5
+        self.ticks = 0
+        self._lock = threading.Lock()
+
+    def _bin(self, vol: float) -> int:
+        if vol <= 0.0:
+            return 0
+        b = int((math.log(vol) - self._log_lo) * self._scale)
+        return 0 if b < 0 else (self.bins - 1 if b >= self.bins else b)
+
+    def _push_return(self, r: float) -> float | None:
+        self._returns.append(r)
+        self._sq.add(r * r)
+        if len(self._returns) > self.window:
+            old = self._returns.popleft()
+            self._sq.add(-old * old)
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._sq = RunningSum()
+            for x in self._returns:
+                self._sq.add(x * x)
+            self._since_rebuild = 0
+        if len(self._returns) < self.window:
+            return None
+        return math.sqrt(max(self._sq.value, 0.0) / self.window)
+
+    def _push_vol(self, vol: float) -> None:
+        b = self._bin(vol)
+        if self._n == self.history:
+            old = int(self._ring[self._head])
+            self._counts[old] -= 1
+            self._tree.add(old, -1)
+        else:
+            self._n += 1
+        self._ring[self._head] = b
+        self._head = (self._head + 1) % self.history
+        self._counts[b] += 1
+        self._tree.add(b, 1)
+        in_bin = self._counts[b]
+        self._pctl = (self._tree.below(b) + 0.5 * in_bin) / self._n
+        self._error = 0.5 * in_bin / self._n
+
+    def update(self, price: float) -> float:
+        """Feed the next price and return the current percentile.
+
+        Until ``window`` returns have been seen the percentile stays 0.5.
+
+        Raises:
+            ValueError: If ``price`` is not a finite positive number.
+        """
+
+        p = float(price)
+        if not (math.isfinite(p) and p > 0):
+            raise ValueError("price must be a finite positive number")
+        with self._lock:
+            self.ticks += 1
+            last, self._last_price = self._last_price, p
+            if last is not None:
+                vol = self._push_return(math.log(p / last))
+                if vol is not None:
+                    self._vol = vol
+                    self._push_vol(vol)
+            return self._pctl
+
+    def update_many(self, prices: Iterable[float]) -> float:
+        """Feed several prices in order and return the final percentile."""
+
+        for p in prices:
+            self.update(p)
+        return self._pctl
+
+    @property
+    def samples(self) -> int:
+        """Volatility values currently ranked against."""
+
+        return self._n
+
+    @property
+    def vol(self) -> float | None:
+        """Latest realized volatility per bar, ``None`` while warming up."""
+
+        return self._vol
+
+    @property
+    def value(self) -> float:
+        """Current ``vol_regime_pctl`` estimate in [0, 1]."""
+
+        return self._pctl
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum distance of :attr:`value` from the exact mid-rank."""
+
+        return self._error
+
+    def __float__(self) -> float:
+        return self._pctl
+
+    def route(self) -> Tuple[str, Dict[str, float]]:
+        """Return :func:`btcmi.engine_v2.router_weights` for the estimate."""
+
+        return v2.router_weights(self._pctl)
+
+    def token(self) -> Tuple[Any, ...]:
+        """Cache token of the state the runners read."""
+
+        with self._lock:
+            return ("vol_regime", self._pctl, self._error, self._n)
+
+    def diagnostics(self) -> List[str]:
+        """Diagnostics note with the estimate and its error bound."""
+
+        with self._lock:
+            return [
+                f"vol_regime_pctl:estimate={self._pctl:.6f},"
+                f"error_bound={self._error:.6f},samples={self._n}"
+            ]
+
+
+__all__ = ["VolRegimeEstimator"]
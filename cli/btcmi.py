@@ -5,11 +5,18 @@ import argparse
 import json
 import logging
 import sys
+import time
 from pathlib import Path
 
+from btcmi import bars, calibration, parallel, router_tuning
+from btcmi.backtest import evaluate_nf3p
+from btcmi.io import write_output
 from btcmi.logging_cfg import configure_logging, new_run_id
-from btcmi.runner import run_v1, run_v2, run_nf3p
+from btcmi.norm_cache import NormCache
+from btcmi.ohlcv import FeatureWindows, load_ohlcv
+from btcmi.runner import run_v1, run_v1_all, run_v2, run_nf3p
 from btcmi.schema_util import SCHEMA_REGISTRY, load_json, validate_json
+from btcmi.stream import DEFAULT_CHUNK_SIZE, score_lines
 
 
 def main() -> int:
@@ -35,8 +42,62 @@ def main() -> int:
     parser_run.add_argument(
         "--mode",
         required=True,
+        choices=("v1", "v1.all", "v2.fractal", "v2.nf3p"),
+        dest="mode",
+        help="'v1.all' scores a v1 payload under every scenario at once",
+    )
+    parser_run.add_argument(
+        "--input-format",
+        choices=("json", "jsonl"),
+        default="json",
+        dest="input_format",
+        help="'jsonl' streams one payload per line and writes one result per line",
+    )
+    parser_run.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        dest="chunk_size",
+        help="Lines scored together in jsonl mode",
+    )
+
+    parser_many = subparsers.add_parser(
+        "run-many", help="Score a directory or glob of input files in parallel"
+    )
+    parser_many.add_argument(
+        "--input", required=True, help="Input directory or glob pattern"
+    )
+    parser_many.add_argument(
+        "--out-dir",
+        required=True,
+        type=Path,
+        dest="out_dir",
+        help="Output directory mirroring the input tree",
+    )
+    parser_many.add_argument("--fixed-ts", dest="fixed_ts")
+    parser_many.add_argument(
+        "--mode",
         choices=("v1", "v2.fractal", "v2.nf3p"),
         dest="mode",
+        help="Engine mode for every file (default: each payload's mode, else v1)",
+    )
+    parser_many.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    parser_many.add_argument(
+        "--chunk-size",
+        type=int,
+        default=parallel.DEFAULT_CHUNK_SIZE,
+        dest="chunk_size",
+        help="Files sent to a worker per task",
+    )
+    parser_many.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip files whose output exists and is newer than the input",
     )
 
     parser_validate = subparsers.add_parser(
@@ -45,6 +106,120 @@ def main() -> int:
     parser_validate.add_argument("--schema", required=True, type=Path)
     parser_validate.add_argument("--data", required=True, type=Path)
 
+    parser_convert = subparsers.add_parser(
+        "convert-ohlcv",
+        help="Convert OHLCV CSV or JSON into a memory-mapped bar store",
+    )
+    parser_convert.add_argument("--input", required=True, type=Path)
+    parser_convert.add_argument("--out", required=True, type=Path)
+
+    parser_backtest = subparsers.add_parser(
+        "backtest",
+        help="Walk-forward evaluation of predictions on OHLCV bars",
+    )
+    parser_backtest.add_argument(
+        "--mode", required=True, choices=("v2.nf3p",), dest="mode"
+    )
+    parser_backtest.add_argument(
+        "--input",
+        required=True,
+        type=Path,
+        help="OHLCV CSV or JSON file, or a directory from convert-ohlcv",
+    )
+    parser_backtest.add_argument("--out", type=Path)
+    parser_backtest.add_argument(
+        "--window", help="Resample the bars to this window first, e.g. 5m"
+    )
+    parser_backtest.add_argument(
+        "--horizon", type=int, default=60, help="Forecast horizon in bars"
+    )
+    parser_backtest.add_argument("--folds", type=int, default=10)
+    parser_backtest.add_argument(
+        "--min-train", type=int, dest="min_train", help="Bars before the first fold"
+    )
+    parser_tune = subparsers.add_parser(
+        "tune-router",
+        help="Grid search over router cut points and level weights",
+    )
+    parser_tune.add_argument(
+        "--input",
+        type=Path,
+        help="OHLCV CSV or JSON file, or a directory from convert-ohlcv",
+    )
+    parser_tune.add_argument(
+        "--signals-cache",
+        type=Path,
+        dest="signals_cache",
+        help=(
+            "Level signals .npz; reused when it matches --input, --horizon and "
+            "the windows, rebuilt and written otherwise"
+        ),
+    )
+    parser_tune.add_argument("--out", type=Path, help="Ranked configurations")
+    parser_tune.add_argument(
+        "--config-out",
+        type=Path,
+        dest="config_out",
+        help="Write the best configuration for BTCMI_ROUTER_CONFIG",
+    )
+    parser_tune.add_argument(
+        "--window", help="Resample the bars to this window first, e.g. 5m"
+    )
+    parser_tune.add_argument(
+        "--horizon", type=int, default=60, help="Return horizon in bars"
+    )
+    parser_tune.add_argument(
+        "--objective", choices=router_tuning.OBJECTIVES, default="ic"
+    )
+    parser_tune.add_argument(
+        "--cuts",
+        type=float,
+        nargs="+",
+        default=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
+        help="Candidate cut points; every pair low < high is tried",
+    )
+    parser_tune.add_argument(
+        "--weight-step",
+        type=float,
+        default=0.25,
+        dest="weight_step",
+        help="Grid step of the level weights",
+    )
+    parser_tune.add_argument("--top", type=int, default=10)
+    parser_tune.add_argument("--workers", type=int, default=1)
+    parser_calibrate = subparsers.add_parser(
+        "calibrate",
+        help="Fit v1 scenario weights to reference signals",
+    )
+    parser_calibrate.add_argument(
+        "--input",
+        required=True,
+        nargs="+",
+        type=Path,
+        help="Reference records (.json, JSON array or .jsonl); non-v1 are skipped",
+    )
+    parser_calibrate.add_argument("--out", type=Path, help="Calibration artifact")
+    parser_calibrate.add_argument(
+        "--fit-scales",
+        action="store_true",
+        dest="fit_scales",
+        help="Also fit NORM_SCALE",
+    )
+    parser_calibrate.add_argument(
+        "--max-nfev", type=int, dest="max_nfev", help="Optimizer evaluation limit"
+    )
+    for sub in (parser_backtest, parser_tune):
+        for name, default in (("micro", 60), ("mezo", 1440), ("macro", 43200)):
+            sub.add_argument(
+                f"--{name}", type=int, default=default, help=f"{name} lookback in bars"
+            )
+        sub.add_argument(
+            "--norm-cache",
+            type=Path,
+            dest="norm_cache",
+            help="Directory persisting normalized layers between runs",
+        )
+
     args = parser.parse_args()
     run_id = new_run_id()
 
@@ -60,6 +235,32 @@ def main() -> int:
                 details["error_message"] = msg
             getattr(logger, level)(error, extra=details)
 
+    if args.cmd == "run-many":
+        return _run_many(args, run_id, report, logger)
+
+    if args.cmd == "convert-ohlcv":
+        return _convert_ohlcv(args, run_id, report, logger)
+
+    if args.cmd == "backtest":
+        return _backtest(args, run_id, report, logger)
+
+    if args.cmd == "calibrate":
+        return _calibrate(args, run_id, report, logger)
+
+    if args.cmd == "tune-router":
+        if args.input is None and (
+            args.signals_cache is None or not args.signals_cache.exists()
+        ):
+            report("missing_input", level="error", run_id=run_id)
+            return 2
+        return _tune_router(args, run_id, report, logger)
+
+    if args.cmd == "run" and args.input_format == "jsonl":
+        if args.mode == "v1.all":
+            report("unsupported_mode", level="error", run_id=run_id, mode=args.mode)
+            return 2
+        return _run_jsonl(args, run_id, report, logger)
+
     if args.cmd == "run":
         if args.input == "-":
             try:
@@ -87,7 +288,8 @@ def main() -> int:
         if mode not in (None, "v1", "v2.fractal", "v2.nf3p"):
             report("unknown_mode", level="error", run_id=run_id, mode=mode)
             return 2
-        if mode is not None and mode != args.mode:
+        expected = "v1" if args.mode == "v1.all" else args.mode
+        if mode is not None and mode != expected:
             logger.warning("mode_mismatch", extra={"run_id": run_id, "mode": mode})
 
         try:
@@ -95,6 +297,8 @@ def main() -> int:
                 out = run_v2(data, args.fixed_ts, args.out)
             elif args.mode == "v2.nf3p":
                 out = run_nf3p(data, args.fixed_ts, args.out)
+            elif args.mode == "v1.all":
+                out = run_v1_all(data, args.fixed_ts, args.out)
             else:
                 out = run_v1(data, args.fixed_ts, args.out)
         except ValueError as e:
@@ -113,7 +317,7 @@ def main() -> int:
                 message=str(e),
             )
             return 2
-        if args.mode != "v2.nf3p":
+        if args.mode not in ("v2.nf3p", "v1.all"):
             try:
                 validate_json(out, SCHEMA_REGISTRY["output"])
             except Exception as e:
@@ -157,5 +361,280 @@ def main() -> int:
     return 0
 
 
+def _convert_ohlcv(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Write the bar store of an OHLCV file."""
+
+    try:
+        bars.convert(args.input, args.out)
+    except FileNotFoundError:
+        report("input_file_not_found", run_id=run_id, path=str(args.input))
+        return 2
+    except ValueError as e:
+        report("invalid_ohlcv", run_id=run_id, message=str(e))
+        return 2
+    store = bars.open_bars(args.out)
+    logger.info("convert_ok", extra={"run_id": run_id, "rows": len(store)})
+    return 0
+
+
+def _load_series(args) -> tuple[bars.Bars, FeatureWindows]:
+    """Open the ``--input`` bars and the layer lookbacks of a bar command."""
+
+    if args.input.is_dir():
+        series = bars.open_bars(args.input)
+    else:
+        series = bars.from_mapping(load_ohlcv(args.input))
+    if args.window:
+        series = series.resample(args.window)
+    return series, _feature_windows(args)
+
+
+def _feature_windows(args) -> FeatureWindows:
+    return FeatureWindows(micro=args.micro, mezo=args.mezo, macro=args.macro)
+
+
+def _norm_cache(args) -> tuple[NormCache | None, str]:
+    """Return the ``--norm-cache`` store and the name of the input features."""
+
+    if args.norm_cache is None:
+        return None, "features"
+    parts = (args.input.name, args.window or "raw", args.micro, args.mezo, args.macro)
+    return NormCache(args.norm_cache), "_".join(map(str, parts))
+
+
+def _write_or_print(out, args, run_id: str, report) -> bool:
+    if args.out is None:
+        print(json.dumps(out, indent=2))
+        return True
+    try:
+        write_output(out, args.out)
+    except (RuntimeError, OSError) as e:
+        report("output_write_failed", run_id=run_id, path=str(args.out), message=str(e))
+        return False
+    return True
+
+
+def _backtest(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Walk-forward evaluation of OHLCV bars."""
+
+    try:
+        series, windows = _load_series(args)
+    except FileNotFoundError:
+        report("input_file_not_found", run_id=run_id, path=str(args.input))
+        return 2
+    except ValueError as e:
+        report("invalid_ohlcv", run_id=run_id, message=str(e))
+        return 2
+    cache, name = _norm_cache(args)
+    try:
+        out = evaluate_nf3p(
+            series,
+            windows,
+            horizon=args.horizon,
+            folds=args.folds,
+            min_train=args.min_train,
+            norm_cache=cache,
+            name=name,
+        )
+    except ValueError as e:
+        report("runner_error", run_id=run_id, mode=args.mode, message=str(e))
+        return 2
+    if not _write_or_print(out, args, run_id, report):
+        return 2
+    logger.info("backtest_ok", extra={"run_id": run_id, "mode": args.mode})
+    return 0
+
+
+def _tune_router(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Rank router configurations on cached level signals of OHLCV bars."""
+
+    cache = args.signals_cache
+    try:
+        series = None
+        if args.input is not None:
+            series, windows = _load_series(args)
+        else:
+            windows = _feature_windows(args)
+        expect = router_tuning.signals_meta(series, windows, horizon=args.horizon)
+        signals = None
+        if cache is not None and cache.exists():
+            try:
+                signals = router_tuning.LevelSignals.load(cache, expect)
+            except ValueError as e:
+                if series is None:
+                    report("stale_signals_cache", run_id=run_id, message=str(e))
+                    return 2
+                logger.info(
+                    "signals_cache_stale", extra={"run_id": run_id, "path": str(cache)}
+                )
+        if signals is None:
+            norm_cache, name = _norm_cache(args)
+            signals = router_tuning.signals_from_bars(
+                series, windows, horizon=args.horizon, norm_cache=norm_cache, name=name
+            )
+            if cache is not None:
+                signals.save(cache)
+    except FileNotFoundError:
+        report("input_file_not_found", run_id=run_id, path=str(args.input))
+        return 2
+    except (ValueError, OSError) as e:
+        report("invalid_ohlcv", run_id=run_id, message=str(e))
+        return 2
+    try:
+        grid = router_tuning.candidate_grid(args.cuts, args.weight_step)
+        ranked = router_tuning.search(
+            signals, grid, args.objective, top=args.top, workers=args.workers
+        )
+    except ValueError as e:
+        report("runner_error", run_id=run_id, message=str(e))
+        return 2
+    out = {"objective": args.objective, "candidates": len(grid), "ranked": ranked}
+    if args.config_out is not None:
+        try:
+            router_tuning.write_router_config(args.config_out, ranked[0])
+        except (RuntimeError, OSError) as e:
+            report(
+                "output_write_failed",
+                run_id=run_id,
+                path=str(args.config_out),
+                message=str(e),
+            )
+            return 2
+    if not _write_or_print(out, args, run_id, report):
+        return 2
+    logger.info("tune_router_ok", extra={"run_id": run_id, "candidates": len(grid)})
+    return 0
+
+
+def _calibrate(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Fit scenario weights to reference records."""
+
+    try:
+        ref = calibration.load_reference(args.input)
+    except FileNotFoundError as e:
+        report("input_file_not_found", run_id=run_id, path=str(e.filename))
+        return 2
+    except (ValueError, OSError) as e:
+        report("invalid_reference", run_id=run_id, message=str(e))
+        return 2
+    try:
+        out = calibration.calibrate(
+            ref, fit_scales=args.fit_scales, max_nfev=args.max_nfev
+        )
+    except ValueError as e:
+        report("runner_error", run_id=run_id, message=str(e))
+        return 2
+    if not _write_or_print(out, args, run_id, report):
+        return 2
+    logger.info("calibrate_ok", extra={"run_id": run_id, "rows": len(ref)})
+    return 0
+
+
+def _run_jsonl(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Stream newline-delimited payloads through the batch runners."""
+
+    if args.chunk_size < 1:
+        report("invalid_chunk_size", level="error", run_id=run_id, size=args.chunk_size)
+        return 2
+    # Lines are read as bytes so that undecodable input is reported as
+    # ``invalid_json`` for that line instead of aborting the run.
+    try:
+        src = (
+            getattr(sys.stdin, "buffer", sys.stdin)
+            if args.input == "-"
+            else open(args.input, "rb")  # noqa: SIM115
+        )
+    except FileNotFoundError:
+        report("input_file_not_found", run_id=run_id, path=args.input)
+        return 2
+    try:
+        dst = sys.stdout if args.out is None else open(args.out, "w", encoding="utf-8")
+    except OSError as e:
+        report("output_write_failed", run_id=run_id, path=args.out, message=str(e))
+        if args.input != "-":
+            src.close()
+        return 2
+
+    ok = failed = 0
+    start = time.perf_counter()
+    try:
+        results = score_lines(src, args.mode, args.fixed_ts, chunk_size=args.chunk_size)
+        for rec in results:
+            if "error" in rec:
+                failed += 1
+            else:
+                ok += 1
+            try:
+                dst.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            except OSError as e:
+                report(
+                    "output_write_failed", run_id=run_id, path=args.out, message=str(e)
+                )
+                return 2
+    except OSError as e:
+        report("input_read_failed", run_id=run_id, path=args.input, message=str(e))
+        return 2
+    finally:
+        if args.input != "-":
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+        else:
+            dst.flush()
+    elapsed = time.perf_counter() - start
+    total = ok + failed
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"btcmi: {total} lines ({ok} ok, {failed} failed) in {elapsed:.3f}s, "
+        f"{rate:.1f} lines/s",
+        file=sys.stderr,
+    )
+    logger.info("run_ok", extra={"run_id": run_id, "mode": args.mode})
+    return 0 if failed == 0 else 2
+
+
+def _run_many(args, run_id: str, report, logger: logging.Logger) -> int:
+    """Score every file under ``--input`` into ``--out-dir``."""
+
+    if args.chunk_size < 1:
+        report("invalid_chunk_size", level="error", run_id=run_id, size=args.chunk_size)
+        return 2
+    if args.workers is not None and args.workers < 1:
+        report("invalid_workers", level="error", run_id=run_id, workers=args.workers)
+        return 2
+    root, files = parallel.discover(args.input, exclude=args.out_dir)
+    if not files:
+        report("input_file_not_found", level="error", run_id=run_id, path=args.input)
+        return 2
+
+    start = time.perf_counter()
+    results = parallel.run_many(
+        files,
+        root,
+        args.out_dir,
+        mode=args.mode,
+        fixed_ts=args.fixed_ts,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        resume=args.resume,
+    )
+    elapsed = time.perf_counter() - start
+    counts: dict[str, int] = {}
+    for res in results:
+        counts[res.status] = counts.get(res.status, 0) + 1
+        line = f"{res.status}\t{res.path}"
+        if res.message:
+            line += f"\t{res.message}"
+        print(line)
+    failed = sum(1 for res in results if not res.ok)
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(
+        f"btcmi: {len(results)} files ({summary}) in {elapsed:.3f}s",
+        file=sys.stderr,
+    )
+    logger.info("run_ok", extra={"run_id": run_id, "mode": args.mode})
+    return 0 if failed == 0 else 2
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
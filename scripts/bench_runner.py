@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Per-request microbenchmark for the v1, v2 and NF3P runners.
+
+Compares the compiled-plan path used by :mod:`btcmi.runner` with the
+dictionary-based path that rebuilds weights and denominators on every call.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from btcmi import engine_v1 as v1  # noqa: E402
+from btcmi import engine_v2 as v2  # noqa: E402
+from btcmi.config import NORM_SCALE, SCENARIO_WEIGHTS  # noqa: E402
+from btcmi.feature_processing import normalize_features, weighted_score  # noqa: E402
+from btcmi.runner import run_nf3p, run_v1, run_v2  # noqa: E402
+from btcmi.utils import is_number  # noqa: E402
+
+FIXED_TS = "2025-01-01T00:00:00Z"
+
+
+def legacy_v1(data: dict) -> float:
+    feats = data["features"]
+    norm = normalize_features(feats, NORM_SCALE)
+    score, _ = weighted_score(norm, SCENARIO_WEIGHTS[data["scenario"]])
+    exp = set(NORM_SCALE.keys())
+    {k for k, v in feats.items() if k in exp and is_number(v)}
+    return v1.combine(score, v1.nagr_score(data.get("nagr_nodes", [])))
+
+
+def plan_v1(data: dict) -> float:
+    feats = data["features"]
+    norm = v1.normalize(feats)
+    res = v1.base_signal(data["scenario"], norm)
+    v1.completeness(feats)
+    return v1.combine(res.score, v1.nagr_score(data.get("nagr_nodes", [])))
+
+
+def legacy_v2(data: dict) -> list[float]:
+    nodes = data.get("nagr_nodes", [])
+    out = []
+    for key, level in (
+        ("features_micro", "L1"),
+        ("features_mezo", "L2"),
+        ("features_macro", "L3"),
+    ):
+        n = normalize_features(data[key], v2.SCALES[level])
+        out.append(v2.level_signal(n, v2.layer_equal_weights(n), nodes)[0])
+    return out
+
+
+def plan_v2(data: dict) -> list[float]:
+    nodes = data.get("nagr_nodes", [])
+    levels = v2.normalize_levels(
+        data["features_micro"], data["features_mezo"], data["features_macro"]
+    )
+    return [
+        v2.plan_level_signal(level, n, nodes)
+        for level, n in zip(("L1", "L2", "L3"), levels)
+    ]
+
+
+def _per_call_us(fn, arg, number: int) -> float:
+    best = min(timeit.repeat(lambda: fn(arg), number=number, repeat=7))
+    return best / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    d1 = json.loads((ROOT / "examples/intraday.json").read_text())
+    d2 = json.loads((ROOT / "examples/intraday_fractal.json").read_text())
+    assert legacy_v1(d1) == plan_v1(d1)
+    assert legacy_v2(d2) == plan_v2(d2)
+
+    rows = [
+        ("v1 core (legacy)", legacy_v1, d1),
+        ("v1 core (plans)", plan_v1, d1),
+        ("v2 levels (legacy)", legacy_v2, d2),
+        ("v2 levels (plans)", plan_v2, d2),
+        ("run_v1", lambda d: run_v1(d, FIXED_TS), d1),
+        ("run_v2", lambda d: run_v2(d, FIXED_TS), d2),
+        ("run_nf3p", lambda d: run_nf3p(d, FIXED_TS), d2),
+    ]
+    for name, fn, data in rows:
+        print(f"{name:<20} {_per_call_us(fn, data, args.number):8.2f} us/request")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
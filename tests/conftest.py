@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def strip_asof():
+    """Drop the wall-clock ``asof`` field so outputs compare by value."""
+
+    def strip(out: dict) -> dict:
+        return {k: v for k, v in out.items() if k != "asof"}
+
+    return strip
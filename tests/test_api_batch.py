@@ -0,0 +1,63 @@
+import json
+import pathlib
+
+from fastapi.testclient import TestClient
+
+from btcmi.api import _req_times, app
+from btcmi.runner import run_nf3p, run_v1, run_v2
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def test_run_batch_results_in_order(strip_asof):
+    _req_times.clear()
+    v1 = _load_example("intraday")
+    v2 = _load_example("intraday_fractal")
+    nf3p = dict(v2, mode="v2.nf3p")
+    body = [v1, {"schema_version": "2.0.0"}, v2, nf3p]
+    resp = TestClient(app).post("/run/batch", json=body, headers=HEADERS)
+    assert resp.status_code == 200
+    out = resp.json()
+    assert len(out) == 4
+    assert strip_asof(out[0]) == strip_asof(run_v1(v1, None))
+    assert out[1]["error"] == "input_schema_validation_failed"
+    assert strip_asof(out[2]) == strip_asof(run_v2(v2, None))
+    assert strip_asof(out[3]) == strip_asof(run_nf3p(nf3p, None))
+
+
+def test_run_batch_limits(monkeypatch):
+    _req_times.clear()
+    client = TestClient(app)
+    payload = _load_example("intraday")
+    monkeypatch.setenv("BTCMI_BATCH_MAX_ITEMS", "2")
+    resp = client.post("/run/batch", json=[payload] * 3, headers=HEADERS)
+    assert resp.status_code == 413
+    assert client.post("/run/batch", json={"a": 1}, headers=HEADERS).status_code == 422
+    assert client.post("/run/batch", json=[payload]).status_code == 401
+
+
+def test_run_batch_rate_limit_counts_items(monkeypatch):
+    monkeypatch.setenv("BTCMI_RATE_LIMIT", "5")
+    _req_times.clear()
+    client = TestClient(app)
+    payload = _load_example("intraday")
+    assert (
+        client.post("/run/batch", json=[payload] * 4, headers=HEADERS).status_code
+        == 200
+    )
+    assert (
+        client.post("/run/batch", json=[payload] * 2, headers=HEADERS).status_code
+        == 429
+    )
+    assert client.post("/run", json=payload, headers=HEADERS).status_code == 429
+    _req_times.clear()
+    assert (
+        client.post("/run/batch", json=[payload] * 6, headers=HEADERS).status_code
+        == 413
+    )
+    _req_times.clear()
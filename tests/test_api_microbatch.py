@@ -0,0 +1,106 @@
+import asyncio
+import json
+import pathlib
+
+import httpx
+import pytest
+
+from btcmi import api
+from btcmi.cache import CACHE_HITS, ResultCache
+from btcmi.microbatch import BATCH_SIZE, ItemValidationError, MicroBatcher
+from btcmi.runner import run_v1, run_v2
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def _sum(hist, name: str) -> float:
+    for metric in hist.collect():
+        for s in metric.samples:
+            if s.name == name:
+                return s.value
+    raise KeyError(name)
+
+
+def test_batcher_flushes_on_size_and_resolves_each_future(strip_asof):
+    batcher = MicroBatcher(max_batch=4, max_delay=10.0)
+    v1 = _load_example("intraday")
+    v2 = _load_example("intraday_fractal")
+    before = _sum(BATCH_SIZE, "btcmi_microbatch_size_count")
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("v1", v1),
+            batcher.submit("v2.fractal", v2),
+            batcher.submit("v1", {"schema_version": "2.0.0"}),
+            batcher.submit("v1", dict(v1, scenario="swing")),
+            return_exceptions=True,
+        )
+
+    res = asyncio.run(main())
+    assert _sum(BATCH_SIZE, "btcmi_microbatch_size_count") == before + 1
+    assert strip_asof(res[0]) == strip_asof(run_v1(v1, None))
+    assert strip_asof(res[1]) == strip_asof(run_v2(v2, None))
+    assert isinstance(res[2], ItemValidationError)
+    assert res[3]["summary"]["scenario"] == "swing"
+
+
+def test_batcher_flushes_after_delay():
+    batcher = MicroBatcher(max_batch=100, max_delay=0.001)
+    out = asyncio.run(batcher.submit("v1", _load_example("intraday")))
+    assert "summary" in out
+
+
+def test_run_endpoint_uses_microbatcher(monkeypatch, strip_asof):
+    monkeypatch.setenv("BTCMI_MICROBATCH", "1")
+    monkeypatch.setenv("BTCMI_MICROBATCH_MAX_DELAY_MS", "20")
+    api.microbatcher.cache_clear()
+    api._req_times.clear()
+    payload = _load_example("intraday")
+    before = _sum(BATCH_SIZE, "btcmi_microbatch_size_sum")
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await asyncio.gather(
+                c.post("/run", json=payload, headers=HEADERS),
+                c.post("/run", json=payload, headers=HEADERS),
+                c.post("/run", json=dict(payload, window="1d"), headers=HEADERS),
+            )
+
+    try:
+        resps = asyncio.run(main())
+    finally:
+        api.microbatcher.cache_clear()
+    assert [r.status_code for r in resps] == [200, 200, 200]
+    assert strip_asof(resps[0].json()) == strip_asof(run_v1(payload, None))
+    assert resps[2].json()["summary"]["window"] == "1d"
+    assert _sum(BATCH_SIZE, "btcmi_microbatch_size_sum") == before + 3
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        MicroBatcher(max_batch=0)
+
+
+def test_batcher_consults_and_fills_result_cache(strip_asof):
+    cache = ResultCache(max_entries=8)
+    batcher = MicroBatcher(max_batch=2, max_delay=10.0, cache=cache)
+    v1 = _load_example("intraday")
+    swing = dict(v1, scenario="swing")
+    hits = CACHE_HITS.labels(mode="v1")._value.get()
+
+    async def pair(a: dict, b: dict) -> list:
+        return await asyncio.gather(batcher.submit("v1", a), batcher.submit("v1", b))
+
+    asyncio.run(pair(v1, swing))
+    assert len(cache) == 2
+    again = dict(v1, lineage={"source": "a" * 32})
+    res = asyncio.run(pair(again, swing))
+    assert CACHE_HITS.labels(mode="v1")._value.get() == hits + 2
+    assert res[0]["lineage"] == {"source": "a" * 32}
+    assert strip_asof(res[1]) == strip_asof(run_v1(swing, None))
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import pathlib
+
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+from btcmi.api import NDJSONStreamingResponse, _req_times, app, load_runners
+from btcmi.runner import run_v1, run_v2
+from btcmi.stream import alines
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def test_run_stream_scores_lines_in_order(strip_asof):
+    _req_times.clear()
+    v1 = _load_example("intraday")
+    v2 = _load_example("intraday_fractal")
+    text = "\n".join(
+        [json.dumps(v1), "{bad", "", json.dumps(v2), json.dumps(dict(v1, mode="x"))]
+    )
+
+    def body():
+        # Split mid-line to exercise incremental parsing.
+        data = text.encode()
+        for i in range(0, len(data), 37):
+            yield data[i : i + 37]
+
+    client = TestClient(app)
+    resp = client.post("/run/stream?chunk_size=2", content=body(), headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    out = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(out) == 4
+    assert strip_asof(out[0]) == strip_asof(run_v1(v1, None))
+    assert out[1] == {"error": "invalid_json", "line": 2, "message": out[1]["message"]}
+    assert strip_asof(out[2]) == strip_asof(run_v2(v2, None))
+    assert out[3]["error"] == "unknown_mode" and out[3]["line"] == 5
+
+
+def test_run_stream_uses_load_runners(monkeypatch):
+    _req_times.clear()
+    seen = []
+
+    def runner(data, ts, *, out_path=None):
+        seen.append(out_path)
+        return {"ok": True}
+
+    monkeypatch.setitem(load_runners(), "v1", runner)
+    payload = json.dumps(_load_example("intraday"))
+    resp = TestClient(app).post(
+        "/run/stream", content=(payload + "\n") * 3, headers=HEADERS
+    )
+    assert resp.text.splitlines() == ['{"ok":true}'] * 3
+    assert seen == [None] * 3
+
+
+def test_run_stream_rejects_unknown_default_mode():
+    _req_times.clear()
+    client = TestClient(app)
+    resp = client.post("/run/stream?mode=foo", content=b"", headers=HEADERS)
+    assert resp.status_code == 400
+    assert client.post("/run/stream", content=b"").status_code == 401
+
+
+def test_alines_drops_overlong_lines_without_buffering():
+    async def collect(chunks, max_line):
+        async def gen():
+            for c in chunks:
+                yield c
+
+        return [line async for line in alines(gen(), max_line)]
+
+    chunks = [b"ab", b"c\nabcd", b"ef\nxy", b"z\n", b"abcdefgh"]
+    assert asyncio.run(collect(chunks, 4)) == [b"abc", None, b"xyz", None]
+    assert asyncio.run(collect([b"abcd\n\nab", b"cd"], 4)) == [b"abcd", b"", b"abcd"]
+
+
+def test_run_stream_reports_overlong_lines(monkeypatch):
+    _req_times.clear()
+    monkeypatch.setenv("BTCMI_STREAM_MAX_LINE_BYTES", "16")
+    body = b"x" * 40 + b"\n{bad\n"
+    resp = TestClient(app).post("/run/stream", content=body, headers=HEADERS)
+    out = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(r["error"], r["line"]) for r in out] == [
+        ("line_too_long", 1),
+        ("invalid_json", 2),
+    ]
+
+
+def test_ndjson_response_listens_after_body_and_runs_background():
+    events = []
+
+    async def main():
+        body_read = asyncio.Event()
+
+        async def content():
+            yield "a\n"
+            body_read.set()
+            await asyncio.sleep(10)
+            yield "b\n"
+
+        async def receive():
+            events.append("receive")
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            events.append(message.get("body"))
+
+        resp = NDJSONStreamingResponse(
+            content(), body_read, background=BackgroundTask(events.append, "bg")
+        )
+        scope = {"type": "http", "asgi": {"spec_version": "2.0"}}
+        await asyncio.wait_for(resp(scope, receive, send), timeout=5)
+
+    asyncio.run(main())
+    # The disconnect is only read once the body is done, it cancels the
+    # pending chunk, and background tasks still run.
+    assert events == [None, b"a\n", "receive", "bg"]
@@ -0,0 +1,129 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import cli.btcmi as btcmi
+from btcmi import bars, engine_nf3p
+from btcmi.backtest import (
+    evaluate_nf3p,
+    forward_returns,
+    layer_predictions,
+    walk_forward,
+)
+from btcmi.ohlcv import FeatureWindows, build_features
+
+WINDOWS = FeatureWindows(micro=5, mezo=20, macro=60)
+
+
+def _series(n: int = 2000, seed: int = 0) -> bars.Bars:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    stamps = pd.date_range("2024-01-01", periods=n, freq="min")
+    return bars.from_mapping(
+        {
+            "timestamp": stamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "open": np.r_[close[0], close[:-1]],
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+        }
+    )
+
+
+def test_predictions_match_engine():
+    feats = build_features(_series(300).columns, WINDOWS)
+    preds, valid = layer_predictions(feats.layers)
+    for t, row in enumerate(feats.blocks()):
+        if t % 13:
+            continue
+        expected, _ = engine_nf3p.predictions_and_backtest(
+            row["features_micro"], row["features_mezo"], row["features_macro"]
+        )
+        for j, level in enumerate(("L1", "L2", "L3")):
+            assert preds[t, j] == pytest.approx(expected[level], abs=1e-6)
+        assert valid[t].tolist() == [
+            bool(row["features_micro"]),
+            bool(row["features_mezo"]),
+            bool(row["features_macro"]),
+        ]
+
+
+def test_walk_forward_metrics_and_purge():
+    rng = np.random.default_rng(1)
+    n, h = 1000, 3
+    preds = rng.uniform(-1, 1, (n, 3))
+    returns = 0.01 * preds[:, 0] + rng.normal(0, 0.002, n)
+    returns[-h:] = np.nan
+    rep = walk_forward(preds, returns, folds=4, min_train=200, horizon=h)
+    assert [(f["start"], f["end"]) for f in rep["folds"]] == [
+        (200, 400),
+        (400, 600),
+        (600, 800),
+        (800, 1000),
+    ]
+    fold = rep["folds"][1]
+    train = slice(0, 400 - h + 1)
+    beta = (preds[train, 0] @ returns[train]) / (preds[train, 0] @ preds[train, 0])
+    assert fold["L1"]["beta"] == pytest.approx(beta)
+    p, r = preds[400:600, 0], returns[400:600]
+    assert fold["L1"]["mse"] == pytest.approx(np.mean((beta * p - r) ** 2))
+    assert fold["L1"]["hit_rate"] == pytest.approx(np.mean(np.sign(p) == np.sign(r)))
+    assert fold["L1"]["ic"] == pytest.approx(stats.spearmanr(p, r)[0])
+    assert rep["folds"][-1]["L1"]["n"] == 200 - h
+    summary = rep["summary"]
+    assert summary["L1"]["n"] == 800 - h
+    assert summary["L1"]["ic"] > 0.8 and summary["L1"]["hit_rate"] > 0.8
+    assert abs(summary["L2"]["ic"]) < 0.2
+    assert summary["L1"]["mse"] < summary["L2"]["mse"]
+    with pytest.raises(ValueError):
+        walk_forward(preds[:, :2], returns)
+    with pytest.raises(ValueError):
+        walk_forward(preds[:5], returns[:5], folds=10)
+
+
+def test_evaluate_series_and_cli(tmp_path, monkeypatch, capsys):
+    series = _series()
+    rep = evaluate_nf3p(series, WINDOWS, horizon=10, folds=5)
+    assert rep["mode"] == "v2.nf3p" and rep["rows"] == len(series)
+    assert rep["folds"][0]["from"] == "2024-01-01T05:33:00Z"
+    assert rep["summary"]["L3"]["n"] == len(series) - 333 - 10
+    assert np.isnan(forward_returns(series["close"], 10)[-10:]).all()
+
+    frame = pd.DataFrame(series.to_mapping())
+    frame.to_csv(tmp_path / "bars.csv", index=False)
+    argv = [
+        "btcmi",
+        "backtest",
+        "--mode",
+        "v2.nf3p",
+        "--input",
+        str(tmp_path / "bars.csv"),
+        "--horizon",
+        "10",
+        "--folds",
+        "5",
+        "--micro",
+        "5",
+        "--mezo",
+        "20",
+        "--macro",
+        "60",
+        "--out",
+        str(tmp_path / "report.json"),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    got = json.loads((tmp_path / "report.json").read_text())
+    assert got["summary"]["L1"] == pytest.approx(rep["summary"]["L1"])
+
+    argv[argv.index("--folds") + 1] = "5000"
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 2
+    monkeypatch.setattr(sys, "argv", argv[:3] + ["v1"] + argv[4:])
+    with pytest.raises(SystemExit):
+        btcmi.main()
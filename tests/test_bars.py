@@ -0,0 +1,144 @@
+import json
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cli.btcmi as btcmi
+from btcmi import bars
+from btcmi.enums import Window
+from btcmi.ohlcv import FeatureWindows, build_features, load_ohlcv
+
+R = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _frame(n: int = 3000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    stamps = pd.date_range("2024-01-01T00:03:00", periods=n, freq="min")
+    return pd.DataFrame(
+        {
+            "timestamp": stamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "open": close * (1 + rng.normal(0, 1e-4, n)),
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+            "open_interest": np.linspace(1.0, 2.0, n),
+        }
+    )
+
+
+def test_convert_roundtrip_is_memory_mapped(tmp_path):
+    frame = _frame()
+    frame.to_csv(tmp_path / "bars.csv", index=False)
+    bars.convert(tmp_path / "bars.csv", tmp_path / "store", chunk_rows=700)
+    store = bars.open_bars(tmp_path / "store")
+    assert len(store) == len(frame)
+    assert isinstance(store["close"], np.memmap)
+    assert store.timestamps.dtype == np.dtype("datetime64[s]")
+    for name in frame.columns[1:]:
+        assert np.allclose(store[name], frame[name].to_numpy(), rtol=1e-15)
+    assert list(store.iso_timestamps()) == list(frame["timestamp"])
+
+    part = store.between("2024-01-01T01:00:00Z", "2024-01-01T02:00:00Z")
+    assert len(part) == 60
+    assert np.shares_memory(part["close"], store["close"])
+    assert str(part.timestamps[0]) == "2024-01-01T01:00:00"
+    assert len(store.between(end=pd.Timestamp("2024-01-01T00:10:00"))) == 7
+    assert len(store.between("2030-01-01")) == 0
+
+
+@pytest.mark.parametrize("window", [Window.ONE_HOUR, Window.ONE_DAY, "5m", "7m", "2h"])
+def test_resample_matches_pandas(window):
+    frame = _frame()
+    rule = bars.parse_window(window)
+    got = bars.from_mapping(frame).resample(window)
+    ref = (
+        frame.assign(timestamp=pd.to_datetime(frame["timestamp"]))
+        .set_index("timestamp")
+        .resample(f"{rule}s", origin="epoch")
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+                "open_interest": "last",
+            }
+        )
+        .dropna()
+    )
+    assert np.array_equal(
+        got.timestamps, ref.index.tz_localize(None).to_numpy().astype("datetime64[s]")
+    )
+    for name in ref.columns:
+        assert np.allclose(got[name], ref[name].to_numpy(), rtol=1e-12), name
+
+
+def test_parse_window_and_validation(tmp_path):
+    assert bars.parse_window("15m") == 900
+    assert bars.parse_window(Window.ONE_DAY) == 86400
+    for bad in ("0h", "1w", "h", 5):
+        with pytest.raises(ValueError):
+            bars.parse_window(bad)
+    frame = _frame(10)
+    with pytest.raises(ValueError):
+        bars.from_mapping(frame.iloc[::-1])
+    frame.iloc[::-1].to_csv(tmp_path / "rev.csv", index=False)
+    with pytest.raises(ValueError):
+        bars.convert(tmp_path / "rev.csv", tmp_path / "rev")
+    with pytest.raises(ValueError):
+        bars.open_bars(tmp_path / "rev")
+    frame.drop(columns="timestamp").to_csv(tmp_path / "nots.csv", index=False)
+    with pytest.raises(ValueError):
+        bars.convert(tmp_path / "nots.csv", tmp_path / "nots")
+
+
+def test_examples_feed_feature_builder(tmp_path, monkeypatch, capsys):
+    for src in ("ohlcv.csv", "ohlcv.json"):
+        out = tmp_path / src
+        argv = [
+            "btcmi",
+            "convert-ohlcv",
+            "--input",
+            str(R / "examples" / src),
+            "--out",
+            str(out),
+        ]
+        monkeypatch.setattr(sys, "argv", argv)
+        assert btcmi.main() == 0
+        meta = json.loads((out / "meta.json").read_text())
+        assert meta["rows"] == 2
+        store = bars.open_bars(out)
+        ref = load_ohlcv(R / "examples" / src)
+        mapping = store.to_mapping()
+        assert list(mapping["timestamp"]) == list(ref["timestamp"])
+        windows = FeatureWindows(micro=2, mezo=2, macro=2)
+        got = list(build_features(mapping, windows).payloads())
+        assert got == list(build_features(ref, windows).payloads())
+
+
+def test_resample_many_is_hierarchical(monkeypatch):
+    series = bars.from_mapping(_frame(5000))
+    sources = []
+    aggregate = bars.Bars._aggregate
+
+    def spy(self, period):
+        sources.append((period, len(self)))
+        return aggregate(self, period)
+
+    monkeypatch.setattr(bars.Bars, "_aggregate", spy)
+    got = bars.resample_many(series, [Window.ONE_DAY, "1h", "5m", "7m", "1h"])
+    assert list(got) == ["1d", "1h", "5m", "7m"]
+    n5 = len(got["5m"])
+    assert sources == [(300, 5000), (420, 5000), (3600, n5), (86400, len(got["1h"]))]
+    monkeypatch.setattr(bars.Bars, "_aggregate", aggregate)
+    for key, res in got.items():
+        direct = series.resample(key)
+        assert np.array_equal(res.timestamps, direct.timestamps)
+        for name in direct.columns:
+            assert np.allclose(res[name], direct[name], rtol=1e-12), (key, name)
@@ -0,0 +1,60 @@
+import numpy as np
+from hypothesis import given, strategies as st
+
+from btcmi.batch import feature_matrix, normalize_matrix, score_matrix
+from btcmi.config import NORM_SCALE, SCALES, SCENARIO_WEIGHTS
+from btcmi.feature_processing import normalize_features, weighted_score
+
+COLUMNS = tuple(NORM_SCALE)
+
+_values = st.one_of(
+    st.floats(min_value=-1e6, max_value=1e6, allow_nan=False, allow_infinity=False),
+    st.integers(min_value=-1000, max_value=1000),
+    st.just("bad"),
+    st.none(),
+    st.booleans(),
+)
+
+
+@given(
+    st.lists(
+        st.dictionaries(keys=st.sampled_from(COLUMNS + ("extra",)), values=_values),
+        max_size=20,
+    ),
+    st.sampled_from(sorted(SCENARIO_WEIGHTS)),
+)
+def test_score_matrix_matches_scalar_path(rows, scenario):
+    weights = SCENARIO_WEIGHTS[scenario]
+    res = score_matrix(feature_matrix(rows, COLUMNS), NORM_SCALE, weights)
+    for i, feats in enumerate(rows):
+        norm = normalize_features(feats, NORM_SCALE)
+        score, contrib = weighted_score(norm, weights)
+        assert res.score[i] == score
+        for j, k in enumerate(COLUMNS):
+            assert bool(res.mask[i, j]) == (k in norm)
+            if k in norm:
+                assert res.normalized[i, j] == norm[k]
+                assert res.contributions[i, j] == contrib[k]
+
+
+def test_feature_matrix_masks_missing_and_non_numeric():
+    fm = feature_matrix(
+        [{"price_change_pct": 1, "volume_change_pct": "x"}, {}], COLUMNS
+    )
+    assert fm.values.shape == (2, len(COLUMNS))
+    assert fm.mask[0].tolist() == [True, False, False, False, False]
+    assert not fm.mask[1].any()
+    assert len(fm) == 2
+
+
+def test_score_matrix_empty_row_scores_zero():
+    res = score_matrix(feature_matrix([{}], COLUMNS), NORM_SCALE, {"a": 1.0})
+    assert res.score.tolist() == [0.0]
+
+
+def test_normalize_matrix_fast_path_close_to_exact():
+    rows = [{k: float(i) for k in SCALES["L1"]} for i in range(-50, 50)]
+    fm = feature_matrix(rows, tuple(SCALES["L1"]))
+    exact = normalize_matrix(fm, SCALES["L1"])
+    fast = normalize_matrix(fm, SCALES["L1"], exact=False)
+    np.testing.assert_allclose(fast, exact, rtol=0, atol=1e-15)
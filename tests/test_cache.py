@@ -0,0 +1,83 @@
+import json
+import pickle
+from pathlib import Path
+
+import pytest
+
+from btcmi.cache import CACHE_HITS, ResultCache, cache_key
+from btcmi.runner import run_v1, run_v2
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def test_hit_matches_uncached_output_and_restamps():
+    cache = ResultCache()
+    data = _example("intraday")
+    first = run_v1(data, TS, cache=cache)
+    hits = CACHE_HITS.labels(mode="v1")._value.get()
+    other = dict(data, lineage={"run_id": "f" * 32})
+    again = run_v1(other, "2025-02-02T00:00:00Z", cache=cache)
+    assert CACHE_HITS.labels(mode="v1")._value.get() == hits + 1
+    assert again == run_v1(other, "2025-02-02T00:00:00Z")
+    assert first == run_v1(data, TS)
+    assert len(cache) == 1
+
+
+def test_key_covers_only_scoring_fields():
+    data = _example("intraday_fractal")
+    base = cache_key("v2.fractal", data)
+    assert base == cache_key("v2.fractal", dict(data, lineage={}, freshness_seconds=5))
+    assert base != cache_key("v2.nf3p", data)
+    assert base != cache_key("v2.fractal", dict(data, vol_regime_pctl=0.9))
+    nodes = [{"id": "a", "weight": 1.0, "score": 0.5}]
+    renamed = [{"id": "b", "weight": 1.0, "score": 0.5}]
+    assert cache_key("v1", {"nagr_nodes": nodes}) == cache_key(
+        "v1", {"nagr_nodes": renamed}
+    )
+    assert cache_key("v1", {"nagr_nodes": [1]}) is None
+
+
+def test_ttl_defaults_to_freshness_seconds():
+    clock = Clock()
+    cache = ResultCache(ttl=100.0, clock=clock)
+    data = dict(_example("intraday_fractal"), freshness_seconds=10)
+    run_v2(data, TS, cache=cache)
+    clock.now = 9.0
+    assert cache.get(cache_key("v2.fractal", data)) is not None
+    clock.now = 10.0
+    assert cache.get(cache_key("v2.fractal", data)) is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResultCache(max_entries=2)
+    for i in range(3):
+        cache.put(str(i), {}, {"v": i})
+    cache.get("1")
+    cache.put("3", {}, {"v": 3})
+    assert cache.get("0") is None and cache.get("2") is None
+    assert cache.get("1") == {"v": 1}
+
+    small = ResultCache(max_bytes=len(pickle.dumps({"v": "x" * 10}, protocol=5)) + 5)
+    small.put("a", {}, {"v": "x" * 10})
+    small.put("b", {}, {"v": "y" * 10})
+    assert len(small) == 1 and small.get("b") is not None
+    assert small.nbytes <= small.max_bytes
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=0)
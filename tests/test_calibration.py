@@ -0,0 +1,164 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from scipy.optimize import approx_fprime
+
+import cli.btcmi as btcmi
+from btcmi import api, calibration, plans
+from btcmi.runner import run_v1
+
+R = Path(__file__).resolve().parents[1]
+TS = "2024-01-01T00:00:00Z"
+SCALES = {
+    "price_change_pct": 3.0,
+    "volume_change_pct": 30.0,
+    "funding_rate_bps": 8.0,
+    "oi_change_pct": 15.0,
+    "onchain_active_addrs_change_pct": 25.0,
+}
+
+
+def _weights(seed):
+    rng = np.random.default_rng(seed)
+    return {
+        name: {k: float(v) for k, v in zip(SCALES, rng.dirichlet(np.ones(5)))}
+        for name in ("intraday", "scalp", "swing")
+    }
+
+
+def _records(n, weights, scales, seed=0):
+    rng = np.random.default_rng(seed)
+    plans.compile_plans(weights, scales)
+    try:
+        out = []
+        for i in range(n):
+            feats = {k: float(rng.normal(0, s)) for k, s in SCALES.items()}
+            if i % 7 == 0:
+                del feats["oi_change_pct"]
+            payload = {
+                "schema_version": "2.0.0",
+                "lineage": {"request_id": "1234567890abcdef1234567890abcd01"},
+                "scenario": ("intraday", "scalp", "swing")[i % 3],
+                "window": "1h",
+                "features": feats,
+                "nagr_nodes": [{"weight": 1.0, "score": float(rng.uniform(-1, 1))}],
+            }
+            ref = run_v1(payload, TS)["summary"]["overall_signal"]
+            out.append({"input": payload, "reference_overall_signal": ref})
+        return out
+    finally:
+        plans.compile_plans()
+
+
+def test_predict_matches_run_v1():
+    every = sorted((R / "examples").glob("real_*.json"))
+    paths = [
+        p for p in every if json.loads(p.read_text())["input"].get("mode", "v1") == "v1"
+    ]
+    assert paths and len(paths) < len(every)
+    ref = calibration.load_reference(every)
+    assert len(ref) == len(paths) and ref.skipped == len(every) - len(paths)
+    expected = [
+        run_v1(json.loads(p.read_text())["input"], TS)["summary"]["overall_signal"]
+        for p in paths
+    ]
+    np.testing.assert_allclose(calibration.predict(ref), expected, atol=1e-6)
+
+
+def test_jacobian_is_analytic_gradient():
+    ref = calibration.reference_set(_records(60, _weights(1), SCALES))
+    model = calibration._Model(ref, *calibration._current(), True)
+    theta = model.initial()
+    numeric = np.array(
+        [
+            approx_fprime(theta, lambda t, i=i: model.residuals(t)[i], 1e-7)
+            for i in range(0, 60, 7)
+        ]
+    )
+    np.testing.assert_allclose(model.jacobian(theta)[::7], numeric, atol=1e-5)
+
+
+@pytest.mark.parametrize("fit_scales", [False, True])
+def test_calibrate_recovers_planted_config(fit_scales):
+    truth = _weights(2)
+    scales = SCALES if fit_scales else dict(plans.V1_NORM.scale_map)
+    ref = calibration.reference_set(_records(1200, truth, scales))
+    res = calibration.calibrate(ref, fit_scales=fit_scales)
+    assert res["format"] == "btcmi-calibration" and res["version"] == 1
+    assert res["metrics"]["after"]["rmse"] < 1e-5 < res["metrics"]["before"]["rmse"]
+    for name, row in truth.items():
+        assert res["scenario_weights"][name] == pytest.approx(row, abs=1e-4)
+    if fit_scales:
+        assert res["norm_scale"] == pytest.approx(SCALES, rel=1e-3)
+
+
+def test_calibration_artifact_loads_into_plans(tmp_path):
+    truth = _weights(3)
+    recs = _records(300, truth, dict(plans.V1_NORM.scale_map))
+    res = calibration.calibrate(calibration.reference_set(recs))
+    path = tmp_path / "calibration.json"
+    calibration.write_calibration(path, res)
+    try:
+        calibration.load_calibration(path)
+        got = run_v1(recs[0]["input"], TS)["summary"]["overall_signal"]
+        assert got == pytest.approx(recs[0]["reference_overall_signal"], abs=1e-5)
+    finally:
+        plans.compile_plans()
+    path.write_text(json.dumps(dict(res, version=2)))
+    with pytest.raises(ValueError):
+        calibration.load_calibration(path)
+    path.write_text(json.dumps(dict(res, norm_scale={"price_change_pct": 0})))
+    with pytest.raises(ValueError):
+        calibration.load_calibration(path)
+    with pytest.raises(ValueError):
+        calibration.reference_set([{"input": {"scenario": "swing"}}])
+
+
+def test_api_installs_calibration(tmp_path, monkeypatch):
+    recs = _records(300, _weights(5), dict(plans.V1_NORM.scale_map))
+    path = tmp_path / "calibration.json"
+    calibration.write_calibration(
+        path, calibration.calibrate(calibration.reference_set(recs))
+    )
+    payload, ref = recs[0]["input"], recs[0]["reference_overall_signal"]
+    nodes = payload["nagr_nodes"]
+    payload["nagr_nodes"] = [dict(n, id=f"n{i}") for i, n in enumerate(nodes)]
+    monkeypatch.setenv("BTCMI_CALIBRATION", str(path))
+    api.calibration_config.cache_clear()
+    api.load_runners.cache_clear()
+    try:
+        with TestClient(api.app):
+            got = run_v1(payload, TS)["summary"]["overall_signal"]
+            assert got == pytest.approx(ref, abs=1e-5)
+        plans.compile_plans()
+        api.calibration_config.cache_clear()
+        api.load_runners.cache_clear()
+        api._req_times.clear()
+        resp = TestClient(api.app).post(
+            "/run/batch", json=[payload], headers={"X-API-Key": "changeme"}
+        )
+        got = resp.json()[0]["summary"]["overall_signal"]
+        assert got == pytest.approx(ref, abs=1e-5)
+    finally:
+        plans.compile_plans()
+        api.calibration_config.cache_clear()
+        api.load_runners.cache_clear()
+
+
+def test_calibrate_cli(tmp_path, monkeypatch, capsys):
+    recs = _records(90, _weights(4), dict(plans.V1_NORM.scale_map))
+    src = tmp_path / "ref.jsonl"
+    src.write_text("".join(json.dumps(r) + "\n" for r in recs))
+    out = tmp_path / "calibration.json"
+    argv = ["btcmi", "calibrate", "--input", str(src), "--out", str(out)]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    doc = json.loads(out.read_text())
+    assert doc["rows"] == 90 and doc["skipped"] == 0
+    assert doc["metrics"]["after"]["mae"] < 1e-5
+    monkeypatch.setattr(sys, "argv", argv[:3] + [str(tmp_path / "missing.json")])
+    assert btcmi.main() == 2
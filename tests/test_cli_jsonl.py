@@ -0,0 +1,124 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import cli.btcmi as btcmi
+from btcmi.runner import run_v1, run_v2
+from btcmi.stream import iter_chunks
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+def _example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def test_jsonl_stdin_preserves_order_and_reports_errors(monkeypatch, capsys):
+    good = _example("intraday")
+    lines = [
+        json.dumps(good),
+        "{bad",
+        "",
+        json.dumps({"schema_version": "2.0.0"}),
+        json.dumps(dict(good, scenario="swing")),
+    ]
+    argv = [
+        "btcmi",
+        "run",
+        "--input",
+        "-",
+        "--mode",
+        "v1",
+        "--input-format",
+        "jsonl",
+        "--chunk-size",
+        "2",
+        "--fixed-ts",
+        TS,
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    code = btcmi.main()
+    captured = capsys.readouterr()
+    assert code == 2
+    out = [json.loads(line) for line in captured.out.splitlines()]
+    assert len(out) == 4
+    assert out[0] == run_v1(good, TS)
+    assert out[1]["error"] == "invalid_json" and out[1]["line"] == 2
+    assert out[2]["error"] == "input_schema_validation_failed"
+    assert out[2]["line"] == 4
+    assert out[3]["summary"]["scenario"] == "swing"
+    assert "4 lines (2 ok, 2 failed)" in captured.err
+
+
+def test_jsonl_file_to_out_file(monkeypatch, tmp_path, capsys):
+    data = _example("intraday_fractal")
+    src = tmp_path / "in.jsonl"
+    src.write_text("\n".join(json.dumps(data) for _ in range(3)) + "\n")
+    dst = tmp_path / "out.jsonl"
+    argv = [
+        "btcmi",
+        "run",
+        "--input",
+        str(src),
+        "--out",
+        str(dst),
+        "--mode",
+        "v2.fractal",
+        "--input-format",
+        "jsonl",
+        "--fixed-ts",
+        TS,
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    assert capsys.readouterr().out == ""
+    lines = dst.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [run_v2(data, TS)] * 3
+    assert all(": " not in line for line in lines)
+
+
+def test_jsonl_undecodable_line_is_reported_per_line(monkeypatch, tmp_path, capsys):
+    good = json.dumps(_example("intraday")).encode("utf-8")
+    src = tmp_path / "in.jsonl"
+    src.write_bytes(good + b"\n" + b'{"scenario": "\xff"}\n' + good + b"\n")
+    argv = [
+        "btcmi",
+        "run",
+        "--input",
+        str(src),
+        "--mode",
+        "v1",
+        "--input-format",
+        "jsonl",
+        "--fixed-ts",
+        TS,
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 2
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [rec.get("error") for rec in out] == [None, "invalid_json", None]
+    assert out[1]["line"] == 2
+
+
+def test_jsonl_missing_input(monkeypatch, capsys):
+    argv = [
+        "btcmi",
+        "--json-errors",
+        "run",
+        "--input",
+        "missing.jsonl",
+        "--mode",
+        "v1",
+        "--input-format",
+        "jsonl",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 2
+    assert json.loads(capsys.readouterr().out)["error"] == "input_file_not_found"
+
+
+def test_iter_chunks_bounded():
+    assert [len(c) for c in iter_chunks(range(5), 2)] == [2, 2, 1]
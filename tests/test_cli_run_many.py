@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import cli.btcmi as btcmi
+from btcmi import parallel
+from btcmi.runner import run_nf3p, run_v1, run_v2
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+def _example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def _tree(root: Path) -> None:
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "one.json").write_text(json.dumps(_example("intraday")))
+    (root / "a" / "two.json").write_text(json.dumps(_example("intraday_fractal")))
+    (root / "a" / "b" / "bad.json").write_text("{bad")
+    (root / "a" / "notes.txt").write_text("ignored")
+
+
+def test_run_many_mirrors_tree_and_reports_status(tmp_path, monkeypatch, capsys):
+    src, out = tmp_path / "in", tmp_path / "out"
+    _tree(src)
+    argv = [
+        "btcmi",
+        "run-many",
+        "--input",
+        str(src),
+        "--out-dir",
+        str(out),
+        "--workers",
+        "2",
+        "--chunk-size",
+        "1",
+        "--fixed-ts",
+        TS,
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 2
+    lines = capsys.readouterr().out.splitlines()
+    status = {Path(line.split("\t")[1]).name: line.split("\t")[0] for line in lines}
+    assert status == {"one.json": "ok", "two.json": "ok", "bad.json": "invalid_json"}
+    assert json.loads((out / "one.json").read_text()) == run_v1(
+        _example("intraday"), TS
+    )
+    assert json.loads((out / "a" / "two.json").read_text()) == run_v2(
+        _example("intraday_fractal"), TS
+    )
+    assert not (out / "a" / "b" / "bad.json").exists()
+
+
+def test_run_many_resume_skips_completed(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    _tree(src)
+    (src / "a" / "b" / "bad.json").unlink()
+    root, files = parallel.discover(src)
+    first = parallel.run_many(files, root, out, fixed_ts=TS, workers=1)
+    assert [r.status for r in first] == ["ok", "ok"]
+    stale = src / "one.json"
+    os.utime(stale, (os.path.getmtime(out / "one.json") + 10,) * 2)
+    again = parallel.run_many(files, root, out, fixed_ts=TS, workers=1, resume=True)
+    assert {Path(r.path).name: r.status for r in again} == {
+        "two.json": "skipped",
+        "one.json": "ok",
+    }
+
+
+def test_glob_and_mode_override(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    _tree(src)
+    root, files = parallel.discover(str(src / "**" / "two.json"))
+    assert root == src and [f.name for f in files] == ["two.json"]
+    res = parallel.run_many(files, root, out, mode="v2.nf3p", fixed_ts=TS, workers=1)
+    assert res[0].ok
+    assert json.loads((out / "a" / "two.json").read_text()) == run_nf3p(
+        _example("intraday_fractal"), TS
+    )
+
+
+def test_out_dir_inside_input_is_not_rescored(tmp_path):
+    src = tmp_path / "in"
+    _tree(src)
+    (src / "a" / "b" / "bad.json").unlink()
+    out = src / "out"
+    root, files = parallel.discover(src, exclude=out)
+    parallel.run_many(files, root, out, fixed_ts=TS, workers=1)
+    root, again = parallel.discover(src, exclude=out)
+    assert again == files
+    assert [f.name for f in parallel.discover(src)[1]].count("one.json") == 2
@@ -0,0 +1,164 @@
+import json
+import pathlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from btcmi import api
+from btcmi.api import _req_times, app
+from btcmi.feature_store import FeatureStore, merge_snapshot
+from btcmi.runner import run_v1, run_v2
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def test_patch_snapshot_and_expiry():
+    clock = Clock()
+    store = FeatureStore(clock=clock)
+    store.patch("BTC", "1h", {"features_micro": {"a": 1.0, "b": 2.0}}, 10)
+    store.patch("BTC", "1h", {"features_micro": {"c": 3.0}})
+    store.patch("BTC", "1d", {"features_micro": {"a": 9.0}})
+    clock.now = 5.0
+    store.patch("BTC", "1h", {"features_micro": {"b": 4.0, "c": None}}, 10)
+    assert store.snapshot("BTC", "1h").layers == {
+        "features_micro": {"a": 1.0, "b": 4.0}
+    }
+    clock.now = 12.0
+    snap = store.snapshot("BTC", "1h")
+    assert snap.layers == {"features_micro": {"b": 4.0}}
+    assert snap.stale == ["features_micro.a"]
+    desc = store.describe("BTC", "1h")["features_micro"]
+    assert desc["a"]["stale"] and desc["a"]["age_seconds"] == 12.0
+    assert not desc["b"]["stale"]
+    assert store.snapshot("BTC", "1d").layers == {"features_micro": {"a": 9.0}}
+    assert store.drop("BTC", "1d") == 1
+    assert store.snapshot("BTC", "1d").layers == {}
+
+
+def test_invalid_patches_apply_nothing():
+    store = FeatureStore(max_keys=1)
+    for args in (
+        ("BTC", "5m", {"features": {"a": 1.0}}),
+        ("BTC", "1h", {"features_other": {"a": 1.0}}),
+        ("BTC", "1h", {"features": {"a": 1.0, "b": "x"}}),
+        ("BTC", "1h", {"features": {"a": float("nan")}}),
+        ("BTC", "1h", {"features": {"a": 10**400}}),
+        ("BTC", "1h", {"features": {"a": 1.0}}, "x"),
+    ):
+        with pytest.raises(ValueError):
+            store.patch(*args)
+    assert len(store) == 0
+    store.patch("BTC", "1h", {"features": {"a": 1.0}})
+    with pytest.raises(ValueError):
+        store.patch("ETH", "1h", {"features": {"a": 1.0}})
+    with pytest.raises(ValueError):
+        store.patch("BTC", "1h", {"features": {"a": 1.0}}, -1)
+
+
+def test_expired_and_empty_keys_are_purged():
+    clock = Clock()
+    store = FeatureStore(max_keys=2, max_fields=2, retention=5, clock=clock)
+    store.patch("BTC", "1h", {"features": {"a": 1.0}}, 10)
+    store.patch("ETH", "1h", {"features": {"a": 1.0, "b": 2.0}}, 10**400)
+    with pytest.raises(ValueError, match="fields per key"):
+        store.patch("BTC", "1h", {"features": {"b": 1.0, "c": 1.0}})
+    store.patch("BTC", "1h", {"features": {"b": 1.0, "a": None}})
+    assert store.patch("BTC", "1h", {"features": {"b": None}}) == {"features": 0}
+    assert len(store) == 1
+    store.patch("BTC", "1h", {"features": {"a": 1.0}}, 10)
+    clock.now = 12.0
+    assert store.snapshot("BTC", "1h").stale == ["features.a"]
+    clock.now = 16.0
+    # A full store first sweeps fields that expired beyond the retention.
+    store.patch("SOL", "1h", {"features": {"a": 1.0}})
+    assert len(store) == 2
+    assert store.snapshot("BTC", "1h") == ({}, [])
+
+
+def test_merge_snapshot_prefers_inline_fields():
+    store = FeatureStore()
+    store.patch("BTC", "1h", {"features": {"a": 1.0, "b": 2.0}})
+    merged = merge_snapshot({"features": {"b": 5.0}}, store.snapshot("BTC", "1h"))
+    assert merged["features"] == {"a": 1.0, "b": 5.0}
+
+
+def test_api_patch_and_run(monkeypatch, strip_asof):
+    _req_times.clear()
+    clock = Clock()
+    monkeypatch.setattr(api, "feature_store", lambda: store)
+    store = FeatureStore(clock=clock)
+    client = TestClient(app)
+
+    v1 = _load_example("intraday")
+    meta = {k: v for k, v in v1.items() if k != "features"}
+    resp = client.patch(
+        "/features/BTC-USD",
+        json={"window": v1["window"], "features": v1["features"]},
+        headers=HEADERS,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["fields"] == {"features": len(v1["features"])}
+    resp = client.post("/run/BTC-USD", json=meta, headers=HEADERS)
+    assert resp.status_code == 200
+    assert strip_asof(resp.json()) == strip_asof(run_v1(v1, None))
+
+    patch = {
+        "window": v1["window"],
+        "freshness_seconds": 5,
+        "features": {"funding_rate_bps": 3.0},
+    }
+    client.patch("/features/BTC-USD", json=patch, headers=HEADERS)
+    expected = dict(v1, features=dict(v1["features"], funding_rate_bps=3.0))
+    resp = client.post("/run/BTC-USD", json=meta, headers=HEADERS)
+    assert strip_asof(resp.json()) == strip_asof(run_v1(expected, None))
+
+    clock.now = 6.0
+    out = client.post("/run/BTC-USD", json=meta, headers=HEADERS).json()
+    validate_json(out, SCHEMA_REGISTRY["output"])
+    assert "stale_feature:features.funding_rate_bps" in out["summary"]["advisories"]
+    assert "funding_rate_bps" not in out["details"]["normalized_features"]
+    assert "stale_feature:" not in " ".join(out["details"]["diagnostics"]["notes"])
+    layers = client.get(
+        "/features/BTC-USD", params={"window": v1["window"]}, headers=HEADERS
+    ).json()["layers"]
+    assert layers["features"]["funding_rate_bps"]["stale"] is True
+
+    v2 = _load_example("intraday_fractal")
+    blocks = {k: v2[k] for k in ("features_micro", "features_mezo", "features_macro")}
+    body = dict(blocks, window=v2["window"])
+    client.patch("/features/BTC-PERP", json=body, headers=HEADERS)
+    meta2 = {k: v for k, v in v2.items() if k not in blocks}
+    resp = client.post(
+        "/run/BTC-PERP",
+        json=dict(meta2, mode=["v2.fractal", "v2.nf3p"]),
+        headers=HEADERS,
+    )
+    assert resp.status_code == 200
+    assert strip_asof(resp.json()["v2.fractal"]) == strip_asof(run_v2(v2, None))
+
+    assert client.post("/run/ETH-USD", json=meta, headers=HEADERS).status_code == 404
+    bad = {"window": "1h", "features": {"a": "x"}}
+    assert (
+        client.patch("/features/BTC-USD", json=bad, headers=HEADERS).status_code == 422
+    )
+    reserved = {"window": "1h", "features": {"a": 1.0}}
+    assert (
+        client.patch("/features/batch", json=reserved, headers=HEADERS).status_code
+        == 400
+    )
+    assert client.delete("/features/BTC-USD", headers=HEADERS).status_code == 204
+    assert client.post("/run/BTC-USD", json=meta, headers=HEADERS).status_code == 404
@@ -0,0 +1,58 @@
+import json
+import pathlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from btcmi.api import _req_times, app
+from btcmi.runner import run_multi, run_nf3p, run_v1, run_v2
+
+R = pathlib.Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+HEADERS = {"X-API-Key": "changeme"}
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+@pytest.mark.parametrize("name", ["intraday_fractal", "swing_fractal"])
+def test_run_multi_matches_single_runs(name):
+    data = _load_example(name)
+    out = run_multi(data, TS, ["v2.nf3p", "v2.fractal", "v2.nf3p"])
+    assert list(out) == ["v2.nf3p", "v2.fractal"]
+    assert out["v2.fractal"] == run_v2(data, TS)
+    assert out["v2.nf3p"] == run_nf3p(data, TS)
+
+
+def test_run_multi_with_v1_and_errors(tmp_path):
+    data = dict(_load_example("intraday_fractal"))
+    data["features"] = _load_example("intraday")["features"]
+    path = tmp_path / "out.json"
+    out = run_multi(data, TS, ["v1", "v2.fractal"], out_path=path)
+    assert out["v1"] == run_v1(data, TS)
+    assert json.loads(path.read_text()) == out
+    with pytest.raises(ValueError, match="unknown mode"):
+        run_multi(data, TS, ["v3"])
+    with pytest.raises(ValueError):
+        run_multi(data, TS, [])
+
+
+def test_api_run_with_mode_list():
+    _req_times.clear()
+    client = TestClient(app)
+    data = _load_example("intraday_fractal")
+    body = dict(data, mode=["v2.fractal", "v2.nf3p"])
+    resp = client.post("/run", json=body, headers=HEADERS)
+    assert resp.status_code == 200
+    out = resp.json()
+    assert set(out) == {"v2.fractal", "v2.nf3p"}
+    assert out["v2.nf3p"]["predictions"] == run_nf3p(data, TS)["predictions"]
+    assert out["v2.fractal"]["summary"] == run_v2(data, TS)["summary"]
+
+    resp = client.post("/run", json=dict(data, mode=["v1"]), headers=HEADERS)
+    assert resp.status_code == 400
+    resp = client.post(
+        "/run", json=dict(data, mode=["v2.fractal", "x"]), headers=HEADERS
+    )
+    assert resp.status_code == 400 and "unknown mode" in resp.json()["detail"]
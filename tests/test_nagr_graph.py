@@ -0,0 +1,164 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from btcmi import engine_v1 as v1
+from btcmi import engine_v2 as v2
+from btcmi.api import _req_times, app, nodeset_registry
+from btcmi.nagr_graph import NodeGraph
+from btcmi.nodesets import NodeSet
+from btcmi.runner import run_v1, run_v2
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+NODES = [
+    {"id": "a", "weight": 1.0, "score": 0.5},
+    {"id": "b", "weight": 2.0, "score": -0.3},
+    {"id": "c", "weight": 0.5, "score": 0.9},
+]
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def _random_graph(n: int, m: int, seed: int = 0, **kwargs) -> NodeGraph:
+    rng = np.random.default_rng(seed)
+    return NodeGraph(
+        [f"n{i}" for i in range(n)],
+        rng.uniform(-1, 3, n),
+        rng.uniform(-1, 1, n),
+        rng.integers(0, n, m),
+        rng.integers(0, n, m),
+        rng.uniform(0, 1, m),
+        **kwargs,
+    )
+
+
+def test_zero_damping_matches_flat_score():
+    g = NodeGraph.from_records(NODES, [("a", "b"), ("b", "c", 2.0)], damping=0.0)
+    assert g.score() == pytest.approx(v1.nagr_score(NODES))
+    assert v2.nagr(g) == pytest.approx(v2.nagr(NODES))
+
+
+def test_chain_closed_form():
+    d = 0.5
+    g = NodeGraph.from_records(NODES[:2], [{"source": "a", "target": "b"}], damping=d)
+    g.score()
+    x = g.solution()
+    assert x["b"] == pytest.approx(-0.3)
+    assert x["a"] == pytest.approx((1 - d) * 0.5 + d * -0.3)
+    assert g.converged and g.iterations >= 1
+
+
+def test_fixed_point_matches_direct_solve():
+    g = _random_graph(300, 1500, tol=1e-12, max_iter=1000)
+    g.score()
+    n = len(g)
+    d = g.damping
+    a = sparse.identity(n) - d * (g._matrix + sparse.diags(g._dangling))
+    expected = spsolve(a.tocsc(), (1 - d) * g._scores)
+    x = np.array([g.solution()[k] for k in g.ids])
+    assert np.allclose(x, expected, atol=1e-9)
+    assert np.all(np.abs(x) <= 1.0)
+
+
+def test_warm_start_and_iteration_cap():
+    g = _random_graph(2000, 10000)
+    g.score()
+    cold = g.iterations
+    assert g.converged and cold > 1
+    g.score()
+    assert g.iterations == 0
+    nodes = [{"id": "n0", "weight": 1.0, "score": 1.0}]
+    g.update(nodes)
+    g.score()
+    assert g.converged and 0 < g.iterations < cold
+
+    capped = _random_graph(2000, 10000, max_iter=3)
+    capped.score()
+    assert capped.iterations == 3 and not capped.converged
+    assert "converged=false" in capped.diagnostics()[0]
+
+
+def test_invalid_graphs():
+    with pytest.raises(ValueError):
+        NodeGraph.from_records(NODES, [("a", "zz")])
+    with pytest.raises(ValueError):
+        NodeGraph.from_records(NODES, [("a", "b", -1.0)])
+    with pytest.raises(ValueError):
+        NodeGraph.from_records(NODES, damping=1.0)
+    g = NodeGraph.from_records(NODES)
+    with pytest.raises(ValueError):
+        g.update([{"id": "zz", "weight": 1.0, "score": 0.0}])
+
+
+def test_runners_report_iterations_in_diagnostics():
+    g = NodeGraph.from_records(NODES, [("a", "b"), ("b", "c"), ("c", "a")])
+    out = run_v1(dict(_load_example("intraday"), nagr_nodes=g), None)
+    validate_json(out, SCHEMA_REGISTRY["output"])
+    assert out["summary"]["nagr_score"] == round(g.score(), 6)
+    assert out["summary"]["advisories"] == []
+    (note,) = [n for n in out["details"]["diagnostics"]["notes"] if "propagation" in n]
+    assert note.startswith("nagr_propagation:iterations=")
+
+    ns = NodeSet(NODES)
+    ns.set_edges([{"source": "a", "target": "b"}], damping=0.5)
+    out = run_v2(dict(_load_example("intraday_fractal"), nagr_nodes=ns), None)
+    validate_json(out, SCHEMA_REGISTRY["output"])
+    assert any("propagation" in n for n in out["details"]["diagnostics"]["notes"])
+
+
+def test_nodeset_graph_follows_updates():
+    ns = NodeSet(NODES)
+    ns.set_edges([("a", "b"), ("b", "c"), ("c", "d")], damping=0.6, tol=1e-12)
+    ns.upsert([{"id": "d", "weight": 1.0, "score": -1.0}])
+    ns.delete(["a"])
+    current = ns.nodes()
+    expected = NodeGraph.from_records(
+        current, [("b", "c"), ("c", "d")], damping=0.6, tol=1e-12
+    ).score()
+    assert ns.score() == pytest.approx(expected, abs=1e-9)
+    ns.upsert([{"id": "b", "weight": 3.0, "score": 0.2}])
+    expected = NodeGraph.from_records(
+        ns.nodes(), [("b", "c"), ("c", "d")], damping=0.6, tol=1e-12
+    ).score()
+    assert ns.score() == pytest.approx(expected, abs=1e-9)
+    ns.set_edges(None)
+    assert ns.score() == pytest.approx(v1.nagr_score(ns.nodes()))
+    assert ns.diagnostics() == []
+
+
+def test_api_graph_nodeset():
+    _req_times.clear()
+    nodeset_registry.cache_clear()
+    client = TestClient(app)
+    body = {
+        "nodes": NODES,
+        "edges": [{"source": "a", "target": "b", "weight": 2.0}],
+        "propagation": {"damping": 0.5},
+    }
+    resp = client.post("/nodesets", json=body, headers=HEADERS)
+    assert resp.status_code == 201
+    info = resp.json()
+    assert info["edges"] == 1 and info["diagnostics"]
+    expected = NodeGraph.from_records(NODES, [("a", "b")], damping=0.5).score()
+    assert info["nagr_score"] == pytest.approx(expected)
+
+    base = {k: v for k, v in _load_example("intraday").items() if k != "nagr_nodes"}
+    resp = client.post(
+        "/run", json=dict(base, nagr_nodeset=info["handle"]), headers=HEADERS
+    )
+    assert resp.status_code == 200
+    notes = resp.json()["details"]["diagnostics"]["notes"]
+    assert any(n.startswith("nagr_propagation:") for n in notes)
+
+    bad = {"edges": [{"source": "a", "target": "b", "weight": -1}]}
+    resp = client.patch(f"/nodesets/{info['handle']}", json=bad, headers=HEADERS)
+    assert resp.status_code == 400
@@ -0,0 +1,174 @@
+import json
+import pathlib
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from btcmi import engine_v1 as v1
+from btcmi import engine_v2 as v2
+from btcmi.api import _req_times, app, nodeset_registry
+from btcmi.cache import cache_key
+from btcmi.nodesets import NodeSet, NodeSetRegistry
+from btcmi.runner import run_multi, run_v1, run_v2
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def _nodes(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {"id": f"n{i}", "weight": rng.uniform(-2, 5), "score": rng.uniform(-1, 1)}
+        for i in range(n)
+    ]
+
+
+def test_nodeset_matches_full_recomputation_under_churn():
+    rng = random.Random(1)
+    ns = NodeSet(_nodes(50))
+    shadow = {n["id"]: n for n in _nodes(50)}
+    for step in range(2000):
+        if rng.random() < 0.3 and shadow:
+            victim = rng.choice(sorted(shadow))
+            assert ns.delete([victim, "missing"]) == 1
+            del shadow[victim]
+        else:
+            node = {
+                "id": f"n{rng.randrange(80)}",
+                "weight": rng.uniform(-1e3, 1e3),
+                "score": rng.uniform(-1, 1),
+            }
+            ns.upsert([node])
+            shadow[node["id"]] = node
+        if step % 97 == 0:
+            expected = v1.nagr_score(list(shadow.values()))
+            assert ns.score() == pytest.approx(expected, abs=1e-12)
+    assert len(ns) == len(shadow)
+    assert v1.nagr_score(ns) == pytest.approx(v1.nagr_score(list(shadow.values())))
+    assert v2.nagr(ns) == pytest.approx(v2.nagr(list(shadow.values())))
+    assert ns.version > 0
+
+
+def test_nodeset_rejects_malformed_nodes_atomically():
+    ns = NodeSet(_nodes(3))
+    before = ns.aggregates()
+    with pytest.raises(ValueError):
+        ns.upsert(
+            [
+                {"id": "ok", "weight": 1.0, "score": 0.5},
+                {"id": "bad", "weight": 1.0, "score": 2},
+            ]
+        )
+    with pytest.raises(ValueError):
+        ns.upsert([{"weight": 1.0, "score": 0.5}])
+    with pytest.raises(ValueError, match="finite"):
+        ns.upsert([{"id": "huge", "weight": 10**400, "score": 0.5}])
+    assert ns.aggregates() == before
+    assert "ok" not in ns
+    assert NodeSet().score() == 0.0
+    ns.delete([n["id"] for n in _nodes(3)])
+    assert ns.score() == 0.0 and ns.aggregates() == (0.0, 0.0)
+
+
+def test_registry_handles():
+    reg = NodeSetRegistry(max_sets=1)
+    ns = reg.register(_nodes(2))
+    assert reg.get(ns.handle) is ns
+    with pytest.raises(ValueError):
+        reg.register([])
+    reg.drop(ns.handle)
+    with pytest.raises(KeyError):
+        reg.get(ns.handle)
+
+
+def test_runners_accept_nodeset_and_cache_key_tracks_version(strip_asof):
+    nodes = [
+        {"id": "a", "weight": 0.6, "score": 0.4},
+        {"id": "b", "weight": 0.4, "score": -0.2},
+    ]
+    base = _load_example("intraday")
+    ns = NodeSet(nodes, handle="h")
+    assert strip_asof(run_v1(dict(base, nagr_nodes=ns), None)) == strip_asof(
+        run_v1(dict(base, nagr_nodes=nodes), None)
+    )
+    frac = _load_example("intraday_fractal")
+    assert strip_asof(run_v2(dict(frac, nagr_nodes=ns), None)) == strip_asof(
+        run_v2(dict(frac, nagr_nodes=nodes), None)
+    )
+    key = cache_key("v1", dict(base, nagr_nodes=ns))
+    assert key is not None
+    ns.upsert([{"id": "a", "weight": 0.6, "score": 0.9}])
+    assert cache_key("v1", dict(base, nagr_nodes=ns)) != key
+
+
+def test_api_nodeset_lifecycle_and_run(strip_asof):
+    _req_times.clear()
+    nodeset_registry.cache_clear()
+    client = TestClient(app)
+    nodes = [
+        {"id": "a", "weight": 0.6, "score": 0.4},
+        {"id": "b", "weight": 0.4, "score": -0.2},
+    ]
+    resp = client.post("/nodesets", json={"nodes": nodes}, headers=HEADERS)
+    assert resp.status_code == 201
+    info = resp.json()
+    handle = info["handle"]
+    assert info["size"] == 2 and info["version"] == 0
+
+    base = {k: v for k, v in _load_example("intraday").items() if k != "nagr_nodes"}
+    resp = client.post("/run", json=dict(base, nagr_nodeset=handle), headers=HEADERS)
+    assert resp.status_code == 200
+    assert strip_asof(resp.json()) == strip_asof(
+        run_v1(dict(base, nagr_nodes=nodes), None)
+    )
+
+    upd = {"upsert": [{"id": "c", "weight": 1.0, "score": 1.0}], "delete": ["b"]}
+    resp = client.patch(f"/nodesets/{handle}", json=upd, headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json()["size"] == 2 and resp.json()["version"] == 2
+    current = client.get(f"/nodesets/{handle}", headers=HEADERS).json()["nodes"]
+    assert sorted(n["id"] for n in current) == ["a", "c"]
+
+    frac = {
+        k: v for k, v in _load_example("intraday_fractal").items() if k != "nagr_nodes"
+    }
+    body = dict(frac, mode=["v2.fractal", "v2.nf3p"], nagr_nodeset=handle)
+    resp = client.post("/run", json=body, headers=HEADERS)
+    assert resp.status_code == 200
+    expected = run_multi(
+        dict(frac, nagr_nodes=current), None, ["v2.fractal", "v2.nf3p"]
+    )
+    assert strip_asof(resp.json()["v2.fractal"]) == strip_asof(expected["v2.fractal"])
+
+    bad = {"upsert": [{"id": "d", "weight": 1.0, "score": 3}]}
+    assert (
+        client.patch(f"/nodesets/{handle}", json=bad, headers=HEADERS).status_code
+        == 400
+    )
+    huge = '{"upsert": [{"id": "d", "weight": 1%s, "score": 0}]}' % ("0" * 400)
+    resp = client.patch(
+        f"/nodesets/{handle}",
+        content=huge,
+        headers=dict(HEADERS, **{"Content-Type": "application/json"}),
+    )
+    assert resp.status_code == 400
+    edges = [{"source": "a", "target": "c", "weight": 1.0}]
+    bad = dict(bad, edges=edges, delete=["a"])
+    assert (
+        client.patch(f"/nodesets/{handle}", json=bad, headers=HEADERS).status_code
+        == 400
+    )
+    info = client.get(f"/nodesets/{handle}", headers=HEADERS).json()
+    assert info["edges"] == 0 and info["version"] == 2 and len(info["nodes"]) == 2
+    both = dict(base, nagr_nodeset=handle, nagr_nodes=nodes)
+    assert client.post("/run", json=both, headers=HEADERS).status_code == 400
+
+    assert client.delete(f"/nodesets/{handle}", headers=HEADERS).status_code == 204
+    assert client.get(f"/nodesets/{handle}", headers=HEADERS).status_code == 404
+    resp = client.post("/run", json=dict(base, nagr_nodeset=handle), headers=HEADERS)
+    assert resp.status_code == 404
@@ -0,0 +1,140 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cli.btcmi as btcmi
+from btcmi import bars, batch, plans
+from btcmi.backtest import evaluate_nf3p, layer_predictions
+from btcmi.norm_cache import NormCache, normalized, scale_key
+from btcmi.ohlcv import FeatureWindows, build_features
+
+WINDOWS = FeatureWindows(micro=5, mezo=20, macro=60)
+
+
+def _matrix(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = plans.V1_NORM.features
+    values = rng.normal(0, 10, (n, len(cols)))
+    mask = rng.uniform(size=values.shape) > 0.2
+    return batch.FeatureMatrix(cols, np.where(mask, values, 0.0), mask)
+
+
+@pytest.fixture
+def normalize_calls(monkeypatch):
+    calls = []
+    original = batch.normalize_matrix
+
+    def spy(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(batch, "normalize_matrix", spy)
+    return calls
+
+
+def test_reweighting_matches_scalar_scores():
+    fm = _matrix()
+    nm = normalized(fm, plans.V1_NORM.scale_map)
+    for name, got in nm.scenario_scores().items():
+        expected = batch.score_matrix(
+            fm, plans.V1_NORM.scale_map, plans.SCENARIO_PLANS[name].weight_map
+        ).score
+        np.testing.assert_allclose(got, expected, rtol=1e-12, atol=1e-15)
+    np.testing.assert_array_equal(nm.mask, fm.mask)
+    assert not nm.score({"unknown": 1.0}).any()
+
+
+def test_cache_normalizes_only_when_scales_change(tmp_path, normalize_calls):
+    fm = _matrix()
+    scales = dict(plans.V1_NORM.scale_map)
+    cache = NormCache(tmp_path)
+    first = cache.get("hist", fm, scales)
+    assert isinstance(first.data, np.memmap) and len(normalize_calls) == 1
+
+    again = NormCache(tmp_path).get("hist", fm, scales)
+    assert len(normalize_calls) == 1
+    np.testing.assert_array_equal(again.data, first.data)
+    try:
+        plans.compile_plans(
+            scenario_weights={
+                "intraday": {"price_change_pct": 1.0, "oi_change_pct": -2}
+            }
+        )
+        got = again.scenario_scores()["intraday"]
+        assert len(normalize_calls) == 1
+        expected = batch.score_matrix(
+            fm, scales, plans.SCENARIO_PLANS["intraday"].weight_map
+        ).score
+    finally:
+        plans.compile_plans()
+    np.testing.assert_allclose(got, expected, rtol=1e-12, atol=1e-15)
+
+    scales["price_change_pct"] = 4.0
+    changed = cache.get("hist", fm, scales)
+    assert len(normalize_calls) == 3 and changed.key != first.key
+    assert changed.key == scale_key(fm.columns, scales)
+    assert len(list(tmp_path.iterdir())) == 2
+    other = _matrix(seed=1)
+    fresh = cache.get("hist", other, scales)
+    assert len(normalize_calls) == 4
+    np.testing.assert_array_equal(fresh.data, normalized(other, scales).data)
+    assert not [p for p in tmp_path.rglob("*") if p.name.endswith(".tmp")]
+
+
+def test_backtest_with_norm_cache(tmp_path, monkeypatch, capsys, normalize_calls):
+    rng = np.random.default_rng(0)
+    n = 800
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    series = bars.from_mapping(
+        {
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min").strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "open": np.r_[close[0], close[:-1]],
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+        }
+    )
+    feats = build_features(series.columns, WINDOWS)
+    plain = layer_predictions(feats.layers)
+    cache = NormCache(tmp_path / "norm")
+    for _ in range(2):
+        cached = layer_predictions(feats.layers, cache=cache, name="s")
+        np.testing.assert_array_equal(cached[0], plain[0])
+    assert len(normalize_calls) == 6
+
+    expected = evaluate_nf3p(series, WINDOWS, horizon=10, folds=4)
+    pd.DataFrame(series.to_mapping()).to_csv(tmp_path / "bars.csv", index=False)
+    argv = [
+        "btcmi",
+        "backtest",
+        "--mode",
+        "v2.nf3p",
+        "--input",
+        str(tmp_path / "bars.csv"),
+        "--horizon",
+        "10",
+        "--folds",
+        "4",
+        "--micro",
+        "5",
+        "--mezo",
+        "20",
+        "--macro",
+        "60",
+        "--norm-cache",
+        str(tmp_path / "cli"),
+        "--out",
+        str(tmp_path / "report.json"),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    assert btcmi.main() == 0
+    assert len(list((tmp_path / "cli").iterdir())) == 3
+    got = json.loads((tmp_path / "report.json").read_text())
+    assert got["summary"]["L2"] == pytest.approx(expected["summary"]["L2"])
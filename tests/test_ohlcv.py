@@ -0,0 +1,145 @@
+import math
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from btcmi import batch, plans
+from btcmi.ohlcv import FeatureWindows, build_features, load_ohlcv
+from btcmi.runner import run_v2
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+R = pathlib.Path(__file__).resolve().parents[1]
+WINDOWS = FeatureWindows(micro=5, mezo=12, macro=30, gap_threshold=0.002)
+BASE = {
+    "schema_version": "2.0.0",
+    "lineage": {},
+    "scenario": "intraday",
+    "window": "1h",
+    "mode": "v2.fractal",
+}
+
+
+def _bars(n: int = 200, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.002, n))
+    return {
+        "timestamp": np.array([f"2024-01-01T00:{i % 60:02d}:00Z" for i in range(n)]),
+        "open": open_,
+        "high": np.maximum(open_, close) * 1.001,
+        "low": np.minimum(open_, close) * 0.999,
+        "close": close,
+        "volume": rng.lognormal(3, 1, n),
+        "hashrate_trend": np.where(np.arange(n) % 7 == 0, np.nan, 0.1),
+    }
+
+
+def _reference(bars: dict, t: int, w: FeatureWindows) -> dict:
+    """Per-bar loop implementation of the feature definitions."""
+    c, o, v = bars["close"], bars["open"], bars["volume"]
+    h, lo = bars["high"], bars["low"]
+    out: dict = {"features_micro": {}, "features_mezo": {}, "features_macro": {}}
+    micro, mezo, macro = out.values()
+    if t >= w.micro:
+        micro["price_change_pct"] = 100 * (c[t] / c[t - w.micro] - 1)
+        micro["micro_liquidity_gaps"] = float(
+            sum(
+                abs(o[i] - c[i - 1]) > w.gap_threshold * abs(c[i - 1])
+                for i in range(t - w.micro + 1, t + 1)
+            )
+        )
+    if t >= 2 * w.micro - 1:
+        cur = v[t - w.micro + 1 : t + 1].sum()
+        prev = v[t - 2 * w.micro + 1 : t - w.micro + 1].sum()
+        micro["volume_change_pct"] = 100 * (cur / prev - 1)
+    if t >= w.mezo - 1:
+        win = slice(t - w.mezo + 1, t + 1)
+        total = v[win].sum()
+        mezo["net_positioning_index"] = float(
+            (v[win] * np.sign(c[win] - o[win])).sum() / total
+        )
+        p = v[win] / total
+        mezo["liquidation_heatmap_entropy"] = float(
+            -(p * np.log(p)).sum() / math.log(w.mezo)
+        )
+    if t >= w.macro - 1:
+        win = slice(t - w.macro + 1, t + 1)
+        typical = (h[win] + lo[win] + c[win]) / 3
+        macro["supply_in_profit_pct"] = (
+            c[t] / ((typical * v[win]).sum() / v[win].sum()) - 1
+        )
+    if t >= w.macro:
+        r = np.diff(np.log(c[t - w.macro : t + 1]))
+        trend = math.log(c[t] / c[t - w.macro])
+        macro["macro_regime_score"] = trend / (r.std(ddof=1) * math.sqrt(w.macro))
+    if not np.isnan(bars["hashrate_trend"][t]):
+        macro["hashrate_trend"] = 0.1
+    return out
+
+
+def test_features_match_loop_reference():
+    bars = _bars()
+    feats = build_features(bars, WINDOWS)
+    assert len(feats) == len(bars["close"])
+    for t, blocks in enumerate(feats.blocks()):
+        ref = _reference(bars, t, WINDOWS)
+        for block, expected in ref.items():
+            assert blocks[block].keys() == expected.keys(), (t, block)
+            for k, v in expected.items():
+                assert blocks[block][k] == pytest.approx(v, rel=1e-9, abs=1e-9), (t, k)
+
+
+def test_matrix_layout_feeds_batch_engine():
+    bars = _bars(120, seed=3)
+    feats = build_features(bars, WINDOWS, step=7, start=40)
+    assert feats.index.tolist() == list(range(40, 120, 7))
+    for level, matrix in feats.layers.items():
+        plan = plans.LAYER_PLANS[level]
+        assert matrix.columns == plan.features
+        norm = batch.normalize_matrix(matrix, plan.norm.scale_map)
+        scores, _ = batch.equal_weight_score_matrix(
+            norm, matrix.mask, plan.equal_denominator
+        )
+        payloads = list(feats.payloads(BASE))
+        block = {"L1": "features_micro", "L2": "features_mezo", "L3": "features_macro"}
+        for row, data in enumerate(payloads):
+            assert (
+                scores[row] == plan.equal_score(plan.normalize(data[block[level]]))[0]
+            )
+    for data in payloads:
+        assert data["asof"].startswith("2024-01-01T")
+        out = run_v2(data, None)
+        validate_json(out, SCHEMA_REGISTRY["output"])
+
+
+def test_open_interest_and_validation():
+    bars = _bars(50)
+    bars["open_interest"] = np.linspace(1000, 2000, 50)
+    row = list(build_features(bars, WINDOWS).blocks())[-1]
+    assert row["features_micro"]["oi_change_pct"] == pytest.approx(
+        100 * (2000 / bars["open_interest"][-1 - WINDOWS.micro] - 1)
+    )
+    only_close = build_features({"close": bars["close"]}, WINDOWS)
+    assert only_close.layers["L2"].mask.sum() == 0
+    with pytest.raises(ValueError):
+        build_features({"open": bars["open"]})
+    with pytest.raises(ValueError):
+        build_features({"close": bars["close"], "volume": bars["volume"][:-1]})
+    bad = dict(bars, volume=np.where(np.arange(50) == 3, np.nan, bars["volume"]))
+    with pytest.raises(ValueError):
+        build_features(bad)
+    with pytest.raises(ValueError):
+        FeatureWindows(micro=1)
+
+
+def test_load_examples():
+    csv = load_ohlcv(R / "examples" / "ohlcv.csv")
+    js = load_ohlcv(R / "examples" / "ohlcv.json")
+    assert csv.keys() == js.keys()
+    for k in csv:
+        assert list(csv[k]) == list(js[k])
+    frame = pd.DataFrame({k: v for k, v in csv.items()})
+    feats = build_features(frame, FeatureWindows(micro=2, mezo=2, macro=2))
+    assert len(feats) == 2
@@ -0,0 +1,61 @@
+import pytest
+from hypothesis import given, strategies as st
+
+from btcmi import plans
+from btcmi.config import NORM_SCALE, SCALES, SCENARIO_WEIGHTS
+from btcmi.engine_v2 import layer_equal_weights
+from btcmi.feature_processing import normalize_features, weighted_score
+
+_values = st.one_of(
+    st.floats(min_value=-1e6, max_value=1e6, allow_nan=False, allow_infinity=False),
+    st.integers(min_value=-1000, max_value=1000),
+    st.just("bad"),
+    st.booleans(),
+)
+
+
+@given(
+    st.dictionaries(
+        keys=st.sampled_from(tuple(NORM_SCALE) + ("extra",)), values=_values
+    ),
+    st.sampled_from(sorted(SCENARIO_WEIGHTS)),
+)
+def test_scenario_plan_matches_weighted_score(features, scenario):
+    norm = plans.V1_NORM.normalize(features)
+    assert norm == normalize_features(features, NORM_SCALE)
+    plan = plans.SCENARIO_PLANS[scenario]
+    assert plan.score(norm) == weighted_score(norm, SCENARIO_WEIGHTS[scenario])
+    assert plan.weight_map is SCENARIO_WEIGHTS[scenario]
+
+
+@given(
+    st.sampled_from(sorted(SCALES)),
+    st.dictionaries(keys=st.text(min_size=1, max_size=4), values=_values),
+)
+def test_layer_plan_matches_equal_weights(level, features):
+    plan = plans.LAYER_PLANS[level]
+    norm = plan.normalize(features)
+    assert norm == normalize_features(features, SCALES[level])
+    assert plan.equal_score(norm) == weighted_score(norm, layer_equal_weights(norm))
+
+
+def test_layer_plan_denominator_beyond_table():
+    plan = plans.LAYER_PLANS["L1"]
+    norm = {f"k{i}": 0.5 for i in range(len(plan.equal_denominators) + 3)}
+    assert plan.equal_score(norm) == weighted_score(norm, layer_equal_weights(norm))
+
+
+def test_completeness_uses_plan_features():
+    assert plans.V1_NORM.completeness({}) == 0.0
+    feats = {"price_change_pct": 1.0, "funding_rate_bps": "x", "extra": 1.0}
+    assert plans.V1_NORM.completeness(feats) == pytest.approx(1 / len(NORM_SCALE))
+
+
+def test_compile_plans_rebuilds_module_plans():
+    try:
+        plans.compile_plans(scenario_weights={"intraday": {"price_change_pct": 2.0}})
+        norm = {"price_change_pct": 0.5, "volume_change_pct": 0.1}
+        assert plans.SCENARIO_PLANS["intraday"].score(norm)[0] == pytest.approx(0.5)
+    finally:
+        plans.compile_plans()
+    assert set(plans.SCENARIO_PLANS) == set(SCENARIO_WEIGHTS)
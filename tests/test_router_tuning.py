@@ -0,0 +1,206 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import cli.btcmi as btcmi
+from btcmi import api, bars, config, engine_v2, router_tuning
+from btcmi.runner import run_v2
+
+R = Path(__file__).resolve().parents[1]
+TS = "2024-01-01T00:00:00Z"
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(config, "ROUTER_CUTS", config.ROUTER_CUTS)
+    monkeypatch.setattr(config, "ROUTER_LEVEL_WEIGHTS", config.ROUTER_LEVEL_WEIGHTS)
+
+
+def _planted(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    s = rng.uniform(-1, 1, (n, 3))
+    vol = rng.uniform(0, 1, n)
+    regime = (vol >= 0.3).astype(int) + (vol >= 0.7)
+    target = s[np.arange(n), regime] + rng.normal(0, 0.05, n)
+    target[-5:] = np.nan
+    return router_tuning.LevelSignals(s, vol, target)
+
+
+def test_blend_matches_run_v2():
+    base = json.loads((R / "examples/intraday_fractal.json").read_text())
+    rng = np.random.default_rng(3)
+    payloads = []
+    for i in range(40):
+        p = dict(base, vol_regime_pctl=float(rng.uniform()))
+        p["features_micro"] = {
+            k: v * rng.uniform(-2, 2) for k, v in base["features_micro"].items()
+        }
+        payloads.append(p)
+    signals = router_tuning.signals_from_payloads(payloads, np.zeros(40))
+    got = router_tuning.blend(
+        signals.signals, signals.vol, router_tuning.current_candidate()
+    )
+    expected = [run_v2(p, TS)["summary"]["overall_signal"] for p in payloads]
+    np.testing.assert_allclose(got[0], expected, atol=2e-6)
+
+
+def test_search_ranks_planted_config_first(tmp_path):
+    signals = _planted()
+    grid = router_tuning.candidate_grid([0.3, 0.5, 0.7], weight_step=0.5)
+    assert len(grid) == 3 * 6**3
+    best = router_tuning.search(signals, grid, "ic", top=3)[0]
+    assert best["rank"] == 1 and best["score"] > 0.99
+    assert best["router_cuts"] == [0.3, 0.7]
+    assert best["router_level_weights"]["low"] == {"L1": 1.0, "L2": 0.0, "L3": 0.0}
+    assert best["router_level_weights"]["high"] == {"L1": 0.0, "L2": 0.0, "L3": 1.0}
+
+    small = router_tuning.evaluate(signals, grid, "sharpe", chunk_elements=10_000)
+    np.testing.assert_allclose(small, router_tuning.evaluate(signals, grid, "sharpe"))
+    pooled = router_tuning.evaluate(
+        signals, grid, "hit_rate", workers=2, chunk_elements=500_000
+    )
+    assert np.argmax(pooled) == np.argmax(router_tuning.evaluate(signals, grid))
+
+    signals.save(tmp_path / "s.npz")
+    loaded = router_tuning.LevelSignals.load(tmp_path / "s.npz")
+    np.testing.assert_array_equal(loaded.target, signals.target)
+    with pytest.raises(ValueError, match="horizon"):
+        router_tuning.LevelSignals.load(tmp_path / "s.npz", {"horizon": 60})
+    with pytest.raises(ValueError):
+        router_tuning.evaluate(signals, grid, "mse")
+    with pytest.raises(ValueError):
+        router_tuning.candidate_grid([0.5])
+
+
+def test_written_config_drives_router(tmp_path, router):
+    best = router_tuning.search(
+        _planted(), router_tuning.candidate_grid([0.3, 0.7], 0.5), top=1
+    )[0]
+    path = tmp_path / "router.json"
+    router_tuning.write_router_config(path, best)
+    assert json.loads(path.read_text())["version"] == 1
+    engine_v2.load_router_config(path)
+    assert engine_v2.router_weights(0.2) == ("low", {"L1": 1.0, "L2": 0.0, "L3": 0.0})
+    assert engine_v2.router_weights(0.75)[1]["L3"] == 1.0
+
+    bad = dict(best, router_cuts=[0.8, 0.2])
+    path.write_text(json.dumps(bad))
+    with pytest.raises(ValueError):
+        engine_v2.load_router_config(path)
+    path.write_text("{}")
+    with pytest.raises(ValueError):
+        engine_v2.load_router_config(path)
+    path.write_text(json.dumps(dict(best, version=2)))
+    with pytest.raises(ValueError, match="version"):
+        engine_v2.load_router_config(path)
+    path.write_text("[]")
+    with pytest.raises(ValueError):
+        engine_v2.load_router_config(path)
+
+
+def test_api_loads_router_config(tmp_path, monkeypatch, router):
+    path = tmp_path / "router.json"
+    doc = {
+        "version": 1,
+        "router_cuts": [0.1, 0.9],
+        "router_level_weights": {
+            r: {"L1": 0.0, "L2": 1.0, "L3": 0.0} for r in ("low", "mid", "high")
+        },
+    }
+    path.write_text(json.dumps(doc))
+    monkeypatch.setenv("BTCMI_ROUTER_CONFIG", str(path))
+    api.router_config.cache_clear()
+    api.load_runners.cache_clear()
+    try:
+        with TestClient(api.app):
+            assert config.ROUTER_CUTS == (0.1, 0.9)
+        monkeypatch.setattr(config, "ROUTER_CUTS", (0.3, 0.7))
+        api.router_config.cache_clear()
+        api.load_runners.cache_clear()
+        api._req_times.clear()
+        resp = TestClient(api.app).post(
+            "/run/batch", json=[], headers={"X-API-Key": "changeme"}
+        )
+        assert resp.status_code == 200
+        assert config.ROUTER_CUTS == (0.1, 0.9)
+    finally:
+        api.router_config.cache_clear()
+        api.load_runners.cache_clear()
+
+
+def test_tune_router_cli(tmp_path, monkeypatch, capsys, router):
+    rng = np.random.default_rng(0)
+    n = 1500
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    series = bars.from_mapping(
+        {
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min").strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "open": np.r_[close[0], close[:-1]],
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+        }
+    )
+    pd.DataFrame(series.to_mapping()).to_csv(tmp_path / "bars.csv", index=False)
+    cache = tmp_path / "signals.cache"
+    argv = [
+        "btcmi",
+        "tune-router",
+        "--input",
+        str(tmp_path / "bars.csv"),
+        "--signals-cache",
+        str(cache),
+        "--horizon",
+        "10",
+        "--micro",
+        "5",
+        "--mezo",
+        "20",
+        "--macro",
+        "60",
+        "--cuts",
+        "0.2",
+        "0.5",
+        "0.8",
+        "--weight-step",
+        "0.5",
+        "--top",
+        "2",
+        "--out",
+        str(tmp_path / "ranked.json"),
+        "--config-out",
+        str(tmp_path / "router.json"),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    assert cache.exists()
+    ranked = json.loads((tmp_path / "ranked.json").read_text())
+    assert ranked["candidates"] == 3 * 6**3 and len(ranked["ranked"]) == 2
+    engine_v2.load_router_config(tmp_path / "router.json")
+    assert list(config.ROUTER_CUTS) == ranked["ranked"][0]["router_cuts"]
+
+    monkeypatch.setattr(sys, "argv", argv[:2] + argv[4:-4])
+    assert btcmi.main() == 0
+    assert json.loads(capsys.readouterr().out)["ranked"] == ranked["ranked"]
+    assert sorted(p.name for p in tmp_path.iterdir() if "signals" in p.name) == [
+        "signals.cache"
+    ]
+
+    stale = argv[:2] + argv[4:7] + ["20"] + argv[8:-4]
+    monkeypatch.setattr(sys, "argv", stale)
+    assert btcmi.main() == 2
+    monkeypatch.setattr(sys, "argv", argv[:7] + ["20"] + argv[8:-4])
+    assert btcmi.main() == 0
+    assert router_tuning.LevelSignals.load(cache).meta["horizon"] == 20
+    monkeypatch.setattr(sys, "argv", stale)
+    assert btcmi.main() == 0
+    monkeypatch.setattr(sys, "argv", ["btcmi", "tune-router"])
+    assert btcmi.main() == 2
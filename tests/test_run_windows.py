@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from btcmi import bars
+from btcmi.enums import Window
+from btcmi.ohlcv import FeatureWindows, build_features
+from btcmi.runner import run_v2, run_windows
+from btcmi.schema_util import SCHEMA_REGISTRY, validate_json
+
+TS = "2025-01-01T00:00:00Z"
+BASE = {"schema_version": "2.0.0", "lineage": {}, "scenario": "swing"}
+FW = FeatureWindows(micro=3, mezo=6, macro=12)
+
+
+def _series(n: int = 6 * 1440, seed: int = 1) -> bars.Bars:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    stamps = pd.date_range("2024-03-01", periods=n, freq="min")
+    return bars.from_mapping(
+        {
+            "timestamp": stamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "open": close * (1 + rng.normal(0, 1e-4, n)),
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+        }
+    )
+
+
+def test_windows_match_separate_runs():
+    series = _series()
+    out = run_windows(
+        series, ["5m", Window.ONE_HOUR, "1d"], BASE, TS, feature_windows=FW
+    )
+    assert list(out) == ["5m", "1h", "1d"]
+    for key in ("5m", "1h", "1d"):
+        resampled = series.resample(key)
+        feats = build_features(resampled.to_mapping(), FW)
+        data = list(feats.payloads(dict(BASE, window=key)))[-1]
+        assert out[key] == run_v2(data, TS)
+        validate_json(out[key], SCHEMA_REGISTRY["output"])
+    assert (
+        out["1d"]["summary"]["overall_signal"] != out["1h"]["summary"]["overall_signal"]
+    )
+
+
+def test_per_window_lookbacks_and_errors(tmp_path):
+    series = _series(3 * 1440)
+    fws = {"1h": FW, "1d": FeatureWindows(micro=2, mezo=2, macro=2)}
+    out = run_windows(
+        series,
+        ["1d", "1h"],
+        BASE,
+        TS,
+        feature_windows=fws,
+        out_path=tmp_path / "out.json",
+    )
+    assert (tmp_path / "out.json").exists()
+    assert out["1d"]["details"]["normalized_micro"]
+    scaled = run_windows(series, ["4h", "1h", "1d"], BASE, TS)
+    assert scaled["4h"]["summary"]["window"] == "4h"
+    for key in ("4h", "1h", "1d"):
+        details = scaled[key]["details"]
+        assert details["normalized_micro"] and details["normalized_mezo"]
+    assert FeatureWindows.for_bar_seconds(3600) == FeatureWindows(2, 24, 720)
+    assert FeatureWindows.for_bar_seconds(60) == FeatureWindows()
+    empty = run_windows(series.between("2030-01-01"), ["1h"], BASE, TS)
+    assert empty["1h"] == {"error": "runner_error", "message": "no bars for window 1h"}
+    with pytest.raises(ValueError):
+        run_windows(series, [], BASE, TS)
+    with pytest.raises(ValueError):
+        run_windows(series, ["1w"], BASE, TS)
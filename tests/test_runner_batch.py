@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from btcmi import runner
+from btcmi.config import NORM_SCALE, SCALES
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+_num = st.floats(min_value=-1e4, max_value=1e4, allow_nan=False, allow_infinity=False)
+_val = st.one_of(_num, st.integers(-100, 100), st.just("bad"))
+_nodes = st.lists(
+    st.fixed_dictionaries(
+        {"id": st.just("n"), "weight": _num, "score": st.floats(-1, 1)}
+    ),
+    max_size=3,
+)
+
+
+def _layer(level):
+    return st.dictionaries(st.sampled_from(tuple(SCALES[level]) + ("x",)), _val)
+
+
+_common = {
+    "scenario": st.sampled_from(["intraday", "scalp", "swing"]),
+    "window": st.sampled_from(["1h", "1d"]),
+    "nagr_nodes": _nodes,
+}
+_v1 = st.fixed_dictionaries(
+    dict(
+        _common,
+        features=st.dictionaries(st.sampled_from(tuple(NORM_SCALE) + ("x",)), _val),
+    )
+)
+_v2 = st.fixed_dictionaries(
+    dict(
+        _common,
+        features_micro=_layer("L1"),
+        features_mezo=_layer("L2"),
+        features_macro=_layer("L3"),
+        vol_regime_pctl=st.floats(0, 1),
+    )
+)
+
+
+def _load(name):
+    return json.loads((R / f"examples/{name}.json").read_text())
+
+
+@settings(max_examples=50)
+@given(st.lists(_v1, max_size=8))
+def test_run_v1_batch_matches_run_v1(payloads):
+    expected = [runner.run_v1(p, TS) for p in payloads]
+    assert runner.run_v1_batch(payloads, TS) == expected
+
+
+@settings(max_examples=50)
+@given(st.lists(_v2, max_size=8))
+def test_run_v2_and_nf3p_batch_match_scalar(payloads):
+    assert runner.run_v2_batch(payloads, TS) == [runner.run_v2(p, TS) for p in payloads]
+    assert runner.run_nf3p_batch(payloads, TS) == [
+        runner.run_nf3p(p, TS) for p in payloads
+    ]
+
+
+def test_batch_bad_items_fail_individually():
+    good = _load("intraday")
+    payloads = [
+        good,
+        {"window": "1h"},
+        dict(good, features={"price_change_pct": 10**400}),
+        good,
+    ]
+    out = runner.run_v1_batch(payloads, TS)
+    assert out[0] == out[3] == runner.run_v1(good, TS)
+    assert out[1]["error"] == "runner_error"
+    assert "scenario" in out[1]["message"]
+    assert out[2]["error"] == "runner_error"
+
+
+def test_run_v2_batch_invalid_vol_regime_pctl():
+    good = _load("intraday_fractal")
+    out = runner.run_v2_batch([dict(good, vol_regime_pctl=2.0), good], TS)
+    assert "vol_regime_pctl" in out[0]["message"]
+    assert out[1] == runner.run_v2(good, TS)
+
+
+def test_columnar_layout():
+    good = _load("intraday")
+    swing = dict(good, scenario="swing")
+    res = runner.run_v1_batch([swing, {}, good], TS, layout="columns")
+    assert res.index.tolist() == [0, 2]
+    assert list(res.errors) == [1]
+    assert res.columns["scenario"] == ["swing", "intraday"]
+    expected = [
+        runner.run_v1(p, TS)["summary"]["overall_signal"] for p in (swing, good)
+    ]
+    np.testing.assert_allclose(res.columns["overall_signal"], expected, atol=1e-6)
+
+
+def test_run_batch_groups_by_mode():
+    v1 = _load("intraday")
+    v2 = _load("intraday_fractal")
+    nf = dict(v2, mode="v2.nf3p")
+    out = runner.run_batch(
+        [v2, v1, nf, dict(v1, mode="foo"), dict(v1, mode=["v1"])], TS
+    )
+    assert out[0] == runner.run_v2(v2, TS)
+    assert out[1] == runner.run_v1(v1, TS)
+    assert out[2] == runner.run_nf3p(nf, TS)
+    assert out[3] == {"error": "runner_error", "message": "unknown mode: foo"}
+    assert out[4] == {"error": "runner_error", "message": "unknown mode: ['v1']"}
+
+    cols = runner.run_batch([v2, v1, nf], TS, layout="columns")
+    assert cols["v1"].index.tolist() == [1]
+    assert cols["v2.fractal"].index.tolist() == [0]
+    assert cols["v2.nf3p"].columns["L1"][0] == pytest.approx(0.475329, abs=1e-6)
+
+
+def test_batch_rejects_unknown_layout():
+    with pytest.raises(ValueError, match="layout"):
+        runner.run_v1_batch([], TS, layout="rows")
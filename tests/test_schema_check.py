@@ -0,0 +1,200 @@
+"""Conformance of the compiled schema checks with jsonschema."""
+
+import copy
+import json
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from btcmi.runner import run_v1, run_v2
+from btcmi.schema_check import UnsupportedSchema, compile_checker
+from btcmi.schema_util import SCHEMA_REGISTRY, _fast_checker, validate_json
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+ODD = [
+    None,
+    True,
+    False,
+    0,
+    -1,
+    1,
+    1.0,
+    2,
+    0.5,
+    -0.0,
+    1.5,
+    float("nan"),
+    float("inf"),
+    "",
+    "x",
+    "v1",
+    "v2.fractal",
+    "v2.nf3p",
+    "intraday",
+    "1h",
+    "15m",
+    "1h\n",
+    "01d",
+    "2.0.0",
+    "a" * 32,
+    "A" * 32,
+    "a" * 31,
+    "a" * 32 + "\n",
+    [],
+    [1],
+    {},
+    {"k": 1},
+    {"k": "a" * 32},
+    {"k": 0.1},
+    [{"id": "n", "weight": 1, "score": 0.5}],
+    [{"id": "n", "weight": 1, "score": 2}],
+    [{"id": "n", "weight": 1}],
+]
+
+
+def _examples():
+    out = []
+    for name in (
+        "intraday",
+        "intraday_fractal",
+        "swing_fractal",
+        "real_intraday",
+        "real_swing",
+    ):
+        doc = json.loads((R / "examples" / f"{name}.json").read_text())
+        out.append(doc.get("input", doc))
+    return out
+
+
+def _mutations(base):
+    yield base
+    for key in list(base):
+        d = dict(base)
+        del d[key]
+        yield d
+    for key in list(base) + [
+        "mode",
+        "asof",
+        "extra",
+        "vol_regime_pctl",
+        "freshness_seconds",
+        "features",
+        "features_micro",
+    ]:
+        for value in ODD:
+            d = copy.deepcopy(base)
+            d[key] = value
+            yield d
+    for key, value in base.items():
+        if isinstance(value, dict):
+            for value2 in ODD:
+                d = copy.deepcopy(base)
+                d[key]["k"] = value2
+                yield d
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            for field in ("id", "weight", "score", "extra"):
+                for value2 in ODD:
+                    d = copy.deepcopy(base)
+                    d[key][0][field] = value2
+                    yield d
+
+
+def _corpus():
+    items = []
+    for base in _examples():
+        items.extend(_mutations(base))
+        for mode in (None, "v1", "v2.fractal", "v2.nf3p"):
+            d = dict(base)
+            if mode is None:
+                d.pop("mode", None)
+            else:
+                d["mode"] = mode
+            items.append(d)
+    items.extend(ODD)
+    return items
+
+
+def _outputs():
+    items = []
+    for base in _examples():
+        run = run_v1 if "features" in base else run_v2
+        out = run(base, TS)
+        items.extend(_mutations(out))
+        for section in ("summary", "details"):
+            items.extend(dict(out, **{section: m}) for m in _mutations(out[section]))
+    return items
+
+
+@pytest.mark.parametrize(
+    ("schema", "corpus"),
+    [("input", _corpus()), ("output", _outputs())],
+)
+def test_compiled_check_matches_jsonschema(schema, corpus):
+    schema_doc = json.loads(SCHEMA_REGISTRY[schema].read_text())
+    check = compile_checker(schema_doc)
+    reference = jsonschema.Draft202012Validator(schema_doc)
+    valid = 0
+    for item in corpus:
+        expected = reference.is_valid(item)
+        assert check(item) == expected, item
+        valid += expected
+    assert 0 < valid < len(corpus)
+
+
+def test_validate_json_errors_unchanged():
+    schema_doc = json.loads(SCHEMA_REGISTRY["input"].read_text())
+    reference = jsonschema.Draft202012Validator(schema_doc)
+    for item in _corpus()[:200]:
+        errors = sorted(reference.iter_errors(item), key=lambda e: e.path)
+        if not errors:
+            validate_json(item, SCHEMA_REGISTRY["input"])
+            continue
+        msg = "\n".join(f"{'/'.join(map(str, e.path))}: {e.message}" for e in errors)
+        with pytest.raises(ValueError) as exc:
+            validate_json(item, SCHEMA_REGISTRY["input"])
+        assert str(exc.value) == msg
+
+
+def test_unsupported_schema_falls_back(tmp_path):
+    schema = {"type": "object", "patternProperties": {"^a": {"type": "string"}}}
+    with pytest.raises(UnsupportedSchema):
+        compile_checker(schema)
+    path = tmp_path / "schema.json"
+    path.write_text(json.dumps(schema))
+    assert _fast_checker(path) is None
+    validate_json({"ab": "x"}, path)
+    with pytest.raises(ValueError):
+        validate_json({"ab": 1}, path)
+
+
+def test_random_documents_agree():
+    hypothesis = pytest.importorskip("hypothesis")
+    st = hypothesis.strategies
+    schema_doc = json.loads(SCHEMA_REGISTRY["input"].read_text())
+    check = compile_checker(schema_doc)
+    reference = jsonschema.Draft202012Validator(schema_doc)
+    keys = st.sampled_from(
+        sorted(schema_doc["properties"]) + ["id", "weight", "score", "k"]
+    )
+    leaves = st.one_of(
+        st.none(),
+        st.booleans(),
+        st.integers(-3, 3),
+        st.floats(allow_nan=True),
+        st.sampled_from(ODD[13:30]),
+    )
+    docs = st.recursive(
+        leaves,
+        lambda inner: st.lists(inner, max_size=3)
+        | st.dictionaries(keys, inner, max_size=6),
+        max_leaves=20,
+    )
+
+    @hypothesis.settings(max_examples=150, deadline=None)
+    @hypothesis.given(docs)
+    def run(doc):
+        assert check(doc) == reference.is_valid(doc)
+
+    run()
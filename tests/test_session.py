@@ -0,0 +1,149 @@
+import json
+import pathlib
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from btcmi.api import _req_times, app, session_registry
+from btcmi.runner import run_v2
+from btcmi.session import SessionRegistry, SignalSession
+
+R = pathlib.Path(__file__).resolve().parents[1]
+HEADERS = {"X-API-Key": "changeme"}
+TS = "2025-01-01T00:00:00Z"
+
+
+def _load_example(name: str) -> dict:
+    return json.loads((R / "examples" / f"{name}.json").read_text())
+
+
+def _assert_close(out: dict, ref: dict) -> None:
+    assert out.keys() == ref.keys()
+    for key in ("summary", "details"):
+        for k, v in ref[key].items():
+            if isinstance(v, float):
+                assert out[key][k] == pytest.approx(v, abs=2e-6), k
+            else:
+                assert out[key][k] == v, k
+
+
+def test_initial_output_matches_run_v2():
+    data = _load_example("intraday_fractal")
+    assert SignalSession(data).output(TS) == run_v2(data, TS)
+
+
+def test_random_deltas_match_full_recompute():
+    data = _load_example("swing_fractal")
+    session = SignalSession(data)
+    rng = random.Random(7)
+    keys = {
+        "features_micro": ["price_change_pct", "volume_change_pct", "extra_micro"],
+        "features_mezo": ["oi_term_structure_slope", "net_positioning_index"],
+        "features_macro": ["hashrate_trend", "macro_regime_score"],
+    }
+    for step in range(1500):
+        field = rng.choice(sorted(keys))
+        delta = {
+            field: {
+                rng.choice(keys[field]): (
+                    None if rng.random() < 0.2 else rng.uniform(-20, 20)
+                )
+            }
+        }
+        if step % 50 == 0:
+            delta["vol_regime_pctl"] = rng.random()
+        summary = session.update(delta)
+        assert summary["version"] == step + 1
+        if step % 149 == 0:
+            ref = run_v2(session.payload(), TS)
+            _assert_close(session.output(TS), ref)
+            assert summary["overall_signal"] == pytest.approx(
+                ref["summary"]["overall_signal"], abs=2e-6
+            )
+
+
+def test_invalid_deltas_are_rejected_without_changes():
+    session = SignalSession(_load_example("intraday_fractal"))
+    before = session.output(TS)
+    for delta in (
+        {"features_micro": {"price_change_pct": "up"}},
+        {"features_micro": 1.0},
+        {"scenario": "swing"},
+        {"features_macro": {"hashrate_trend": 1.0}, "vol_regime_pctl": 2.0},
+        {"features_micro": {"price_change_pct": 0.1, "oi_change_pct": 10**400}},
+    ):
+        with pytest.raises(ValueError):
+            session.update(delta)
+    assert session.output(TS) == before
+    assert session.version == 0
+
+
+def test_registry_closes_idle_sessions():
+    now = [0.0]
+    reg = SessionRegistry(max_sessions=2, idle_ttl=10.0, clock=lambda: now[0])
+    data = _load_example("intraday_fractal")
+    first, second = reg.open(data), reg.open(data)
+    now[0] = 8.0
+    assert reg.get(first.handle) is first
+    with pytest.raises(ValueError):
+        reg.open(data)
+    now[0] = 12.0
+    third = reg.open(data)
+    assert len(reg) == 2 and reg.get(first.handle) is first
+    with pytest.raises(KeyError):
+        reg.get(second.handle)
+    now[0] = 30.0
+    with pytest.raises(KeyError):
+        reg.get(third.handle)
+    with pytest.raises(ValueError):
+        SessionRegistry(idle_ttl=0)
+
+
+def test_api_session_lifecycle():
+    _req_times.clear()
+    session_registry.cache_clear()
+    client = TestClient(app)
+    data = _load_example("intraday_fractal")
+    resp = client.post("/sessions", json=data, headers=HEADERS)
+    assert resp.status_code == 201
+    handle = resp.json()["session"]
+
+    delta = {"features_micro": {"price_change_pct": 0.9}}
+    resp = client.patch(f"/sessions/{handle}", json=delta, headers=HEADERS)
+    assert resp.status_code == 200
+    merged = dict(
+        data, features_micro=dict(data["features_micro"], **delta["features_micro"])
+    )
+    ref = run_v2(merged, None)
+    assert resp.json()["overall_signal"] == pytest.approx(
+        ref["summary"]["overall_signal"], abs=2e-6
+    )
+    full = client.patch(
+        f"/sessions/{handle}?full=true", json={"features_micro": {}}, headers=HEADERS
+    ).json()
+    _assert_close(full, ref)
+    _assert_close(client.get(f"/sessions/{handle}", headers=HEADERS).json(), ref)
+
+    bad = {"features_micro": {"price_change_pct": "x"}}
+    assert (
+        client.patch(f"/sessions/{handle}", json=bad, headers=HEADERS).status_code
+        == 400
+    )
+    huge = {"features_micro": {"price_change_pct": 10**400}}
+    assert (
+        client.patch(f"/sessions/{handle}", json=huge, headers=HEADERS).status_code
+        == 400
+    )
+    huge = dict(data, features_micro=huge["features_micro"])
+    assert client.post("/sessions", json=huge, headers=HEADERS).status_code == 400
+    assert (
+        client.post(
+            "/sessions", json=dict(data, mode="v1"), headers=HEADERS
+        ).status_code
+        == 400
+    )
+    assert client.post("/sessions", json={"x": 1}, headers=HEADERS).status_code == 400
+
+    assert client.delete(f"/sessions/{handle}", headers=HEADERS).status_code == 204
+    assert client.get(f"/sessions/{handle}", headers=HEADERS).status_code == 404
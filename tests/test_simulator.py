@@ -0,0 +1,92 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+
+from btcmi.runner import run_v2_batch
+from btcmi.simulator import batch_signal, simulate
+
+R = pathlib.Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+def _reference(signal, prices, threshold, fee, slippage, sizing="linear"):
+    """Per-bar loop implementation of the simulation rules."""
+    pos_prev, equity, peak, turnover, dd = 0.0, 1.0, 1.0, 0.0, 0.0
+    rets = []
+    for t, (s, p) in enumerate(zip(signal, prices)):
+        r = pos_prev * (p / prices[t - 1] - 1.0) if t else 0.0
+        s = 0.0 if np.isnan(s) else s
+        pos = 0.0
+        if abs(s) >= threshold:
+            pos = float(np.sign(s)) if sizing == "sign" else max(-1.0, min(1.0, s))
+        trade = abs(pos - pos_prev)
+        net = r - (fee + slippage) * trade
+        equity *= 1.0 + net
+        peak = max(peak, equity)
+        dd = max(dd, 1.0 - equity / peak)
+        turnover += trade
+        rets.append(net)
+        pos_prev = pos
+    return {
+        "total_return": equity - 1.0,
+        "sharpe": np.mean(rets) / np.std(rets, ddof=1),
+        "max_drawdown": dd,
+        "turnover": turnover,
+    }
+
+
+def _market(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    signal = np.tanh(rng.normal(0, 1, n))
+    signal[::37] = np.nan
+    return signal, prices
+
+
+def test_matches_loop_reference():
+    signal, prices = _market()
+    for sizing in ("linear", "sign"):
+        sim = simulate(
+            signal, prices, threshold=0.3, fee=4e-4, slippage=1e-4, sizing=sizing
+        )
+        ref = _reference(signal, prices, 0.3, 4e-4, 1e-4, sizing)
+        for k, v in ref.items():
+            assert float(sim.stats[k]) == pytest.approx(v, rel=1e-9), (sizing, k)
+        assert sim.equity.shape == prices.shape
+
+
+def test_grid_broadcasts_to_individual_runs():
+    signal, prices = _market(seed=2)
+    thresholds = np.array([0.0, 0.2, 0.5])[:, None]
+    fees = np.array([0.0, 1e-4, 1e-3, 5e-3])
+    sim = simulate(signal, prices, threshold=thresholds, fee=fees, periods_per_year=365)
+    assert sim.equity.shape == (3, 4, len(prices))
+    assert sim.stats["sharpe"].shape == (3, 4)
+    for i, thr in enumerate(thresholds[:, 0]):
+        for j, fee in enumerate(fees):
+            one = simulate(signal, prices, threshold=thr, fee=fee, periods_per_year=365)
+            for k in one.stats:
+                assert sim.stats[k][i, j] == pytest.approx(float(one.stats[k]))
+    assert np.all(np.diff(sim.stats["total_return"], axis=1) <= 0)
+    assert np.all(np.diff(sim.stats["turnover"], axis=0) <= 0)
+
+
+def test_batch_signal_and_validation():
+    data = json.loads((R / "examples" / "intraday_fractal.json").read_text())
+    payloads = [dict(data, vol_regime_pctl=v) for v in np.linspace(0, 1, 20)]
+    payloads[5] = dict(data, window="bad")
+    res = run_v2_batch(payloads, TS, layout="columns")
+    signal = batch_signal(res)
+    assert np.isnan(signal[5]) and np.isfinite(np.delete(signal, 5)).all()
+    sim = simulate(signal, np.linspace(100, 120, 20))
+    assert sim.positions[5] == 0.0 and sim.stats["total_return"] > 0
+    with pytest.raises(ValueError):
+        simulate(signal, np.linspace(100, 120, 19))
+    with pytest.raises(ValueError):
+        simulate(signal, np.linspace(-1, 1, 20))
+    with pytest.raises(ValueError):
+        simulate(signal, np.linspace(100, 120, 20), fee=-1)
+    with pytest.raises(ValueError):
+        simulate(signal, np.linspace(100, 120, 20), sizing="kelly")
@@ -0,0 +1,74 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import cli.btcmi as btcmi
+from btcmi import batch, plans
+from btcmi.runner import run_v1, run_v1_all
+
+R = Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+def _example(name: str) -> dict:
+    doc = json.loads((R / "examples" / f"{name}.json").read_text())
+    return doc.get("input", doc)
+
+
+@pytest.mark.parametrize("name", ["intraday", "real_intraday"])
+def test_v1_all_matches_per_scenario_runs(name):
+    data = _example(name)
+    data["features"] = dict(data["features"], unknown_feature=3.0)
+    del data["features"]["oi_change_pct"]
+    out = run_v1_all(data, TS)
+    assert list(out["summaries"]) == list(plans.SCENARIO_PLANS)
+    for scenario in plans.SCENARIO_PLANS:
+        single = run_v1(dict(data, scenario=scenario), TS)
+        assert out["summaries"][scenario] == single["summary"]
+        assert out["details"]["contributions"][scenario] == (
+            single["details"]["contributions"]
+        )
+        assert out["details"]["weights"][scenario] == single["details"]["weights"]
+        assert out["details"]["normalized_features"] == (
+            single["details"]["normalized_features"]
+        )
+
+
+def test_scenario_matrix_follows_each_scenario_order():
+    hypothesis = pytest.importorskip("hypothesis")
+    st = hypothesis.strategies
+    weights = {
+        "a": {"x": 0.3, "y": -0.7, "z": 0.1},
+        "b": {"z": 0.2, "x": 0.9},
+    }
+    plans.compile_plans(scenario_weights=weights)
+    try:
+        mat = batch.scenario_matrix()
+        assert mat.columns == ("x", "y", "z")
+
+        @hypothesis.given(
+            st.lists(st.floats(-1, 1), min_size=3, max_size=3),
+            st.lists(st.booleans(), min_size=3, max_size=3),
+        )
+        def check(values, present):
+            norm = {k: v for k, v, p in zip(mat.columns, values, present) if p}
+            score, _ = mat.score(np.array([values]), np.array([present]))
+            for i, name in enumerate(mat.scenarios):
+                assert score[0, i] == plans.SCENARIO_PLANS[name].score(norm)[0]
+
+        check()
+    finally:
+        plans.compile_plans()
+    assert batch.scenario_matrix().scenarios == ("intraday", "scalp", "swing")
+
+
+def test_cli_v1_all(monkeypatch, capsys):
+    path = R / "examples" / "intraday.json"
+    argv = ["btcmi", "run", "--input", str(path), "--mode", "v1.all", "--fixed-ts", TS]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert btcmi.main() == 0
+    out = json.loads(capsys.readouterr().out)
+    assert out == run_v1_all(_example("intraday"), TS)
@@ -1,5 +1,6 @@
 import pytest
 
+from btcmi import runner
 from btcmi.enums import Scenario, Window
 from btcmi.runner import _validate_scenario_window
 
@@ -24,3 +25,20 @@ def test_validate_invalid_scenario():
 def test_validate_missing_window():
     with pytest.raises(ValueError, match="window"):
         _validate_scenario_window({"scenario": "intraday"})
+
+
+def test_validate_accepts_schema_windows():
+    data = {"scenario": "intraday", "window": "4h"}
+    assert _validate_scenario_window(data) == (Scenario.INTRADAY, "4h")
+    with pytest.raises(ValueError, match="window"):
+        _validate_scenario_window({"scenario": "intraday", "window": "1w"})
+
+
+def test_cached_validation_memoizes_only_enumerated_windows():
+    runner._SCENARIO_WINDOW_CACHE.clear()
+    for n in range(1, 50):
+        data = {"scenario": "swing", "window": f"{n}m"}
+        assert runner._cached_scenario_window(data) == (Scenario.SWING, f"{n}m")
+    assert runner._SCENARIO_WINDOW_CACHE == {}
+    runner._cached_scenario_window({"scenario": "swing", "window": "1h"})
+    assert list(runner._SCENARIO_WINDOW_CACHE) == [("swing", "1h")]
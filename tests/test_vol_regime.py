@@ -0,0 +1,83 @@
+import json
+import math
+import pathlib
+
+import numpy as np
+import pytest
+
+from btcmi.cache import ResultCache
+from btcmi.engine_v2 import router_weights
+from btcmi.runner import run_v2, run_v2_batch
+from btcmi.vol_regime import VolRegimeEstimator
+
+R = pathlib.Path(__file__).resolve().parents[1]
+TS = "2025-01-01T00:00:00Z"
+
+
+def _prices(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sigma = np.where((np.arange(n) // 700) % 2 == 0, 1e-3, 4e-3)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 1, n) * sigma))
+
+
+def _exact(prices: np.ndarray, window: int, history: int) -> tuple[float, float]:
+    r = np.diff(np.log(prices))
+    vols = np.array(
+        [math.sqrt((r[i - window : i] ** 2).mean()) for i in range(window, len(r) + 1)]
+    )[-history:]
+    cur = vols[-1]
+    mid = ((vols < cur).sum() + 0.5 * (vols == cur).sum()) / len(vols)
+    return cur, mid
+
+
+def test_percentile_within_reported_bound():
+    prices = _prices(3000)
+    est = VolRegimeEstimator(window=30, history=1000)
+    for t, p in enumerate(prices, 1):
+        est.update(p)
+        if t > 31 and t % 97 == 0:
+            vol, mid = _exact(prices[:t], 30, 1000)
+            assert est.vol == pytest.approx(vol, rel=1e-9)
+            assert est.samples == min(t - 30, 1000)
+            assert abs(est.value - mid) <= est.error_bound + 1e-12
+            if est.samples == 1000:
+                assert est.error_bound < 0.01
+
+
+def test_warm_up_and_validation():
+    est = VolRegimeEstimator(window=3, history=5)
+    assert est.update_many([100.0, 101.0, 100.5]) == 0.5
+    assert est.vol is None and est.samples == 0
+    est.update(101.0)
+    assert est.samples == 1 and est.value == 0.5
+    assert est.diagnostics() == [
+        "vol_regime_pctl:estimate=0.500000,error_bound=0.500000,samples=1"
+    ]
+    for bad in (0.0, -1.0, float("nan"), float("inf")):
+        with pytest.raises(ValueError):
+            est.update(bad)
+    assert est.ticks == 4
+    with pytest.raises(ValueError):
+        VolRegimeEstimator(window=0)
+    with pytest.raises(ValueError):
+        VolRegimeEstimator(vol_range=(1.0, 0.5))
+
+
+def test_estimator_feeds_runner_and_router():
+    est = VolRegimeEstimator(window=20, history=500)
+    est.update_many(_prices(1500, seed=4))
+    assert est.route() == router_weights(est.value)
+    data = json.loads((R / "examples" / "intraday_fractal.json").read_text())
+    out = run_v2(dict(data, vol_regime_pctl=est), TS)
+    ref = run_v2(dict(data, vol_regime_pctl=est.value), TS)
+    assert out["summary"] == ref["summary"]
+    assert out["details"]["router_regime"] == est.route()[0]
+    notes = out["details"]["diagnostics"]["notes"]
+    assert notes == ref["details"]["diagnostics"]["notes"] + est.diagnostics()
+    assert run_v2_batch([dict(data, vol_regime_pctl=est)], TS) == [out]
+
+    cache = ResultCache()
+    assert run_v2(dict(data, vol_regime_pctl=est), TS, cache=cache) == out
+    est.update_many(_prices(300, seed=5) * 1.5)
+    again = run_v2(dict(data, vol_regime_pctl=est), TS, cache=cache)
+    assert again["details"]["diagnostics"]["notes"][-1] == est.diagnostics()[0]